@@ -0,0 +1,123 @@
+#!/usr/bin/env python3
+"""
+Benchmark concurrent report exports: inline rendering versus the report render pool
+
+Fires N concurrent comparison exports (PDF and Word alternately) and measures total
+time and how long the event loop was blocked, using a heartbeat task that should wake
+every 10ms. Inline mode calls the renderers directly from the coroutine, as the export
+endpoints did before; pool mode goes through ExportService and the warm render pool.
+
+Usage: python benchmark_report_rendering.py [concurrent_exports]
+"""
+
+import sys
+import time
+import asyncio
+import logging
+
+logging.basicConfig(level=logging.WARNING)
+
+HEARTBEAT_SECONDS = 0.01
+
+
+def sample_report(index: int) -> dict:
+    return {
+        'comparison_id': f"bench_{index}",
+        'executive_summary': {
+            'verdict': "Document 2 is materially safer",
+            'recommendation': "Negotiate the indemnity and liability cap in Document 1",
+            'safer_document': "document2",
+            'risk_score_difference': 0.214,
+            'impact_level': "high",
+            'key_insights': [f"Insight {i}: termination notice differs by {i * 15} days" for i in range(8)]
+        },
+        'document_summaries': {
+            'document1': {'type': "service_agreement", 'overall_risk': {'level': "HIGH", 'score': 0.71}, 'clause_count': 42},
+            'document2': {'type': "service_agreement", 'overall_risk': {'level': "MEDIUM", 'score': 0.49}, 'clause_count': 39}
+        },
+        'visual_differences': {
+            'visual_diff_metadata': {'matched_clauses': 31, 'unique_to_doc1': 11, 'unique_to_doc2': 8},
+            'total_changes': 57,
+            'high_impact_changes': 9
+        },
+        'key_differences': [
+            {
+                'description': f"Limitation of liability clause {i} differs",
+                'severity': "high",
+                'impact': "Uncapped exposure for consequential damages " * 4,
+                'recommendation': "Cap liability at twelve months of fees " * 3,
+                'document1_value': "No cap on liability " * 5,
+                'document2_value': "Liability capped at fees paid " * 5
+            }
+            for i in range(10)
+        ],
+        'clause_analysis': [
+            {
+                'clause_type': "limitation_of_liability",
+                'risk_difference': 0.3,
+                'comparison_notes': "Document 2 caps liability and excludes indirect damages. " * 6,
+                'recommendation': "Adopt Document 2 wording " * 4,
+                'semantic_similarity': 0.62
+            }
+            for _ in range(5)
+        ],
+        'processing_metrics': {'total_processing_time': 3.2, 'semantic_analysis_enabled': True, 'embeddings_used': 84}
+    }
+
+
+async def heartbeat(stop: asyncio.Event, lags: list):
+    while not stop.is_set():
+        start = time.perf_counter()
+        await asyncio.sleep(HEARTBEAT_SECONDS)
+        lags.append(time.perf_counter() - start - HEARTBEAT_SECONDS)
+
+
+async def run(mode: str, count: int):
+    from services.export_service import ExportService, render_comparison_pdf, render_comparison_word
+
+    service = ExportService()
+
+    async def export_inline(index: int) -> bytes:
+        render = render_comparison_pdf if index % 2 == 0 else render_comparison_word
+        return render(sample_report(index))
+
+    async def export_pooled(index: int) -> bytes:
+        return await service.export_report(sample_report(index), 'pdf' if index % 2 == 0 else 'docx')
+
+    export = export_inline if mode == 'inline' else export_pooled
+    stop = asyncio.Event()
+    lags: list = []
+    beat = asyncio.create_task(heartbeat(stop, lags))
+    await asyncio.sleep(0.05)
+
+    start = time.perf_counter()
+    results = await asyncio.gather(*(export(i) for i in range(count)))
+    elapsed = time.perf_counter() - start
+
+    stop.set()
+    await beat
+    total_bytes = sum(len(result) for result in results)
+    print(f"{mode:<8}{elapsed * 1000:>10.0f}{max(lags) * 1000:>14.1f}{sum(lags) * 1000:>14.0f}{total_bytes // 1024:>10}")
+
+
+async def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 16
+
+    from services.report_rendering import warm_render_pool, RENDER_WORKERS
+    from services.worker_pool import shutdown_process_pools
+
+    start = time.perf_counter()
+    await warm_render_pool()
+    print(f"Render pool warmed in {time.perf_counter() - start:.2f}s ({RENDER_WORKERS} workers); "
+          f"{count} concurrent exports")
+    print(f"{'mode':<8}{'total ms':>10}{'max stall ms':>14}{'sum stall ms':>14}{'KiB out':>10}")
+
+    try:
+        await run('inline', count)
+        await run('pool', count)
+    finally:
+        shutdown_process_pools()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+"""
+Benchmark expert review search: FTS5 index versus LIKE scans
+
+Seeds a throwaway SQLite database with expert review items, then runs the same
+searches through ReviewTrackingService.search_reviews with the full-text index and
+with the previous leading-wildcard ilike filters.
+
+Usage: python benchmark_review_search.py [reviews] [repeats]
+"""
+
+import os
+import sys
+import time
+import random
+import logging
+import tempfile
+from datetime import datetime, timedelta
+
+logging.basicConfig(level=logging.WARNING)
+
+NOTE_WORDS = [
+    "indemnity", "clause", "ambiguous", "termination", "liability", "cap", "missing",
+    "arbitration", "seat", "unclear", "payment", "schedule", "renewal", "automatic",
+    "confidentiality", "survives", "governing", "law", "jurisdiction", "warranty"
+]
+
+
+def seed(engine, count: int):
+    from models.expert_queue_models import ExpertReviewItem, ReviewStatus
+
+    random.seed(42)
+    statuses = [status.value for status in ReviewStatus]
+    start = datetime.utcnow() - timedelta(days=365)
+    rows = []
+    for i in range(count):
+        created = start + timedelta(minutes=i * 5)
+        rows.append({
+            'review_id': f"review_{created.strftime('%Y%m%d_%H%M%S')}_{i:06x}",
+            'document_content': "",
+            'ai_analysis': "{}",
+            'user_email': f"user{i % 5000}@example{i % 7}.com",
+            'confidence_score': random.random(),
+            'status': random.choice(statuses),
+            'priority': "medium",
+            'created_at': created,
+            'updated_at': created,
+            'assigned_expert_id': f"expert_{i % 40}",
+            'expert_notes': " ".join(random.choices(NOTE_WORDS, k=12)) if i % 3 == 0 else None
+        })
+    with engine.begin() as connection:
+        for offset in range(0, count, 10000):
+            connection.execute(ExpertReviewItem.__table__.insert(), rows[offset:offset + 10000])
+
+
+def timed(service, repeats: int, **kwargs):
+    results = service.search_reviews(**kwargs)
+    start = time.perf_counter()
+    for _ in range(repeats):
+        service.search_reviews(**kwargs)
+    return (time.perf_counter() - start) / repeats * 1000, len(results)
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    repeats = int(sys.argv[2]) if len(sys.argv) > 2 else 20
+
+    directory = tempfile.mkdtemp(prefix="review_search_")
+    os.environ['DATABASE_URL'] = f"sqlite:///{os.path.join(directory, 'reviews.db')}"
+
+    from services.expert_queue_service import ExpertQueueService
+    from services.review_tracking_service import ReviewTrackingService
+    from models.expert_queue_models import ReviewStatus
+
+    seed(ExpertQueueService().engine, count)
+    start = time.perf_counter()
+    service = ReviewTrackingService()
+    print(f"Seeded {count} reviews; index built in {time.perf_counter() - start:.2f}s "
+          f"(full-text search {'enabled' if service.full_text_search else 'UNAVAILABLE'})")
+
+    now = datetime.utcnow()
+    cases = [
+        ("exact review id", {'query': f"review_{(now - timedelta(days=200)).strftime('%Y%m%d')}"}),
+        ("email prefix", {'query': "user4217@exam"}),
+        ("notes tokens", {'query': "arbitration seat"}),
+        ("notes + status", {'query': "indemnity", 'status': ReviewStatus.PENDING}),
+        ("notes + 30 days", {'query': "warranty", 'date_from': now - timedelta(days=30)}),
+        ("no match", {'query': "nonexistentterm"}),
+    ]
+
+    print(f"{'search':<18}{'fts ms':>10}{'like ms':>10}{'speedup':>10}{'rows':>8}")
+    for name, kwargs in cases:
+        service.full_text_search = True
+        fts_ms, fts_rows = timed(service, repeats, **kwargs)
+        service.full_text_search = False
+        like_ms, like_rows = timed(service, repeats, **kwargs)
+        print(f"{name:<18}{fts_ms:>10.2f}{like_ms:>10.2f}{like_ms / fts_ms:>9.1f}x{fts_rows:>5}/{like_rows}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,119 @@
+#!/usr/bin/env python3
+"""
+Benchmark the pooled SMTP transport against a local in-process SMTP sink
+
+Sends a burst of report-sized emails through SMTPConnectionPool and, for comparison,
+through one fresh smtplib connection per message (the previous behaviour).
+
+Usage: python benchmark_smtp_pool.py [messages] [pool_size] [attachment_kb]
+"""
+
+import sys
+import time
+import asyncio
+import smtplib
+import logging
+import threading
+import socketserver
+from email.mime.text import MIMEText
+from email.mime.multipart import MIMEMultipart
+from email.mime.application import MIMEApplication
+
+from services.smtp_pool import SMTPConnectionPool
+
+logging.basicConfig(level=logging.WARNING)
+
+# Simulated network round trip per SMTP command, so connection setup has a realistic cost
+COMMAND_LATENCY = 0.002
+
+
+class SMTPSinkHandler(socketserver.StreamRequestHandler):
+    """Minimal SMTP server that accepts and discards every message"""
+
+    def reply(self, line: str):
+        time.sleep(COMMAND_LATENCY)
+        self.wfile.write(f"{line}\r\n".encode())
+
+    def handle(self):
+        self.reply("220 sink ready")
+        while True:
+            line = self.rfile.readline()
+            if not line:
+                return
+            command = line.decode(errors='replace').strip().upper()
+            if command.startswith(("EHLO", "HELO")):
+                self.reply("250-sink")
+                self.reply("250 SIZE 52428800")
+            elif command == "DATA":
+                self.reply("354 end data with <CR><LF>.<CR><LF>")
+                while self.rfile.readline() not in (b".\r\n", b""):
+                    pass
+                self.server.messages += 1
+                self.reply("250 queued")
+            elif command == "QUIT":
+                self.reply("221 bye")
+                return
+            else:
+                self.reply("250 ok")
+
+
+class SMTPSink(socketserver.ThreadingTCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+    messages = 0
+
+
+def build_message(index: int, attachment: bytes) -> MIMEMultipart:
+    msg = MIMEMultipart('alternative')
+    msg['From'] = "LegalSaathi <noreply@legalsaathi.com>"
+    msg['To'] = f"user{index}@example.com"
+    msg['Subject'] = f"Legal Document Analysis Report #{index}"
+    msg.attach(MIMEText("Your report is attached.", 'plain', 'utf-8'))
+    msg.attach(MIMEText("<p>Your report is attached.</p>", 'html', 'utf-8'))
+    msg.attach(MIMEApplication(attachment, _subtype='pdf'))
+    return msg
+
+
+async def send_pooled(port: int, messages, pool_size: int) -> float:
+    pool = SMTPConnectionPool("127.0.0.1", port, use_tls=False, max_connections=pool_size)
+    start = time.perf_counter()
+    await asyncio.gather(*(pool.send_message(msg) for msg in messages))
+    elapsed = time.perf_counter() - start
+    print(f"  pool stats: {pool.get_stats()}")
+    pool.close()
+    return elapsed
+
+
+def send_unpooled(port: int, messages) -> float:
+    start = time.perf_counter()
+    for msg in messages:
+        with smtplib.SMTP("127.0.0.1", port) as server:
+            server.ehlo()
+            server.send_message(msg)
+    return time.perf_counter() - start
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    pool_size = int(sys.argv[2]) if len(sys.argv) > 2 else 3
+    attachment = b"%PDF-1.4 " + b"x" * (int(sys.argv[3]) if len(sys.argv) > 3 else 64) * 1024
+
+    sink = SMTPSink(("127.0.0.1", 0), SMTPSinkHandler)
+    port = sink.server_address[1]
+    threading.Thread(target=sink.serve_forever, daemon=True).start()
+
+    messages = [build_message(i, attachment) for i in range(count)]
+    print(f"Sending {count} messages ({len(attachment) // 1024} KB attachment) to sink on port {port}")
+
+    unpooled = send_unpooled(port, messages)
+    print(f"connection per message: {unpooled:.2f}s ({count / unpooled:.1f} msg/s)")
+
+    pooled = asyncio.run(send_pooled(port, messages, pool_size))
+    print(f"pooled ({pool_size} connections): {pooled:.2f}s ({count / pooled:.1f} msg/s)")
+
+    print(f"sink received {sink.messages} messages")
+    sink.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -9,9 +9,11 @@ from fastapi import HTTPException
 
 from models.comparison_models import (
     DocumentComparisonRequest, DocumentComparisonResponse,
-    ComparisonSummaryResponse
+    ComparisonSummaryResponse, TemplateRegistrationRequest,
+    TemplateComparisonRequest, TemplateComparisonResponse
 )
 from services.comparison_service import ComparisonService
+from services.report_rendering import RenderQueueFull
 
 logger = logging.getLogger(__name__)
 
@@ -27,18 +29,22 @@ class ComparisonController:
         try:
             logger.info(f"Starting document comparison: {request.document1_type} vs {request.document2_type}")
             
-            # Validate documents
-            if len(request.document1_text.strip()) < 100:
-                raise HTTPException(
-                    status_code=400,
-                    detail="Document 1 text must be at least 100 characters long"
-                )
-            
-            if len(request.document2_text.strip()) < 100:
-                raise HTTPException(
-                    status_code=400,
-                    detail="Document 2 text must be at least 100 characters long"
-                )
+            # Validate documents - each needs text or the ID of a stored analysis
+            for label, text, analysis_id in (
+                ("Document 1", request.document1_text, request.document1_analysis_id),
+                ("Document 2", request.document2_text, request.document2_analysis_id)
+            ):
+                if analysis_id and not text:
+                    if not self.comparison_service.document_service.get_stored_analysis(analysis_id):
+                        raise HTTPException(
+                            status_code=404,
+                            detail=f"{label} analysis {analysis_id} not found"
+                        )
+                elif not text or len(text.strip()) < 100:
+                    raise HTTPException(
+                        status_code=400,
+                        detail=f"{label} text must be at least 100 characters long"
+                    )
             
             # Perform comparison
             result = await self.comparison_service.compare_documents(request)
@@ -55,6 +61,60 @@ class ComparisonController:
                 detail=f"Comparison failed: {str(e)}"
             )
     
+    async def register_template(self, request: TemplateRegistrationRequest) -> Dict[str, Any]:
+        """Add a house template to the template library"""
+        try:
+            template = await self.comparison_service.register_template(request)
+            return {"success": True, "template": template}
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        except Exception as e:
+            logger.error(f"Template registration failed: {e}")
+            raise HTTPException(
+                status_code=500,
+                detail=f"Template registration failed: {str(e)}"
+            )
+    
+    async def list_templates(self) -> Dict[str, Any]:
+        """List templates in the template library"""
+        templates = self.comparison_service.list_templates()
+        return {"templates": templates, "total": len(templates)}
+    
+    async def delete_template(self, template_id: str) -> Dict[str, Any]:
+        """Remove a template from the template library"""
+        if not self.comparison_service.remove_template(template_id):
+            raise HTTPException(status_code=404, detail=f"Template {template_id} not found")
+        return {"success": True, "template_id": template_id}
+    
+    async def compare_against_templates(self, request: TemplateComparisonRequest) -> TemplateComparisonResponse:
+        """Compare a document against every template in the library"""
+        try:
+            if not request.document_text and not request.analysis_id:
+                raise HTTPException(
+                    status_code=400,
+                    detail="Either document_text or analysis_id is required"
+                )
+            if request.analysis_id and not request.document_text:
+                if not self.comparison_service.document_service.get_stored_analysis(request.analysis_id):
+                    raise HTTPException(status_code=404, detail=f"Analysis {request.analysis_id} not found")
+            if not self.comparison_service.list_templates():
+                raise HTTPException(status_code=404, detail="Template library is empty")
+            
+            result = await self.comparison_service.compare_against_templates(request)
+            logger.info(f"Template comparison completed: {result.comparison_id}")
+            return result
+            
+        except HTTPException:
+            raise
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        except Exception as e:
+            logger.error(f"Template comparison failed: {e}")
+            raise HTTPException(
+                status_code=500,
+                detail=f"Template comparison failed: {str(e)}"
+            )
+    
     async def get_comparison_summary(self, comparison_id: str) -> ComparisonSummaryResponse:
         """Get summary of a previous comparison"""
         try:
@@ -108,6 +168,8 @@ class ComparisonController:
             
         except HTTPException:
             raise
+        except RenderQueueFull as e:
+            raise HTTPException(status_code=503, detail=str(e))
         except Exception as e:
             logger.error(f"Failed to export comparison report: {e}")
             raise HTTPException(
@@ -50,7 +50,7 @@ class EmailController:
             user_id = current_user.get('uid', 'anonymous') if current_user else 'anonymous'
             
             # Check rate limits
-            rate_limit_info = self.gmail_service.check_rate_limit(user_id)
+            rate_limit_info = await self.gmail_service.check_rate_limit(user_id)
             if rate_limit_info.is_rate_limited:
                 retry_after = int((rate_limit_info.next_reset_time - datetime.now()).total_seconds())
                 return EmailNotificationResponse(
@@ -146,7 +146,7 @@ class EmailController:
     
     async def get_email_rate_limit_info(self, user_id: str) -> EmailRateLimitInfo:
         """Get rate limit information for user"""
-        return self.gmail_service.check_rate_limit(user_id)
+        return await self.gmail_service.check_rate_limit(user_id)
     
     async def test_email_service(self) -> Dict[str, Any]:
         """Test email service availability and configuration"""
@@ -272,8 +272,8 @@ class EmailController:
                 error_message="Email service not available"
             )
         
-        # Check rate limits
-        rate_limit_info = self.gmail_service.check_rate_limit(user_id)
+        # Reserve against the rate limits
+        rate_limit_info = await self.gmail_service.acquire_rate_limit(user_id)
         if rate_limit_info.is_rate_limited:
             return EmailNotificationResponse(
                 success=False,
@@ -373,7 +373,6 @@ class EmailController:
                 response = await self.gmail_service._send_email(email_request)
             
             if response.success:
-                self.gmail_service.increment_rate_limit(user_id)
                 return EmailNotificationResponse(
                     success=True,
                     message_id=response.message_id,
@@ -15,6 +15,7 @@ from models.expert_queue_models import (
 from models.email_models import EmailSendResponse
 from services.expert_review_email_service import ExpertReviewEmailService
 from services.expert_pdf_generator import ExpertPDFGenerator
+from services.report_rendering import RenderQueueFull
 from services.review_tracking_service import ReviewTrackingService
 from services.feedback_service import FeedbackService
 from fastapi import Request
@@ -141,7 +142,7 @@ async def send_expert_results_notification(
         )
         
         # Generate expert-certified PDF
-        pdf_content = pdf_generator.generate_expert_certified_report(
+        pdf_content = await pdf_generator.render_expert_certified_report(
             expert_analysis=expert_analysis,
             original_ai_analysis=None,  # Would need to fetch from database
             review_id=request.review_id,
@@ -164,6 +165,8 @@ async def send_expert_results_notification(
         
         return response
         
+    except RenderQueueFull as e:
+        raise HTTPException(status_code=503, detail=str(e))
     except Exception as e:
         logger.error(f"Error sending expert results notification: {e}")
         raise HTTPException(status_code=500, detail=f"Failed to send results: {str(e)}")
@@ -408,6 +411,52 @@ async def generate_feedback_report(
         raise HTTPException(status_code=500, detail=f"Failed to generate report: {str(e)}")
 
 
+@router.get("/email-outbox/stats")
+async def get_email_outbox_statistics(
+    current_user: Dict[str, Any] = Depends(get_current_user)
+) -> Dict[str, Any]:
+    """Get email outbox queue depth and delivery latency (admin only)"""
+    
+    try:
+        if not current_user.get('admin', False):
+            raise HTTPException(status_code=403, detail="Admin access required")
+        
+        return email_service.get_outbox_stats()
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error getting email outbox statistics: {e}")
+        raise HTTPException(status_code=500, detail=f"Failed to get statistics: {str(e)}")
+
+
+@router.get("/email-outbox/{message_id}")
+async def get_email_delivery_status(
+    message_id: str = Path(..., description="Outbox message ID returned when the email was queued")
+) -> Dict[str, Any]:
+    """Get delivery status of a queued email"""
+    
+    status = email_service.outbox.get_message_status(message_id)
+    if status is None:
+        raise HTTPException(status_code=404, detail="Message not found")
+    return status
+
+
+@router.post("/email-outbox/{message_id}/requeue")
+async def requeue_dead_letter_email(
+    message_id: str = Path(..., description="Dead-lettered outbox message ID"),
+    current_user: Dict[str, Any] = Depends(get_current_user)
+) -> Dict[str, Any]:
+    """Retry delivery of a dead-lettered email (admin only)"""
+    
+    if not current_user.get('admin', False):
+        raise HTTPException(status_code=403, detail="Admin access required")
+    
+    if not email_service.outbox.requeue(message_id):
+        raise HTTPException(status_code=404, detail="Dead-lettered message not found")
+    return {'success': True, 'message_id': message_id}
+
+
 # Health check endpoint
 @router.get("/health")
 async def health_check() -> Dict[str, Any]:
@@ -10,9 +10,10 @@ import os
 from datetime import datetime
 from typing import Dict, Any, Optional
 from fastapi import HTTPException
-from fastapi.responses import StreamingResponse
+from fastapi.responses import Response, StreamingResponse
 
 from models.document_models import DocumentAnalysisResponse
+from services.export_cache import export_artifact_cache, artifact_key, artifact_headers, etag_matches
 
 logger = logging.getLogger(__name__)
 
@@ -23,15 +24,23 @@ class ExportController:
     def __init__(self):
         pass
     
-    async def export_to_pdf(self, data: Dict[str, Any]) -> StreamingResponse:
+    async def export_to_pdf(self, data: Dict[str, Any], if_none_match: Optional[str] = None) -> Response:
         """Export analysis results to PDF - Using same enhanced quality as email"""
         try:
             logger.info("Generating PDF export for download (same quality as email)")
             logger.info(f"Export data keys: {list(data.keys())}")
             logger.info(f"Analysis data type: {type(data.get('analysis'))}")
             
+            # Enhanced PDFs are cached by analysis content, which also names them for If-None-Match.
+            # A matching POST precondition fails with 412 (RFC 9110 13.1.2); the client already
+            # holds the artifact and can revalidate it at its Content-Location
+            analysis = self._parse_analysis(data)
+            artifact = artifact_key('analysis', 'pdf', analysis) if analysis else None
+            if artifact and etag_matches(if_none_match, artifact):
+                return Response(status_code=412, headers=artifact_headers(artifact))
+            
             # Generate PDF content using enhanced method (same quality as email)
-            pdf_content = await self._generate_pdf_content(data)
+            pdf_content = await self._generate_pdf_content(data, analysis)
             
             # Validate PDF content
             if not pdf_content or len(pdf_content) == 0:
@@ -43,13 +52,17 @@ class ExportController:
             
             logger.info(f"PDF generated successfully, size: {len(pdf_content)} bytes")
             
+            # Only the cached enhanced PDF gets a validator; simple fallback PDFs are not cached
+            validators = artifact_headers(artifact) if artifact and export_artifact_cache.disk.contains(artifact) else {}
+            
             # Create streaming response
             return StreamingResponse(
                 io.BytesIO(pdf_content),
                 media_type="application/pdf",
                 headers={
                     "Content-Disposition": f"attachment; filename=legal_analysis_{datetime.now().strftime('%Y%m%d_%H%M%S')}.pdf",
-                    "Content-Length": str(len(pdf_content))
+                    "Content-Length": str(len(pdf_content)),
+                    **validators
                 }
             )
             
@@ -64,19 +77,26 @@ class ExportController:
                 detail=f"PDF export failed: {str(e)}"
             )
     
-    async def export_to_word(self, data: Dict[str, Any]) -> StreamingResponse:
+    async def export_to_word(self, data: Dict[str, Any], if_none_match: Optional[str] = None) -> Response:
         """Export analysis results to Word document"""
         try:
             logger.info("Generating Word export")
             
-            # Generate Word content
-            word_content = await self._generate_word_content(data)
+            artifact = artifact_key('analysis', 'docx', data)
+            if etag_matches(if_none_match, artifact):
+                return Response(status_code=412, headers=artifact_headers(artifact))
+            
+            # Generate Word content (reused when the same analysis was exported before)
+            word_content = await export_artifact_cache.get_or_render(
+                artifact, lambda: self._generate_word_content(data)
+            )
             
             return StreamingResponse(
                 io.BytesIO(word_content),
                 media_type="application/vnd.openxmlformats-officedocument.wordprocessingml.document",
                 headers={
-                    "Content-Disposition": f"attachment; filename=legal_analysis_{datetime.now().strftime('%Y%m%d_%H%M%S')}.docx"
+                    "Content-Disposition": f"attachment; filename=legal_analysis_{datetime.now().strftime('%Y%m%d_%H%M%S')}.docx",
+                    **artifact_headers(artifact)
                 }
             )
             
@@ -88,7 +108,13 @@ class ExportController:
             )
     
     async def generate_enhanced_pdf(self, analysis: DocumentAnalysisResponse) -> bytes:
-        """Generate enhanced branded PDF with risk visualization"""
+        """Generate enhanced branded PDF with risk visualization (cached by analysis content)"""
+        return await export_artifact_cache.get_or_render(
+            artifact_key('analysis', 'pdf', analysis), lambda: self._render_enhanced_pdf(analysis)
+        )
+    
+    async def _render_enhanced_pdf(self, analysis: DocumentAnalysisResponse) -> bytes:
+        """Render the enhanced PDF"""
         try:
             logger.info("Starting enhanced PDF generation")
             from reportlab.lib.pagesizes import A4
@@ -392,11 +418,8 @@ class ExportController:
                 detail=f"PDF generation failed: {str(e)}"
             )
 
-    async def _generate_pdf_content(self, data: Dict[str, Any]) -> bytes:
-        """Generate PDF content from analysis data - Always use enhanced PDF like email"""
-        logger.info("Generating enhanced PDF for download (same quality as email)")
-        logger.info(f"Input data keys: {list(data.keys())}")
-        
+    def _parse_analysis(self, data: Dict[str, Any]) -> Optional[DocumentAnalysisResponse]:
+        """Build a DocumentAnalysisResponse from export request data, or None if it cannot be parsed"""
         analysis = None
         
         # Try multiple ways to extract analysis data
@@ -445,6 +468,17 @@ class ExportController:
             except Exception as e:
                 logger.error(f"Failed to convert object attributes: {e}")
         
+        return analysis
+    
+    async def _generate_pdf_content(
+        self,
+        data: Dict[str, Any],
+        analysis: Optional[DocumentAnalysisResponse]
+    ) -> bytes:
+        """Generate PDF content from analysis data - Always use enhanced PDF like email"""
+        logger.info("Generating enhanced PDF for download (same quality as email)")
+        logger.info(f"Input data keys: {list(data.keys())}")
+        
         # If we successfully parsed the analysis, use enhanced PDF
         if analysis:
             try:
@@ -3,10 +3,13 @@ Enhanced Speech controller for FastAPI backend with user-based rate limiting,
 audio validation, caching, and comprehensive error handling
 """
 
+import os
+import json
+import asyncio
 import logging
-from fastapi import HTTPException, UploadFile, File, Request
-from fastapi.responses import StreamingResponse
-import io
+from fastapi import HTTPException, UploadFile, File, Request, WebSocket, WebSocketDisconnect
+from fastapi.responses import FileResponse, Response, StreamingResponse
+from starlette.background import BackgroundTask
 from typing import Optional
 
 from models.speech_models import (
@@ -15,6 +18,7 @@ from models.speech_models import (
     SupportedLanguagesResponse
 )
 from services.google_speech_service import speech_service
+from services.streaming_transcription import detect_audio_format, frame_size, iter_frames
 from middleware.firebase_auth_middleware import UserBasedRateLimiter
 
 logger = logging.getLogger(__name__)
@@ -41,8 +45,8 @@ class SpeechController:
             is_authenticated = getattr(request.state, 'is_authenticated', False)
             
             # Check rate limits
-            if not self.rate_limiter.check_rate_limit(user_id, 'speech_to_text', request):
-                rate_info = self.rate_limiter.get_rate_limit_info(user_id, 'speech_to_text')
+            if not await self.rate_limiter.check_rate_limit(user_id, 'speech_to_text', request):
+                rate_info = await self.rate_limiter.get_rate_limit_info(user_id, 'speech_to_text')
                 raise HTTPException(
                     status_code=429,
                     detail=f"Speech-to-text rate limit exceeded. Try again in {rate_info.get('reset_time', 3600)} seconds."
@@ -105,7 +109,113 @@ class SpeechController:
                 detail=f"Speech-to-text conversion failed: {str(e)}"
             )
     
-    async def text_to_speech(self, request_obj: Request, tts_request: TextToSpeechRequest) -> StreamingResponse:
+    async def speech_to_text_stream(
+        self,
+        request: Request,
+        audio_file: UploadFile = File(...),
+        language_code: str = "en-US",
+        enable_punctuation: bool = True
+    ) -> StreamingResponse:
+        """Transcribe an uploaded recording progressively, streaming transcripts as server-sent events"""
+        user_id = getattr(request.state, 'user_id', None) or "anonymous"
+        
+        if not await self.rate_limiter.check_rate_limit(user_id, 'speech_to_text', request):
+            rate_info = await self.rate_limiter.get_rate_limit_info(user_id, 'speech_to_text')
+            raise HTTPException(
+                status_code=429,
+                detail=f"Speech-to-text rate limit exceeded. Try again in {rate_info.get('reset_time', 3600)} seconds."
+            )
+        
+        if not self.speech_service.streaming_transcriber:
+            raise HTTPException(status_code=503, detail="Streaming speech recognition is not available")
+        
+        if not audio_file.filename:
+            raise HTTPException(status_code=400, detail="No audio file provided")
+        
+        # Sniff the format from the first bytes; the rest is read frame by frame
+        header = await audio_file.read(4096)
+        try:
+            audio_format = detect_audio_format(header, audio_file.filename)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        
+        audio_config = {
+            **audio_format,
+            'language_code': language_code,
+            'enable_punctuation': enable_punctuation
+        }
+        frames = iter_frames(audio_file.read, frame_size(audio_format['bytes_per_second']),
+                             initial=header[audio_format['header_size']:])
+        
+        logger.info(f"Streaming speech-to-text for user: {user_id}, language: {language_code}, "
+                    f"encoding: {audio_format['encoding']}")
+        
+        async def event_stream():
+            async for event in self.speech_service.transcribe_stream(frames, audio_config, user_id):
+                yield f"event: {event['type']}\ndata: {json.dumps(event)}\n\n"
+        
+        return StreamingResponse(
+            event_stream(),
+            media_type="text/event-stream",
+            headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+        )
+    
+    async def speech_to_text_websocket(self, websocket: WebSocket):
+        """
+        Live transcription over a WebSocket
+        
+        The client sends a JSON config message ({"language_code", "encoding",
+        "sample_rate_hertz"}), then binary audio messages, then {"event": "end"}.
+        Partial and final transcripts are sent back as JSON as they are recognized.
+        """
+        await websocket.accept()
+        user_id = getattr(websocket.state, 'user_id', None) or "anonymous"
+        
+        if not await self.rate_limiter.check_rate_limit(user_id, 'speech_to_text', websocket):
+            await websocket.send_json({'type': 'error', 'error': 'Speech-to-text rate limit exceeded'})
+            await websocket.close(code=1008)
+            return
+        
+        try:
+            config = json.loads(await websocket.receive_text())
+            encoding = config.get('encoding', 'LINEAR16')
+            sample_rate = int(config.get('sample_rate_hertz', 16000))
+            # Raw PCM has an exact byte rate; compressed formats are framed at a nominal rate
+            bytes_per_second = sample_rate * 2 if encoding == 'LINEAR16' else int(config.get('bytes_per_second', 4000))
+            audio_config = {
+                'encoding': encoding,
+                'sample_rate_hertz': sample_rate,
+                'audio_channel_count': 1,
+                'language_code': config.get('language_code', 'en-US'),
+                'enable_punctuation': config.get('enable_punctuation', True)
+            }
+            
+            async def receive_audio(_size: int) -> bytes:
+                while True:
+                    message = await websocket.receive()
+                    if message['type'] == 'websocket.disconnect':
+                        return b""
+                    if message.get('bytes'):
+                        return message['bytes']
+                    if message.get('text') and json.loads(message['text']).get('event') == 'end':
+                        return b""
+            
+            frames = iter_frames(receive_audio, frame_size(bytes_per_second))
+            async for event in self.speech_service.transcribe_stream(frames, audio_config, user_id):
+                await websocket.send_json(event)
+            await websocket.close()
+            
+        except WebSocketDisconnect:
+            logger.info(f"Speech WebSocket closed by client for user: {user_id}")
+        except Exception as e:
+            logger.error(f"Speech WebSocket transcription failed: {e}")
+            try:
+                await websocket.send_json({'type': 'error', 'error': str(e)})
+                await websocket.close(code=1011)
+            except Exception:
+                pass
+    
+    async def text_to_speech(self, request_obj: Request, tts_request: TextToSpeechRequest) -> Response:
         """Handle text-to-speech conversion with enhanced caching and rate limiting"""
         try:
             # Get user info from request state
@@ -120,8 +230,8 @@ class SpeechController:
                 )
             
             # Check rate limits
-            if not self.rate_limiter.check_rate_limit(user_id, 'text_to_speech', request_obj):
-                rate_info = self.rate_limiter.get_rate_limit_info(user_id, 'text_to_speech')
+            if not await self.rate_limiter.check_rate_limit(user_id, 'text_to_speech', request_obj):
+                rate_info = await self.rate_limiter.get_rate_limit_info(user_id, 'text_to_speech')
                 raise HTTPException(
                     status_code=429,
                     detail=f"Text-to-speech rate limit exceeded. Try again in {rate_info.get('reset_time', 3600)} seconds."
@@ -129,8 +239,40 @@ class SpeechController:
             
             logger.info(f"Processing text-to-speech for user: {user_id}, language: {tts_request.language_code}")
             
-            # Process text-to-speech with enhanced service
-            result = self.speech_service.text_to_speech(
+            # Determine content type based on encoding
+            content_type_map = {
+                'MP3': 'audio/mpeg',
+                'WAV': 'audio/wav',
+                'OGG_OPUS': 'audio/ogg'
+            }
+            content_type = content_type_map.get(tts_request.audio_encoding, 'audio/mpeg')
+            
+            # Fully cached clips are served from the disk cache file; the lookup applies the
+            # same request checks, and the file is opened before responding so a concurrent
+            # eviction cannot remove it from under FileResponse
+            cached_file = await asyncio.to_thread(
+                self.speech_service.open_cached_audio,
+                text=tts_request.text,
+                language_code=tts_request.language_code,
+                voice_gender=tts_request.voice_gender,
+                speaking_rate=tts_request.speaking_rate,
+                pitch=tts_request.pitch,
+                user_id=user_id
+            )
+            if cached_file is not None:
+                logger.info(f"Text-to-speech served from disk cache for user: {user_id}")
+                descriptor = cached_file.fileno()
+                return FileResponse(
+                    f"/dev/fd/{descriptor}",  # Reopens the open file even if it was unlinked since
+                    stat_result=os.fstat(descriptor),
+                    media_type=content_type,
+                    filename="speech.mp3",
+                    headers={"X-Audio-Chunks": "1", "X-Cache-Status": "HIT"},
+                    background=BackgroundTask(cached_file.close)
+                )
+            
+            # Start progressive synthesis; the first sentence-sized chunk is ready before we respond
+            result = await self.speech_service.start_text_to_speech_stream(
                 text=tts_request.text,
                 language_code=tts_request.language_code,
                 voice_gender=tts_request.voice_gender,
@@ -145,32 +287,21 @@ class SpeechController:
                     detail=result.get('error', 'Text-to-speech conversion failed')
                 )
             
-            # Create audio stream
-            audio_content = result['audio_content']
-            
-            # Determine content type based on encoding
-            content_type_map = {
-                'MP3': 'audio/mpeg',
-                'WAV': 'audio/wav',
-                'OGG_OPUS': 'audio/ogg'
-            }
-            content_type = content_type_map.get(tts_request.audio_encoding, 'audio/mpeg')
-            
-            # Add cache headers if content was cached
+            # Total length is unknown until every chunk is synthesized, so no Content-Length
             headers = {
                 "Content-Disposition": "attachment; filename=speech.mp3",
-                "Content-Length": str(len(audio_content))
+                "X-Audio-Chunks": str(result['chunks'])
             }
             
-            if result.get('cached'):
+            if result.get('first_chunk_cached'):
                 headers["X-Cache-Status"] = "HIT"
-                logger.info(f"Text-to-speech served from cache for user: {user_id}")
+                logger.info(f"Text-to-speech streaming from cache for user: {user_id}")
             else:
                 headers["X-Cache-Status"] = "MISS"
-                logger.info(f"Text-to-speech conversion completed for user: {user_id}")
+                logger.info(f"Text-to-speech streaming started for user: {user_id}")
             
             return StreamingResponse(
-                io.BytesIO(audio_content),
+                result['audio_stream'],
                 media_type=content_type,
                 headers=headers
             )
@@ -196,8 +327,9 @@ class SpeechController:
                     detail="Speech service is not available"
                 )
             
-            # Process text-to-speech to get metadata
-            result = self.speech_service.text_to_speech(
+            # Process text-to-speech to get metadata (blocking client calls run off the event loop)
+            result = await asyncio.to_thread(
+                self.speech_service.text_to_speech,
                 text=tts_request.text,
                 language_code=tts_request.language_code,
                 voice_gender=tts_request.voice_gender,
@@ -288,8 +420,8 @@ class SpeechController:
             stats = self.speech_service.get_usage_stats(user_id)
             stats['user_id'] = user_id
             stats['rate_limits'] = {
-                'speech_to_text': self.rate_limiter.get_rate_limit_info(user_id, 'speech_to_text'),
-                'text_to_speech': self.rate_limiter.get_rate_limit_info(user_id, 'text_to_speech')
+                'speech_to_text': await self.rate_limiter.get_rate_limit_info(user_id, 'speech_to_text'),
+                'text_to_speech': await self.rate_limiter.get_rate_limit_info(user_id, 'text_to_speech')
             }
             
             return stats
@@ -16,7 +16,6 @@ from models.translation_models import (
     TranslationUsageStats
 )
 from services.google_translate_service import GoogleTranslateService
-from services.cache_service import CacheService
 from services.document_summary_translation_service import DocumentSummaryTranslationService
 
 logger = logging.getLogger(__name__)
@@ -27,7 +26,6 @@ class TranslationController:
     
     def __init__(self):
         self.translation_service = GoogleTranslateService()
-        self.cache_service = CacheService()
         self.summary_translation_service = DocumentSummaryTranslationService()
     
     async def translate_text(self, request: TranslationRequest) -> TranslationResponse:
@@ -42,18 +40,7 @@ class TranslationController:
                     detail="Translation service is currently unavailable"
                 )
             
-            # Check cache first
-            cache_key = self.cache_service.get_cache_key(
-                f"{request.text}_{request.target_language}", 
-                "translation"
-            )
-            
-            cached_result = await self.cache_service.get_cached_translation(cache_key)
-            if cached_result:
-                logger.info("Returning cached translation")
-                return TranslationResponse(**cached_result)
-            
-            # Perform translation
+            # Perform translation (served from the shared translation memory when known)
             result = await self.translation_service.translate_text(
                 text=request.text,
                 target_language=request.target_language,
@@ -80,9 +67,6 @@ class TranslationController:
                 confidence_score=0.9  # Default confidence for Google Translate
             )
             
-            # Cache the result
-            await self.cache_service.store_translation(cache_key, response.dict())
-            
             logger.info("Translation completed successfully")
             return response
             
@@ -100,25 +84,10 @@ class TranslationController:
         try:
             logger.info(f"Translating clause {request.clause_id} to {request.target_language}")
             
-            # Check cache first
-            cache_key = self.cache_service.get_cache_key(
-                f"{request.clause_text}_{request.target_language}_clause", 
-                "translation"
-            )
-            
-            cached_result = await self.cache_service.get_cached_translation(cache_key)
-            if cached_result:
-                logger.info("Returning cached clause translation")
-                return ClauseTranslationResponse(**cached_result)
-            
-            # Perform translation with legal context
-            translation_text = request.clause_text
-            if request.include_legal_context:
-                # Add legal context to improve translation accuracy
-                translation_text = f"Legal clause: {request.clause_text}"
-            
+            # Translate the bare clause: a context prefix would be translated along with it, and
+            # translate_text remembers the result under the clause text for every endpoint to reuse
             result = await self.translation_service.translate_text(
-                text=translation_text,
+                text=request.clause_text,
                 target_language=request.target_language,
                 source_language=request.source_language
             )
@@ -132,10 +101,7 @@ class TranslationController:
                     detail=error_msg
                 )
             
-            # Remove legal context prefix if added
             translated_text = result['translated_text']
-            if request.include_legal_context and translated_text.startswith("Legal clause:"):
-                translated_text = translated_text.replace("Legal clause:", "").strip()
             
             # Generate legal context explanation
             legal_context = None
@@ -155,9 +121,6 @@ class TranslationController:
                 confidence_score=0.9  # Default confidence for Google Translate
             )
             
-            # Cache the result
-            await self.cache_service.store_translation(cache_key, response.dict())
-            
             logger.info("Clause translation completed successfully")
             return response
             
@@ -370,7 +333,8 @@ class TranslationController:
                 supported_languages_count=stats['supported_languages_count'],
                 cache_ttl_hours=stats['cache_ttl_hours'],
                 user_requests_in_window=stats.get('user_requests_in_window'),
-                user_rate_limit=stats.get('user_rate_limit')
+                user_rate_limit=stats.get('user_rate_limit'),
+                translation_memory=stats.get('translation_memory')
             )
             
         except Exception as e:
@@ -3,9 +3,10 @@ Vision API controller for FastAPI backend
 Handles image processing and text extraction operations
 """
 
+import asyncio
 import logging
 from fastapi import HTTPException, UploadFile, File, Form
-from typing import Optional, Dict, Any, List
+from typing import Optional, Dict, Any, List, Tuple
 
 from services.dual_vision_service import dual_vision_service
 from services.google_cloud_vision_service import vision_service
@@ -30,57 +31,7 @@ class VisionController:
         try:
             logger.info(f"Processing image for text extraction: {file.filename}")
             
-            # Validate file
-            if not file.filename:
-                raise HTTPException(status_code=400, detail="No file provided")
-            
-            # Validate file type
-            supported_image_types = {
-                'image/jpeg', 'image/jpg', 'image/png', 
-                'image/webp', 'image/bmp', 'image/gif'
-            }
-            
-            content_type = file.content_type or 'application/octet-stream'
-            logger.info(f"Image content type: {content_type}")
-            
-            if content_type not in supported_image_types:
-                # Check file extension as fallback
-                file_ext = file.filename.lower().split('.')[-1] if '.' in file.filename else ''
-                if file_ext not in ['jpg', 'jpeg', 'png', 'webp', 'bmp', 'gif']:
-                    raise HTTPException(
-                        status_code=422,
-                        detail=f"Unsupported image type: {content_type}. Supported types: JPEG, PNG, WEBP, BMP, GIF"
-                    )
-                # Map extension to MIME type
-                ext_to_mime = {
-                    'jpg': 'image/jpeg',
-                    'jpeg': 'image/jpeg',
-                    'png': 'image/png',
-                    'webp': 'image/webp',
-                    'bmp': 'image/bmp',
-                    'gif': 'image/gif'
-                }
-                content_type = ext_to_mime.get(file_ext, 'image/jpeg')
-            
-            try:
-                # Read file content with size limit (20MB)
-                file_content = await file.read(20 * 1024 * 1024)  # 20MB limit
-                if len(file_content) == 20 * 1024 * 1024:
-                    raise HTTPException(
-                        status_code=422,
-                        detail="Image size exceeds maximum limit of 20MB"
-                    )
-            except Exception as e:
-                logger.error(f"Error reading image file: {e}")
-                raise HTTPException(
-                    status_code=422,
-                    detail="Error reading image file. Please ensure the file is not corrupted."
-                )
-            
-            # Extract image format from content type
-            image_format = content_type.split('/')[-1].upper()
-            if image_format == 'JPG':
-                image_format = 'JPEG'
+            file_content, image_format = await self._read_image_upload(file)
             
             # Use Vision API to extract text
             result = await self.vision_service.detect_text_in_image(
@@ -90,36 +41,7 @@ class VisionController:
                 preprocess=preprocess
             )
             
-            if not result['success']:
-                raise HTTPException(
-                    status_code=500,
-                    detail=result.get('error', 'Text extraction failed')
-                )
-            
-            # Return structured response
-            response = {
-                "success": True,
-                "filename": file.filename,
-                "extracted_text": result['text'],
-                "high_confidence_text": result.get('high_confidence_text', ''),
-                "confidence_scores": result['confidence_scores'],
-                "text_blocks_detected": len(result.get('text_annotations', [])),
-                "legal_sections_identified": len(result.get('legal_sections', [])),
-                "processing_metadata": result.get('processing_metadata', {}),
-                "warnings": []
-            }
-            
-            # Add warnings based on confidence scores
-            avg_confidence = result['confidence_scores'].get('average_confidence', 0.0)
-            if avg_confidence < 0.7:
-                response['warnings'].append(f"Low average confidence ({avg_confidence:.1%}). Text extraction may be inaccurate.")
-            
-            high_conf_ratio = result['confidence_scores'].get('high_confidence_ratio', 0.0)
-            if high_conf_ratio < 0.5:
-                response['warnings'].append(f"Only {high_conf_ratio:.1%} of text blocks have high confidence. Consider using a clearer image.")
-            
-            if result.get('fallback_used'):
-                response['warnings'].append("Vision API not available - using fallback processing")
+            response = self._build_text_extraction_response(file.filename, result)
             
             logger.info(f"Text extraction completed: {file.filename}, {len(result['text'])} characters extracted")
             return response
@@ -133,6 +55,97 @@ class VisionController:
                 detail=f"Text extraction failed: {str(e)}"
             )
     
+    async def _read_image_upload(self, file: UploadFile) -> Tuple[bytes, str]:
+        """Validate an uploaded image and return its content and Vision API image format"""
+        # Validate file
+        if not file.filename:
+            raise HTTPException(status_code=400, detail="No file provided")
+        
+        # Validate file type
+        supported_image_types = {
+            'image/jpeg', 'image/jpg', 'image/png', 
+            'image/webp', 'image/bmp', 'image/gif'
+        }
+        
+        content_type = file.content_type or 'application/octet-stream'
+        logger.info(f"Image content type: {content_type}")
+        
+        if content_type not in supported_image_types:
+            # Check file extension as fallback
+            file_ext = file.filename.lower().split('.')[-1] if '.' in file.filename else ''
+            if file_ext not in ['jpg', 'jpeg', 'png', 'webp', 'bmp', 'gif']:
+                raise HTTPException(
+                    status_code=422,
+                    detail=f"Unsupported image type: {content_type}. Supported types: JPEG, PNG, WEBP, BMP, GIF"
+                )
+            # Map extension to MIME type
+            ext_to_mime = {
+                'jpg': 'image/jpeg',
+                'jpeg': 'image/jpeg',
+                'png': 'image/png',
+                'webp': 'image/webp',
+                'bmp': 'image/bmp',
+                'gif': 'image/gif'
+            }
+            content_type = ext_to_mime.get(file_ext, 'image/jpeg')
+        
+        try:
+            # Read file content with size limit (20MB)
+            file_content = await file.read(20 * 1024 * 1024)  # 20MB limit
+            if len(file_content) == 20 * 1024 * 1024:
+                raise HTTPException(
+                    status_code=422,
+                    detail="Image size exceeds maximum limit of 20MB"
+                )
+        except Exception as e:
+            logger.error(f"Error reading image file: {e}")
+            raise HTTPException(
+                status_code=422,
+                detail="Error reading image file. Please ensure the file is not corrupted."
+            )
+        
+        # Extract image format from content type
+        image_format = content_type.split('/')[-1].upper()
+        if image_format == 'JPG':
+            image_format = 'JPEG'
+        
+        return file_content, image_format
+    
+    def _build_text_extraction_response(self, filename: str, result: Dict[str, Any]) -> Dict[str, Any]:
+        """Convert a Vision API extraction result into the text extraction response"""
+        if not result['success']:
+            raise HTTPException(
+                status_code=500,
+                detail=result.get('error', 'Text extraction failed')
+            )
+        
+        # Return structured response
+        response = {
+            "success": True,
+            "filename": filename,
+            "extracted_text": result['text'],
+            "high_confidence_text": result.get('high_confidence_text', ''),
+            "confidence_scores": result['confidence_scores'],
+            "text_blocks_detected": len(result.get('text_annotations', [])),
+            "legal_sections_identified": len(result.get('legal_sections', [])),
+            "processing_metadata": result.get('processing_metadata', {}),
+            "warnings": []
+        }
+        
+        # Add warnings based on confidence scores
+        avg_confidence = result['confidence_scores'].get('average_confidence', 0.0)
+        if avg_confidence < 0.7:
+            response['warnings'].append(f"Low average confidence ({avg_confidence:.1%}). Text extraction may be inaccurate.")
+        
+        high_conf_ratio = result['confidence_scores'].get('high_confidence_ratio', 0.0)
+        if high_conf_ratio < 0.5:
+            response['warnings'].append(f"Only {high_conf_ratio:.1%} of text blocks have high confidence. Consider using a clearer image.")
+        
+        if result.get('fallback_used'):
+            response['warnings'].append("Vision API not available - using fallback processing")
+        
+        return response
+    
     async def get_vision_service_status(self) -> Dict[str, Any]:
         """Get status of Vision API services"""
         try:
@@ -219,20 +232,17 @@ class VisionController:
             extraction_results = []
             total_confidence_scores = []
             
-            # Process each image
-            for i, file in enumerate(files):
-                logger.info(f"Processing image {i+1}/{len(files)}: {file.filename}")
-                
-                # Extract text using Vision API
-                text_extraction_result = await self.extract_text_from_image(
-                    file=file,
-                    user_id=user_id,
-                    preprocess=True
-                )
-                
-                if not text_extraction_result['success']:
-                    logger.warning(f"Failed to extract text from {file.filename}")
-                    continue
+            # Read all uploads concurrently, then OCR them as a single pipeline
+            uploads = await asyncio.gather(*[self._read_image_upload(file) for file in files])
+            ocr_results = await self.vision_service.detect_text_in_images(
+                images=uploads,
+                user_id=user_id,
+                preprocess=True
+            )
+            
+            # Reassemble pages in upload order
+            for i, (file, result) in enumerate(zip(files, ocr_results)):
+                text_extraction_result = self._build_text_extraction_response(file.filename, result)
                 
                 extracted_text = text_extraction_result['extracted_text']
                 
@@ -9,7 +9,7 @@ from sqlalchemy import create_engine, text
 from sqlalchemy.orm import sessionmaker
 
 from models.expert_queue_models import Base
-from services.feedback_service import ReviewFeedback
+from services.feedback_service import ReviewFeedback, FeedbackRollup
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
@@ -27,7 +27,7 @@ def create_feedback_tables():
         
         # Create all tables
         logger.info("Creating feedback tables...")
-        Base.metadata.create_all(engine, tables=[ReviewFeedback.__table__])
+        Base.metadata.create_all(engine, tables=[ReviewFeedback.__table__, FeedbackRollup.__table__])
         
         # Create session
         SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
@@ -67,6 +67,18 @@ def create_feedback_tables():
                 ON review_feedback(user_email, review_id)
             """))
             
+            # Composite index for the 30-day statistics window
+            session.execute(text("""
+                CREATE INDEX IF NOT EXISTS idx_review_feedback_created_rating 
+                ON review_feedback(created_at, overall_rating)
+            """))
+            
+            # Composite index for per-expert statistics joins
+            session.execute(text("""
+                CREATE INDEX IF NOT EXISTS idx_expert_review_items_expert_review 
+                ON expert_review_items(assigned_expert_id, review_id)
+            """))
+            
             session.commit()
             logger.info("Database indexes created successfully")
             
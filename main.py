@@ -4,6 +4,7 @@ Replaces Flask app.py with modern async architecture and MVC pattern
 """
 
 import os
+import asyncio
 import time
 import logging
 from contextlib import asynccontextmanager
@@ -17,7 +18,7 @@ load_dotenv()
 import json
 import tempfile
 
-from fastapi import FastAPI, HTTPException, Request, UploadFile, File, Form, BackgroundTasks, Header
+from fastapi import FastAPI, HTTPException, Request, UploadFile, File, Form, BackgroundTasks, Header, WebSocket
 
 # Setup Google Cloud credentials from environment variable in production
 if os.getenv('GOOGLE_APPLICATION_CREDENTIALS_JSON'):
@@ -69,7 +70,8 @@ from models.ai_models import (
 )
 from models.comparison_models import (
     DocumentComparisonRequest, DocumentComparisonResponse,
-    ComparisonSummaryResponse
+    ComparisonSummaryResponse, TemplateRegistrationRequest,
+    TemplateComparisonRequest, TemplateComparisonResponse
 )
 from models.support_models import (
     SupportTicketRequest, SupportTicketResponse,
@@ -96,6 +98,7 @@ from controllers.expert_review_email_controller import router as expert_review_e
 
 # Import services for cleanup
 from services.cache_service import CacheService
+from services.export_cache import export_artifact_cache, etag_matches, artifact_headers, MEDIA_TYPES
 from middleware.firebase_auth_middleware import FirebaseAuthMiddleware, UserBasedRateLimiter
 
 # Configure logging with UTF-8 encoding to handle Unicode characters
@@ -138,6 +141,13 @@ async def fallback_lifespan(app: FastAPI):
     try:
         logger.info("🔧 Initializing core services...")
         logger.info("✅ Basic services initialized successfully")
+        
+        # Deliver any email left in the outbox by a previous run
+        from services.email_outbox import start_email_outboxes
+        await start_email_outboxes()
+        
+        from services.report_rendering import warm_render_pool
+        await warm_render_pool()
         logger.info("🌟 Legal Saathi is ready to serve requests!")
         
     except Exception as e:
@@ -150,6 +160,15 @@ async def fallback_lifespan(app: FastAPI):
     
     try:
         cache_service.clear_expired_cache()
+        
+        from services.worker_pool import shutdown_process_pools
+        shutdown_process_pools()
+        
+        from services.email_outbox import stop_email_outboxes
+        await stop_email_outboxes()
+        
+        from services.smtp_pool import close_smtp_pools
+        close_smtp_pools()
         logger.info("🧹 Cleanup completed successfully")
     except Exception as e:
         logger.error(f"❌ Cleanup failed: {e}")
@@ -711,12 +730,26 @@ async def extract_text_from_document(
             # For text files, just decode the content
             extracted_text = content.decode('utf-8')
         else:
-            # For PDF and Word documents, use Google Document AI service
-            from services.google_document_ai_service import document_ai_service
-            
             try:
-                result = document_ai_service.process_legal_document(content, file.content_type)
-                extracted_text = result.get('text', '')
+                if file.content_type == 'application/pdf':
+                    # PDFs go through the dual vision service: born-digital pages are read
+                    # from the text layer and only scanned pages are sent to Document AI
+                    from services.dual_vision_service import dual_vision_service
+                    
+                    user_id = getattr(request.state, 'user_id', None) or "anonymous"
+                    result = await dual_vision_service.process_document(
+                        file_content=content,
+                        mime_type=file.content_type,
+                        user_id=user_id,
+                        filename=file.filename
+                    )
+                    extracted_text = result.text
+                else:
+                    # Word documents use Google Document AI service
+                    from services.google_document_ai_service import document_ai_service
+                    
+                    result = await asyncio.to_thread(document_ai_service.process_legal_document, content, file.content_type)
+                    extracted_text = result.get('text', '')
                 
                 if not extracted_text:
                     raise HTTPException(
@@ -943,6 +976,36 @@ async def speech_to_text(
     )
 
 
+@app.post("/api/speech/speech-to-text/stream")
+@limiter.limit("10/minute")
+async def speech_to_text_stream(
+    request: Request,
+    audio_file: UploadFile = File(...),
+    language_code: str = Form("en-US"),
+    enable_punctuation: bool = Form(True)
+):
+    """Transcribe long recordings progressively as server-sent events"""
+    controller = get_initialized_controller('speech')
+    if not controller:
+        raise HTTPException(status_code=503, detail="Speech service not available")
+    return await controller.speech_to_text_stream(
+        request=request,
+        audio_file=audio_file,
+        language_code=language_code,
+        enable_punctuation=enable_punctuation
+    )
+
+
+@app.websocket("/api/speech/speech-to-text/ws")
+async def speech_to_text_websocket(websocket: WebSocket):
+    """Live speech-to-text with partial transcripts over a WebSocket"""
+    controller = get_initialized_controller('speech')
+    if not controller:
+        await websocket.close(code=1011)
+        return
+    await controller.speech_to_text_websocket(websocket)
+
+
 @app.post("/api/speech/text-to-speech")
 @limiter.limit("10/minute")
 async def text_to_speech(request: Request, tts_request: TextToSpeechRequest):
@@ -1453,6 +1516,44 @@ async def compare_documents(request: Request, comparison_request: DocumentCompar
         raise HTTPException(status_code=500, detail=f"Document comparison failed: {str(e)}")
 
 
+@app.post("/api/compare/templates")
+@limiter.limit("10/minute")
+async def register_comparison_template(request: Request, template_request: TemplateRegistrationRequest):
+    """Analyze a house template once and add it to the template library"""
+    controller = get_initialized_controller('comparison')
+    if not controller:
+        raise HTTPException(status_code=503, detail="Document comparison service not available")
+    return await controller.register_template(template_request)
+
+
+@app.get("/api/compare/templates")
+async def list_comparison_templates():
+    """List templates in the template library"""
+    controller = get_initialized_controller('comparison')
+    if not controller:
+        raise HTTPException(status_code=503, detail="Document comparison service not available")
+    return await controller.list_templates()
+
+
+@app.delete("/api/compare/templates/{template_id}")
+async def delete_comparison_template(template_id: str):
+    """Remove a template from the template library"""
+    controller = get_initialized_controller('comparison')
+    if not controller:
+        raise HTTPException(status_code=503, detail="Document comparison service not available")
+    return await controller.delete_template(template_id)
+
+
+@app.post("/api/compare/templates/match", response_model=TemplateComparisonResponse)
+@limiter.limit("10/minute")
+async def compare_against_templates(request: Request, comparison_request: TemplateComparisonRequest):
+    """Find the closest house template for a document and its per-clause deviations"""
+    controller = get_initialized_controller('comparison')
+    if not controller:
+        raise HTTPException(status_code=503, detail="Document comparison service not available")
+    return await controller.compare_against_templates(comparison_request)
+
+
 @app.get("/api/compare/{comparison_id}/summary", response_model=ComparisonSummaryResponse)
 async def get_comparison_summary(comparison_id: str):
     """Get summary of a previous comparison"""
@@ -1486,6 +1587,19 @@ async def export_comparison_report(
         if not controller:
             raise HTTPException(status_code=503, detail="Document comparison service not available")
         
+        supported_formats = await controller.comparison_service.get_export_formats()
+        if format.lower() not in supported_formats:
+            raise HTTPException(
+                status_code=400,
+                detail=f"Unsupported format: {format}. Supported formats: {supported_formats}"
+            )
+        
+        # The client already holds this exact report: for a POST the precondition fails
+        # (412, RFC 9110 13.1.2) and the artifact can be revalidated at its Content-Location
+        artifact = controller.comparison_service.export_artifact_key(comparison_data, format)
+        if etag_matches(request.headers.get('if-none-match'), artifact):
+            return Response(status_code=412, headers=artifact_headers(artifact))
+        
         exported_data = await controller.export_comparison_report(
             comparison_data, format
         )
@@ -1506,10 +1620,13 @@ async def export_comparison_report(
             media_type=content_type,
             headers={
                 "Content-Disposition": f"attachment; filename={filename}",
-                "Content-Length": str(len(exported_data))
+                "Content-Length": str(len(exported_data)),
+                **artifact_headers(artifact)
             }
         )
         
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Export endpoint failed: {e}")
         raise HTTPException(status_code=500, detail=f"Export failed: {str(e)}")
@@ -1553,7 +1670,7 @@ async def export_to_pdf(request: Request, data: dict):
                 }
             )
         
-        return await controller.export_to_pdf(data)
+        return await controller.export_to_pdf(data, if_none_match=request.headers.get('if-none-match'))
         
     except Exception as e:
         logger.error(f"PDF export error: {e}")
@@ -1604,7 +1721,7 @@ async def export_to_word(request: Request, data: dict):
                 }
             )
         
-        return await controller.export_to_word(data)
+        return await controller.export_to_word(data, if_none_match=request.headers.get('if-none-match'))
         
     except Exception as e:
         logger.error(f"Word export error: {e}")
@@ -1618,6 +1735,42 @@ async def export_to_word(request: Request, data: dict):
         )
 
 
+@app.get("/api/export/artifacts/{artifact}")
+async def get_export_artifact(artifact: str, request: Request):
+    """Download a previously rendered export by its ETag (supports If-None-Match)"""
+    from fastapi.responses import Response
+    
+    if not getattr(request.state, 'is_authenticated', False):
+        return JSONResponse(
+            status_code=401,
+            content={
+                "error": "Authentication required",
+                "message": "Please log in to export documents",
+                "error_code": "AUTH_001"
+            }
+        )
+    
+    name, _, extension = artifact.partition('.')
+    if extension not in MEDIA_TYPES or len(name) != 64 or not all(c in '0123456789abcdef' for c in name):
+        raise HTTPException(status_code=404, detail="Export not found")
+    
+    if etag_matches(request.headers.get('if-none-match'), artifact):
+        return Response(status_code=304, headers=artifact_headers(artifact))
+    
+    content = await export_artifact_cache.get(artifact)
+    if content is None:
+        raise HTTPException(status_code=404, detail="Export not found or expired; export the report again")
+    
+    return Response(
+        content=content,
+        media_type=MEDIA_TYPES[extension],
+        headers={
+            "Content-Disposition": f"attachment; filename=legal_report_{name[:12]}.{extension}",
+            **artifact_headers(artifact)
+        }
+    )
+
+
 # Email notification endpoints
 @app.post("/api/email/send-analysis")
 @limiter.limit("5/hour")
@@ -1763,6 +1916,9 @@ async def send_test_email_with_pdf(request: Request, test_request: dict):
         
         # Send email with PDF using SMTP service directly
         if controller.gmail_service.smtp_service and controller.gmail_service.smtp_service.is_available():
+            if (await controller.gmail_service.acquire_rate_limit(user_id)).is_rate_limited:
+                return {"success": False, "error": "Rate limit exceeded"}
+            
             html_content = f"""
             <html>
             <body style="font-family: Arial, sans-serif; line-height: 1.6; color: #333;">
@@ -1814,7 +1970,6 @@ async def send_test_email_with_pdf(request: Request, test_request: dict):
             )
             
             if response.success:
-                controller.gmail_service.increment_rate_limit(user_id)
                 return {
                     "success": True,
                     "message_id": response.message_id,
@@ -3,10 +3,11 @@ Email rate limiting middleware for user-based email restrictions
 """
 
 import logging
-from datetime import datetime, timedelta
+from datetime import datetime
 from typing import Dict, Any, Optional
 from fastapi import HTTPException, Request
-from collections import defaultdict
+
+from middleware.rate_limit_engine import RateLimitEngine, rate_limit_engine
 
 logger = logging.getLogger(__name__)
 
@@ -14,83 +15,82 @@ logger = logging.getLogger(__name__)
 class EmailRateLimiter:
     """Rate limiter for email sending per user"""
     
-    def __init__(self):
-        self.user_limits = defaultdict(lambda: {
-            'hourly_count': 0,
-            'hourly_reset': datetime.now() + timedelta(hours=1),
-            'daily_count': 0,
-            'daily_reset': datetime.now() + timedelta(days=1)
-        })
+    HOURLY_WINDOW = 3600
+    DAILY_WINDOW = 86400
+    
+    def __init__(self, engine: Optional[RateLimitEngine] = None):
+        self.engine = engine or rate_limit_engine
         self.hourly_limit = 5
         self.daily_limit = 50
     
-    def check_rate_limit(self, user_id: str) -> Dict[str, Any]:
-        """Check if user has exceeded rate limits"""
-        now = datetime.now()
-        user_data = self.user_limits[user_id]
-        
-        # Reset counters if time has passed
-        if now >= user_data['hourly_reset']:
-            user_data['hourly_count'] = 0
-            user_data['hourly_reset'] = now + timedelta(hours=1)
-        
-        if now >= user_data['daily_reset']:
-            user_data['daily_count'] = 0
-            user_data['daily_reset'] = now + timedelta(days=1)
-        
-        # Check if rate limited
-        is_rate_limited = (
-            user_data['hourly_count'] >= self.hourly_limit or 
-            user_data['daily_count'] >= self.daily_limit
-        )
+    def _key(self, user_id: str) -> str:
+        return f"email:{user_id}"
+    
+    async def check_rate_limit(self, user_id: str) -> Dict[str, Any]:
+        """Check if user has exceeded rate limits, without using up an email"""
+        hourly = await self.engine.peek_async(self._key(user_id), self.hourly_limit, self.HOURLY_WINDOW)
+        daily = await self.engine.peek_async(self._key(user_id), self.daily_limit, self.DAILY_WINDOW)
+        return self._info(user_id, hourly, daily, not (hourly.allowed and daily.allowed))
+    
+    async def acquire(self, user_id: str) -> Dict[str, Any]:
+        """
+        Atomically take one email from the user's hourly and daily budgets
         
+        Call before sending; the email counts whether or not delivery succeeds, so
+        concurrent requests cannot all pass the check. If the hourly budget has room
+        but the daily one does not, the hourly slot stays used (the user is blocked
+        for the day anyway).
+        """
+        hourly = await self.engine.hit_async(self._key(user_id), self.hourly_limit, self.HOURLY_WINDOW)
+        if not hourly.allowed:
+            daily = await self.engine.peek_async(self._key(user_id), self.daily_limit, self.DAILY_WINDOW)
+            return self._info(user_id, hourly, daily, True)
+        daily = await self.engine.hit_async(self._key(user_id), self.daily_limit, self.DAILY_WINDOW)
+        if daily.allowed:
+            logger.info(f"Email counter incremented for user {user_id}")
+        return self._info(user_id, hourly, daily, not daily.allowed)
+    
+    def _info(self, user_id: str, hourly, daily, is_rate_limited: bool) -> Dict[str, Any]:
         return {
             'user_id': user_id,
-            'emails_sent_today': user_data['daily_count'],
-            'emails_sent_this_hour': user_data['hourly_count'],
+            'emails_sent_today': daily.count,
+            'emails_sent_this_hour': hourly.count,
             'daily_limit': self.daily_limit,
             'hourly_limit': self.hourly_limit,
-            'next_reset_time': min(user_data['hourly_reset'], user_data['daily_reset']),
+            'next_reset_time': datetime.fromtimestamp(min(hourly.reset_time, daily.reset_time)),
             'is_rate_limited': is_rate_limited
         }
     
-    def increment_counter(self, user_id: str):
-        """Increment email counter for user"""
-        user_data = self.user_limits[user_id]
-        user_data['hourly_count'] += 1
-        user_data['daily_count'] += 1
-        logger.info(f"Email counter incremented for user {user_id}: hourly={user_data['hourly_count']}, daily={user_data['daily_count']}")
-    
-    def get_retry_after(self, user_id: str) -> int:
+    async def get_retry_after(self, user_id: str) -> int:
         """Get seconds until user can send another email"""
-        user_data = self.user_limits[user_id]
-        now = datetime.now()
-        
-        if user_data['hourly_count'] >= self.hourly_limit:
-            return int((user_data['hourly_reset'] - now).total_seconds())
-        elif user_data['daily_count'] >= self.daily_limit:
-            return int((user_data['daily_reset'] - now).total_seconds())
-        
-        return 0
+        hourly = await self.engine.peek_async(self._key(user_id), self.hourly_limit, self.HOURLY_WINDOW)
+        daily = await self.engine.peek_async(self._key(user_id), self.daily_limit, self.DAILY_WINDOW)
+        return max(hourly.retry_after, daily.retry_after)
     
     def reset_user_limits(self, user_id: str):
         """Reset limits for a specific user (admin function)"""
-        if user_id in self.user_limits:
-            del self.user_limits[user_id]
-            logger.info(f"Rate limits reset for user {user_id}")
+        self.engine.reset(self._key(user_id), self.HOURLY_WINDOW)
+        self.engine.reset(self._key(user_id), self.DAILY_WINDOW)
+        logger.info(f"Rate limits reset for user {user_id}")
     
     def get_all_user_stats(self) -> Dict[str, Any]:
         """Get statistics for all users (admin function)"""
         stats = {}
-        for user_id, data in self.user_limits.items():
+        hourly_suffix = f":{self.HOURLY_WINDOW}"
+        for key in self.engine.keys("email:"):
+            if not key.endswith(hourly_suffix):
+                continue
+            user_id = key[len("email:"):-len(hourly_suffix)]
+            hourly = self.engine.peek(self._key(user_id), self.hourly_limit, self.HOURLY_WINDOW)
+            daily = self.engine.peek(self._key(user_id), self.daily_limit, self.DAILY_WINDOW)
             stats[user_id] = {
-                'hourly_count': data['hourly_count'],
-                'daily_count': data['daily_count'],
-                'hourly_reset': data['hourly_reset'].isoformat(),
-                'daily_reset': data['daily_reset'].isoformat()
+                'hourly_count': hourly.count,
+                'daily_count': daily.count,
+                'hourly_reset': datetime.fromtimestamp(hourly.reset_time).isoformat(),
+                'daily_reset': datetime.fromtimestamp(daily.reset_time).isoformat()
             }
         return stats
 
 
 # Global instance
-email_rate_limiter = EmailRateLimiter()
\ No newline at end of file
+email_rate_limiter = EmailRateLimiter()
@@ -8,6 +8,7 @@ from fastapi import Request, HTTPException
 from fastapi.responses import JSONResponse
 from starlette.middleware.base import BaseHTTPMiddleware
 from services.firebase_service import FirebaseService
+from middleware.rate_limit_engine import RateLimitEngine, rate_limit_engine
 from datetime import datetime
 
 logger = logging.getLogger(__name__)
@@ -53,6 +54,10 @@ class FirebaseAuthMiddleware(BaseHTTPMiddleware):
             '/redoc',
             '/openapi.json'
         ]
+        
+        # Static frontend files skip token verification entirely
+        self.static_asset_prefixes = ('/assets/', '/static/')
+        self.static_asset_suffixes = ('.js', '.css', '.png', '.jpg', '.jpeg', '.svg', '.ico', '.woff', '.woff2', '.webmanifest')
     
     async def dispatch(self, request: Request, call_next):
         """
@@ -67,8 +72,8 @@ class FirebaseAuthMiddleware(BaseHTTPMiddleware):
             request.state.is_authenticated = False
             request.state.user_id = None
             
-            if token and self.firebase_available and self.firebase_service:
-                # Try to verify token if provided
+            if token and self.firebase_available and self.firebase_service and not self._is_static_asset(request.url.path):
+                # Try to verify token if provided (cached claims are served without re-verification)
                 verification_result = await self.firebase_service.verify_token(token)
                 
                 if verification_result['success']:
@@ -148,6 +153,20 @@ class FirebaseAuthMiddleware(BaseHTTPMiddleware):
         """
         return any(path.startswith(route) for route in self.protected_routes)
     
+    def _is_static_asset(self, path: str) -> bool:
+        """
+        Check if path serves a static frontend asset that never needs the user
+        
+        Args:
+            path: Request path
+            
+        Returns:
+            True if token verification can be skipped
+        """
+        if path.startswith('/api/'):
+            return False
+        return path.startswith(self.static_asset_prefixes) or path.endswith(self.static_asset_suffixes)
+    
     def _is_public_route(self, path: str) -> bool:
         """
         Check if route is public (no authentication required)
@@ -191,9 +210,8 @@ class UserBasedRateLimiter:
     User-based rate limiting that applies different limits per authenticated user ID vs anonymous users
     """
     
-    def __init__(self):
-        self.user_limits = {}
-        self.anonymous_limits = {}
+    def __init__(self, engine: Optional[RateLimitEngine] = None):
+        self.engine = engine or rate_limit_engine
         
         # Define rate limits
         self.authenticated_user_limits = {
@@ -212,7 +230,7 @@ class UserBasedRateLimiter:
             'email_notification': {'requests': 0, 'window': 3600}  # Not allowed
         }
     
-    def check_rate_limit(self, user_id: Optional[str], service: str, request: Request) -> bool:
+    async def check_rate_limit(self, user_id: Optional[str], service: str, request: Request) -> bool:
         """
         Check if request is within rate limits
         
@@ -225,45 +243,31 @@ class UserBasedRateLimiter:
             True if within limits, False otherwise
         """
         try:
-            current_time = datetime.now().timestamp()
-            
             # Determine limits based on authentication status
             if user_id:
                 limits = self.authenticated_user_limits.get(service)
                 key = f"user:{user_id}:{service}"
-                storage = self.user_limits
             else:
                 limits = self.anonymous_user_limits.get(service)
                 # Use IP address for anonymous users
                 ip_address = request.client.host if request.client else "unknown"
                 key = f"anonymous:{ip_address}:{service}"
-                storage = self.anonymous_limits
             
             if not limits:
                 return True  # No limits defined for this service
             
-            # Initialize or clean up old entries
-            if key not in storage:
-                storage[key] = []
-            
-            # Remove old requests outside the time window
-            window_start = current_time - limits['window']
-            storage[key] = [req_time for req_time in storage[key] if req_time > window_start]
-            
-            # Check if within limits
-            if len(storage[key]) >= limits['requests']:
+            decision = await self.engine.hit_async(key, limits['requests'], limits['window'])
+            if not decision.allowed:
                 logger.warning(f"Rate limit exceeded for {key}")
                 return False
             
-            # Add current request
-            storage[key].append(current_time)
             return True
             
         except Exception as e:
             logger.error(f"Rate limiting error: {e}")
             return True  # Allow request on error to avoid blocking legitimate users
     
-    def get_rate_limit_info(self, user_id: Optional[str], service: str) -> Dict[str, Any]:
+    async def get_rate_limit_info(self, user_id: Optional[str], service: str) -> Dict[str, Any]:
         """
         Get rate limit information for a user/service combination
         
@@ -275,36 +279,28 @@ class UserBasedRateLimiter:
             Dict with rate limit information
         """
         try:
-            current_time = datetime.now().timestamp()
-            
             # Determine limits and key
             if user_id:
                 limits = self.authenticated_user_limits.get(service, {})
                 key = f"user:{user_id}:{service}"
-                storage = self.user_limits
             else:
                 limits = self.anonymous_user_limits.get(service, {})
                 key = f"anonymous:*:{service}"  # Generic key for info
-                storage = self.anonymous_limits
             
             if not limits:
                 return {'limit': None, 'remaining': None, 'reset_time': None}
             
-            # Get current usage
-            requests = storage.get(key, [])
-            window_start = current_time - limits['window']
-            current_requests = [req_time for req_time in requests if req_time > window_start]
-            
-            remaining = max(0, limits['requests'] - len(current_requests))
-            reset_time = current_time + limits['window'] if current_requests else None
+            # Get current usage without consuming any
+            decision = await self.engine.peek_async(key, limits['requests'], limits['window'])
+            reset_time = decision.reset_time if decision.count else None
             
             return {
                 'limit': limits['requests'],
-                'remaining': remaining,
+                'remaining': decision.remaining,
                 'reset_time': reset_time,
                 'window': limits['window']
             }
             
         except Exception as e:
             logger.error(f"Error getting rate limit info: {e}")
-            return {'limit': None, 'remaining': None, 'reset_time': None}
\ No newline at end of file
+            return {'limit': None, 'remaining': None, 'reset_time': None}
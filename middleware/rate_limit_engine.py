@@ -0,0 +1,292 @@
+"""
+Shared rate limiting engine used by the user, email and Vision API limiters
+
+Uses the sliding window counter algorithm: each key keeps only the counts of the
+current and previous fixed windows, and the previous count is weighted by how much
+of it still overlaps the sliding window. Memory per key is constant regardless of
+request volume, idle keys are evicted, and state can optionally live in Redis so
+limits are shared across workers.
+"""
+
+import os
+import time
+import asyncio
+import logging
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Dict, Any, List, Tuple
+
+logger = logging.getLogger(__name__)
+
+try:
+    import redis
+    REDIS_AVAILABLE = True
+except ImportError:
+    REDIS_AVAILABLE = False
+
+
+@dataclass
+class RateLimitDecision:
+    allowed: bool
+    limit: int
+    count: int          # Estimated requests in the sliding window (after this hit if allowed)
+    remaining: int
+    retry_after: int    # Seconds until a request of the same cost would be allowed
+    reset_time: float   # Epoch seconds when the current fixed window rolls over
+    window: int
+
+
+class InMemoryRateLimitBackend:
+    """Process-local counter storage with LRU bound and idle-key eviction"""
+
+    blocking = False
+
+    def __init__(self, max_keys: int = 100000, sweep_interval: int = 60):
+        self.max_keys = max_keys
+        self.sweep_interval = sweep_interval
+        self._counters: "OrderedDict[str, List[int]]" = OrderedDict()  # key -> [window, bucket, current, previous]
+        self._last_sweep = time.time()
+        self.evicted_keys = 0
+
+    def get_counts(self, key: str, window: int, bucket: int) -> Tuple[int, int]:
+        entry = self._counters.get(key)
+        if entry is None:
+            return 0, 0
+        return self._roll(entry, bucket)
+
+    def increment(self, key: str, window: int, bucket: int, amount: int) -> Tuple[int, int]:
+        entry = self._counters.get(key)
+        if entry is None:
+            entry = [window, bucket, 0, 0]
+            self._counters[key] = entry
+        else:
+            self._counters.move_to_end(key)
+
+        current, previous = self._roll(entry, bucket)
+        entry[1], entry[2], entry[3] = bucket, current + amount, previous
+        self._evict()
+        return entry[2], entry[3]
+
+    def hit(self, key: str, window: int, bucket: int, weight: float, cost: int, limit: int) -> Tuple[bool, int, int]:
+        current, previous = self.get_counts(key, window, bucket)
+        if previous * weight + current + cost > limit:
+            return False, current, previous
+        current, previous = self.increment(key, window, bucket, cost)
+        return True, current, previous
+
+    def delete(self, key: str):
+        self._counters.pop(key, None)
+
+    def keys(self, prefix: str = "") -> List[str]:
+        return [key for key in self._counters if key.startswith(prefix)]
+
+    def __len__(self) -> int:
+        return len(self._counters)
+
+    @staticmethod
+    def _roll(entry: List[int], bucket: int) -> Tuple[int, int]:
+        """Return (current, previous) counts as seen from the given bucket"""
+        _, entry_bucket, current, previous = entry
+        if entry_bucket == bucket:
+            return current, previous
+        if entry_bucket == bucket - 1:
+            return 0, current
+        return 0, 0
+
+    def _evict(self):
+        # Hard bound: drop least recently used keys
+        while len(self._counters) > self.max_keys:
+            self._counters.popitem(last=False)
+            self.evicted_keys += 1
+
+        # Periodic sweep: a key whose last bucket is two or more windows old counts as zero
+        now = time.time()
+        if now - self._last_sweep < self.sweep_interval:
+            return
+        self._last_sweep = now
+        idle_keys = [
+            key for key, (window, bucket, _, _) in self._counters.items()
+            if bucket < int(now // window) - 1
+        ]
+        for key in idle_keys:
+            del self._counters[key]
+        self.evicted_keys += len(idle_keys)
+        if idle_keys:
+            logger.debug(f"Evicted {len(idle_keys)} idle rate limit keys")
+
+
+class RedisRateLimitBackend:
+    """Redis counter storage shared across workers; idle keys expire via TTL"""
+
+    # Every call is a network round trip
+    blocking = True
+
+    # Atomically check the weighted estimate and increment the current bucket when allowed
+    HIT_SCRIPT = """
+    local current = tonumber(redis.call('GET', KEYS[1]) or '0')
+    local previous = tonumber(redis.call('GET', KEYS[2]) or '0')
+    local cost = tonumber(ARGV[2])
+    if previous * tonumber(ARGV[1]) + current + cost > tonumber(ARGV[3]) then
+        return {0, current, previous}
+    end
+    current = redis.call('INCRBY', KEYS[1], cost)
+    redis.call('EXPIRE', KEYS[1], ARGV[4])
+    return {1, current, previous}
+    """
+
+    def __init__(self, client, key_prefix: str = "ratelimit"):
+        self.client = client
+        self.key_prefix = key_prefix
+        self._hit_script = client.register_script(self.HIT_SCRIPT)
+
+    def _bucket_keys(self, key: str, bucket: int) -> Tuple[str, str]:
+        return f"{self.key_prefix}:{key}:{bucket}", f"{self.key_prefix}:{key}:{bucket - 1}"
+
+    def get_counts(self, key: str, window: int, bucket: int) -> Tuple[int, int]:
+        current, previous = self.client.mget(*self._bucket_keys(key, bucket))
+        return int(current or 0), int(previous or 0)
+
+    def increment(self, key: str, window: int, bucket: int, amount: int) -> Tuple[int, int]:
+        current_key, previous_key = self._bucket_keys(key, bucket)
+        pipe = self.client.pipeline()
+        pipe.incrby(current_key, amount)
+        pipe.expire(current_key, window * 2)
+        pipe.get(previous_key)
+        current, _, previous = pipe.execute()
+        return int(current), int(previous or 0)
+
+    def hit(self, key: str, window: int, bucket: int, weight: float, cost: int, limit: int) -> Tuple[bool, int, int]:
+        allowed, current, previous = self._hit_script(
+            keys=list(self._bucket_keys(key, bucket)),
+            args=[weight, cost, limit, window * 2]
+        )
+        return bool(allowed), int(current), int(previous)
+
+    def delete(self, key: str):
+        bucket_keys = list(self.client.scan_iter(match=f"{self.key_prefix}:{key}:*"))
+        if bucket_keys:
+            self.client.delete(*bucket_keys)
+
+    def keys(self, prefix: str = "") -> List[str]:
+        keys = set()
+        for bucket_key in self.client.scan_iter(match=f"{self.key_prefix}:{prefix}*"):
+            if isinstance(bucket_key, bytes):
+                bucket_key = bucket_key.decode('utf-8')
+            keys.add(bucket_key[len(self.key_prefix) + 1:].rsplit(':', 1)[0])
+        return sorted(keys)
+
+    def __len__(self) -> int:
+        return len(self.keys())
+
+
+class RateLimitEngine:
+    """Sliding window counter rate limiter over a pluggable counter backend"""
+
+    def __init__(self, backend=None):
+        self.backend = backend if backend is not None else InMemoryRateLimitBackend()
+
+    @classmethod
+    def from_env(cls) -> "RateLimitEngine":
+        """Use Redis when RATE_LIMIT_REDIS_URL is set and reachable, otherwise process memory"""
+        redis_url = os.getenv('RATE_LIMIT_REDIS_URL', '').strip()
+        if redis_url and REDIS_AVAILABLE:
+            try:
+                client = redis.from_url(redis_url)
+                client.ping()  # Test connection
+                logger.info("Rate limiting using shared Redis backend")
+                return cls(RedisRateLimitBackend(client))
+            except Exception as e:
+                logger.warning(f"Redis connection failed, using in-memory rate limiting: {e}")
+        return cls(InMemoryRateLimitBackend())
+
+    def hit(self, key: str, limit: int, window: int, cost: int = 1) -> RateLimitDecision:
+        """Consume `cost` from the key's budget if it fits under the limit"""
+        now = time.time()
+        bucket, weight = self._position(now, window)
+        allowed, current, previous = self.backend.hit(f"{key}:{window}", window, bucket, weight, cost, limit)
+        return self._decision(allowed, limit, window, now, current, previous, cost)
+
+    async def hit_async(self, key: str, limit: int, window: int, cost: int = 1) -> RateLimitDecision:
+        """hit() for code on the event loop; a network backend is called from a worker thread"""
+        if self.backend.blocking:
+            return await asyncio.to_thread(self.hit, key, limit, window, cost)
+        return self.hit(key, limit, window, cost)
+
+    def peek(self, key: str, limit: int, window: int, cost: int = 1) -> RateLimitDecision:
+        """Report whether a request of `cost` would be allowed, without consuming anything"""
+        now = time.time()
+        bucket, weight = self._position(now, window)
+        current, previous = self.backend.get_counts(f"{key}:{window}", window, bucket)
+        allowed = previous * weight + current + cost <= limit
+        return self._decision(allowed, limit, window, now, current, previous, cost)
+
+    async def peek_async(self, key: str, limit: int, window: int, cost: int = 1) -> RateLimitDecision:
+        """peek() for code on the event loop; a network backend is called from a worker thread"""
+        if self.backend.blocking:
+            return await asyncio.to_thread(self.peek, key, limit, window, cost)
+        return self.peek(key, limit, window, cost)
+
+    def consume(self, key: str, window: int, cost: int = 1):
+        """Record usage unconditionally (for callers that check first and count on success)"""
+        bucket, _ = self._position(time.time(), window)
+        self.backend.increment(f"{key}:{window}", window, bucket, cost)
+
+    def reset(self, key: str, window: int):
+        """Forget all usage recorded for a key"""
+        self.backend.delete(f"{key}:{window}")
+
+    def keys(self, prefix: str = "") -> List[str]:
+        """List tracked keys (with their window suffix) starting with prefix"""
+        return self.backend.keys(prefix)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get engine statistics"""
+        return {
+            'backend': type(self.backend).__name__,
+            'tracked_keys': len(self.backend),
+            'evicted_keys': getattr(self.backend, 'evicted_keys', None)
+        }
+
+    @staticmethod
+    def _position(now: float, window: int) -> Tuple[int, float]:
+        """Current fixed-window bucket and the weight of the previous bucket"""
+        bucket = int(now // window)
+        elapsed_fraction = (now - bucket * window) / window
+        return bucket, 1.0 - elapsed_fraction
+
+    def _decision(self, allowed: bool, limit: int, window: int, now: float,
+                  current: int, previous: int, cost: int) -> RateLimitDecision:
+        bucket, weight = self._position(now, window)
+        count = int(previous * weight + current)
+        reset_time = (bucket + 1) * window
+        retry_after = 0 if allowed else self._retry_after(limit, window, now, current, previous, cost)
+        return RateLimitDecision(
+            allowed=allowed,
+            limit=limit,
+            count=count,
+            remaining=max(0, limit - count),
+            retry_after=retry_after,
+            reset_time=reset_time,
+            window=window
+        )
+
+    @staticmethod
+    def _retry_after(limit: int, window: int, now: float, current: int, previous: int, cost: int) -> int:
+        """Seconds until the weighted estimate drops enough to admit `cost` more"""
+        if cost > limit:
+            return window
+        bucket_start = (now // window) * window
+
+        # Still within the current bucket: wait for the previous bucket's weight to decay
+        headroom = limit - current - cost
+        if headroom >= 0 and previous > 0:
+            fraction_needed = 1.0 - headroom / previous
+            return max(1, int(bucket_start + fraction_needed * window - now) + 1)
+
+        # Otherwise the current bucket becomes the previous one and must decay in turn
+        fraction_needed = max(0.0, 1.0 - (limit - cost) / current) if current else 0.0
+        return max(1, int(bucket_start + window + fraction_needed * window - now) + 1)
+
+
+# Shared engine instance
+rate_limit_engine = RateLimitEngine.from_env()
@@ -9,15 +9,20 @@ from models.document_models import RiskAssessment, ClauseAnalysis
 
 
 class DocumentComparisonRequest(BaseModel):
-    document1_text: str = Field(..., min_length=100, max_length=50000)
-    document2_text: str = Field(..., min_length=100, max_length=50000)
+    # Each document is given as text, as the analysis_id of a stored analysis, or both
+    document1_text: Optional[str] = Field(None, min_length=100, max_length=50000)
+    document2_text: Optional[str] = Field(None, min_length=100, max_length=50000)
     document1_type: str  # Accept string instead of enum
     document2_type: str  # Accept string instead of enum
+    document1_analysis_id: Optional[str] = None
+    document2_analysis_id: Optional[str] = None
     comparison_focus: Optional[str] = "overall"  # "overall", "clauses", "risks", "terms"
 
     @validator('document1_text', 'document2_text')
     def validate_document_text(cls, v):
-        if not v or not v.strip():
+        if v is None:
+            return v
+        if not v.strip():
             raise ValueError('Document text cannot be empty')
         return v.strip()
     
@@ -54,6 +59,7 @@ class ClauseComparison(BaseModel):
     risk_difference: float  # Difference in risk scores
     comparison_notes: str
     recommendation: str
+    text_diff: Optional[Dict[str, Any]] = None  # Token-level edit script between the two clause versions
 
 
 class DocumentComparisonResponse(BaseModel):
@@ -76,4 +82,49 @@ class ComparisonSummaryResponse(BaseModel):
     overall_verdict: str
     key_insights: List[str]
     risk_score_difference: float
-    timestamp: datetime
\ No newline at end of file
+    timestamp: datetime
+
+class TemplateRegistrationRequest(BaseModel):
+    name: str = Field(..., min_length=1, max_length=200)
+    document_text: str = Field(..., min_length=100, max_length=50000)
+    document_type: str
+    template_id: Optional[str] = None  # Replaces an existing template with the same ID
+
+
+class TemplateComparisonRequest(BaseModel):
+    # The incoming document is given as text, as the analysis_id of a stored analysis, or both
+    document_text: Optional[str] = Field(None, min_length=100, max_length=50000)
+    document_type: str
+    analysis_id: Optional[str] = None
+    top_k: int = Field(3, ge=1, le=20)  # Number of ranked templates to return
+
+
+class ClauseDeviation(BaseModel):
+    clause_id: Optional[str] = None
+    clause_type: str
+    deviation: str  # "standard", "modified", "divergent", "non_standard", "missing"
+    similarity: float
+    document_clause_text: Optional[str] = None
+    template_clause_text: Optional[str] = None
+    document_risk_score: Optional[float] = None
+    template_risk_score: Optional[float] = None
+    risk_difference: float
+
+
+class TemplateMatch(BaseModel):
+    template_id: str
+    name: str
+    document_type: str
+    score: float
+
+
+class TemplateComparisonResponse(BaseModel):
+    comparison_id: str
+    analysis_id: str
+    analysis_reused: bool
+    closest_template: Optional[TemplateMatch] = None
+    ranked_templates: List[TemplateMatch]
+    clause_deviations: List[ClauseDeviation]
+    embedding_backend: Optional[str] = None
+    processing_time: float
+    timestamp: datetime = Field(default_factory=datetime.now)
@@ -38,7 +38,7 @@ class SpeechToTextResponse(BaseModel):
 
 
 class TextToSpeechRequest(BaseModel):
-    text: str = Field(..., min_length=1, max_length=5000)
+    text: str = Field(..., min_length=1, max_length=50000)  # Long text is synthesized in sentence chunks
     language_code: Optional[str] = "en-US"
     voice_gender: Optional[str] = "NEUTRAL"
     speaking_rate: Optional[float] = Field(0.9, ge=0.25, le=4.0)
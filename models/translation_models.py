@@ -204,4 +204,5 @@ class TranslationUsageStats(BaseModel):
     supported_languages_count: int
     cache_ttl_hours: float
     user_requests_in_window: Optional[int] = None
-    user_rate_limit: Optional[int] = None
\ No newline at end of file
+    user_rate_limit: Optional[int] = None
+    translation_memory: Optional[Dict[str, Any]] = None
\ No newline at end of file
@@ -9,6 +9,7 @@ from typing import Dict, Any, Optional
 import json
 
 from models.document_models import DocumentAnalysisResponse
+from services.translation_memory import translation_memory
 
 logger = logging.getLogger(__name__)
 
@@ -18,7 +19,6 @@ class CacheService:
     
     def __init__(self):
         self.analysis_cache = {}
-        self.translation_cache = {}
         self.pattern_storage = {}
         self.cache_expiry = 3600  # 1 hour
         
@@ -48,26 +48,6 @@ class CacheService:
         }
         logger.info(f"Stored in cache: {cache_key}")
     
-    async def get_cached_translation(self, cache_key: str) -> Optional[Dict[str, Any]]:
-        """Get translation result from cache if not expired"""
-        if cache_key in self.translation_cache:
-            cached_data = self.translation_cache[cache_key]
-            if time.time() - cached_data['timestamp'] < self.cache_expiry:
-                logger.info(f"Translation cache hit for key: {cache_key}")
-                return cached_data['data']
-            else:
-                del self.translation_cache[cache_key]
-                logger.info(f"Translation cache expired for key: {cache_key}")
-        return None
-    
-    async def store_translation(self, cache_key: str, data: Dict[str, Any]) -> None:
-        """Store translation result in cache"""
-        self.translation_cache[cache_key] = {
-            'data': data,
-            'timestamp': time.time()
-        }
-        logger.info(f"Stored translation in cache: {cache_key}")
-    
     async def learn_from_analysis(self, analysis: DocumentAnalysisResponse) -> None:
         """Store patterns for future learning (replaces Neo4j)"""
         try:
@@ -111,7 +91,7 @@ class CacheService:
         """Get cache statistics"""
         return {
             'analysis_cache_size': len(self.analysis_cache),
-            'translation_cache_size': len(self.translation_cache),
+            'translation_cache_size': translation_memory.get_stats()['memory_entries'],
             'pattern_storage_size': len(self.pattern_storage),
             'cache_expiry_seconds': self.cache_expiry
         }
@@ -128,12 +108,4 @@ class CacheService:
         for key in expired_keys:
             del self.analysis_cache[key]
         
-        # Clear expired translation cache
-        expired_keys = [
-            key for key, data in self.translation_cache.items()
-            if current_time - data['timestamp'] > self.cache_expiry
-        ]
-        for key in expired_keys:
-            del self.translation_cache[key]
-        
         logger.info(f"Cleared {len(expired_keys)} expired cache entries")
\ No newline at end of file
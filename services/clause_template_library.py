@@ -0,0 +1,255 @@
+"""
+Persistent clause template library for one-vs-many document comparison
+Template clauses are analyzed and embedded once; incoming documents are matched
+against every template clause in a single matrix multiplication.
+"""
+
+import os
+import re
+import json
+import hashlib
+import logging
+import tempfile
+import threading
+from datetime import datetime
+from typing import Dict, Any, List, Optional
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+TEMPLATE_LIBRARY_DIR = os.getenv('CLAUSE_TEMPLATE_LIBRARY_DIR', os.path.join('data', 'clause_templates'))
+
+# Dimension of the local hashed bag-of-words embedding used when Vertex AI is unavailable
+HASHED_EMBEDDING_DIM = 1024
+_TOKEN_PATTERN = re.compile(r"[a-z0-9]+")
+
+
+def hashed_embedding(text: str, dim: int = HASHED_EMBEDDING_DIM) -> np.ndarray:
+    """Signed feature-hashing embedding of word unigrams and bigrams (stable across processes)"""
+    tokens = _TOKEN_PATTERN.findall(text.lower())
+    features = tokens + [f"{a} {b}" for a, b in zip(tokens, tokens[1:])]
+    vector = np.zeros(dim, dtype=np.float32)
+    for feature in features:
+        digest = int.from_bytes(hashlib.blake2b(feature.encode('utf-8'), digest_size=8).digest(), 'little')
+        vector[digest % dim] += 1.0 if digest >> 63 else -1.0
+    return vector
+
+
+def normalize_rows(matrix: np.ndarray) -> np.ndarray:
+    """L2-normalize each row so dot products are cosine similarities"""
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return (matrix / norms).astype(np.float32)
+
+
+class ClauseTemplateLibrary:
+    """
+    House templates with precomputed clause topics, risk scores and embeddings.
+    Clauses of a template are stored contiguously so per-template reductions over the
+    similarity matrix are single numpy calls; the library persists as JSON metadata
+    plus an .npy embedding matrix.
+    """
+
+    def __init__(self, directory: str = TEMPLATE_LIBRARY_DIR):
+        self.directory = directory
+        self.embedding_backend: Optional[str] = None  # "vertex" or "hashed", fixed by the first template
+        self.templates: Dict[str, Dict[str, Any]] = {}
+        self.clauses: List[Dict[str, Any]] = []
+        self.matrix = np.zeros((0, 0), dtype=np.float32)
+        self._hashed_matrix: Optional[np.ndarray] = None
+        self._lock = threading.Lock()
+        self._loaded = False
+
+    @property
+    def metadata_path(self) -> str:
+        return os.path.join(self.directory, 'library.json')
+
+    @property
+    def embeddings_path(self) -> str:
+        return os.path.join(self.directory, 'embeddings.npy')
+
+    def load(self):
+        """Load the persisted library (once)"""
+        with self._lock:
+            if self._loaded:
+                return
+            self._loaded = True
+            if not os.path.exists(self.metadata_path):
+                return
+            try:
+                with open(self.metadata_path, 'r', encoding='utf-8') as f:
+                    metadata = json.load(f)
+                matrix = np.load(self.embeddings_path)
+                if matrix.shape[0] != len(metadata['clauses']):
+                    raise ValueError("embedding matrix does not match clause metadata")
+                self.embedding_backend = metadata.get('embedding_backend')
+                self.templates = metadata['templates']
+                self.clauses = metadata['clauses']
+                self.matrix = matrix.astype(np.float32)
+                logger.info(f"Loaded clause template library: {len(self.templates)} templates, {len(self.clauses)} clauses")
+            except Exception as e:
+                logger.error(f"Failed to load clause template library: {e}")
+
+    def _save(self):
+        """Persist metadata and embeddings atomically (lock held by caller)"""
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            fd, temp_path = tempfile.mkstemp(dir=self.directory, prefix='.tmp-', suffix='.npy')
+            with os.fdopen(fd, 'wb') as f:
+                np.save(f, self.matrix)
+            os.replace(temp_path, self.embeddings_path)
+
+            fd, temp_path = tempfile.mkstemp(dir=self.directory, prefix='.tmp-', suffix='.json')
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                json.dump({
+                    'embedding_backend': self.embedding_backend,
+                    'templates': self.templates,
+                    'clauses': self.clauses
+                }, f)
+            os.replace(temp_path, self.metadata_path)
+        except OSError as e:
+            logger.error(f"Failed to persist clause template library: {e}")
+
+    def add_template(
+        self,
+        template_id: str,
+        name: str,
+        document_type: str,
+        clauses: List[Dict[str, Any]],
+        embeddings: np.ndarray,
+        embedding_backend: str,
+        overall_risk_score: float
+    ) -> Dict[str, Any]:
+        """
+        Add (or replace) a template
+
+        Args:
+            clauses: Dicts with clause_id, clause_text, topic, risk_score and risk_level
+            embeddings: One embedding row per clause
+            embedding_backend: Backend that produced the embeddings
+        """
+        self.load()
+        with self._lock:
+            if self.embedding_backend and embedding_backend != self.embedding_backend:
+                raise ValueError(
+                    f"Library uses {self.embedding_backend} embeddings, template was embedded with {embedding_backend}"
+                )
+            self._remove_locked(template_id)
+
+            vectors = normalize_rows(np.asarray(embeddings, dtype=np.float32))
+            start = len(self.clauses)
+            self.clauses.extend({**clause, 'template_id': template_id} for clause in clauses)
+            self.matrix = vectors if self.matrix.size == 0 else np.vstack([self.matrix, vectors])
+            self.embedding_backend = embedding_backend
+            self.templates[template_id] = {
+                'template_id': template_id,
+                'name': name,
+                'document_type': document_type,
+                'overall_risk_score': overall_risk_score,
+                'start': start,
+                'clause_count': len(clauses),
+                'created_at': datetime.now().isoformat()
+            }
+            self._hashed_matrix = None
+            self._save()
+            return dict(self.templates[template_id])
+
+    def remove_template(self, template_id: str) -> bool:
+        """Remove a template; returns False if it did not exist"""
+        self.load()
+        with self._lock:
+            removed = self._remove_locked(template_id)
+            if removed:
+                self._save()
+            return removed
+
+    def _remove_locked(self, template_id: str) -> bool:
+        template = self.templates.pop(template_id, None)
+        if template is None:
+            return False
+
+        start, count = template['start'], template['clause_count']
+        del self.clauses[start:start + count]
+        self.matrix = np.delete(self.matrix, np.s_[start:start + count], axis=0)
+        for other in self.templates.values():
+            if other['start'] > start:
+                other['start'] -= count
+        if not self.templates:
+            self.embedding_backend = None
+        self._hashed_matrix = None
+        return True
+
+    def list_templates(self) -> List[Dict[str, Any]]:
+        self.load()
+        return [dict(template) for template in self.templates.values()]
+
+    def library_matrix(self, backend: str) -> np.ndarray:
+        """Normalized clause embeddings for the given backend (hashed ones are derived from clause text)"""
+        if backend == self.embedding_backend:
+            return self.matrix
+        if backend != 'hashed':
+            raise ValueError(f"No {backend} embeddings in library")
+        if self._hashed_matrix is None:
+            self._hashed_matrix = normalize_rows(np.stack([hashed_embedding(c['clause_text']) for c in self.clauses]))
+        return self._hashed_matrix
+
+    def match(
+        self,
+        query_embeddings: np.ndarray,
+        backend: str,
+        document_type: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """
+        Score every template against the query clauses in one pass
+
+        Returns the similarity matrix restricted to candidate templates, the ordered
+        candidate template IDs with their column offsets, and per-template scores.
+        A template's score averages how well the document's clauses are covered by
+        the template and how well the template's clauses are covered by the document.
+        """
+        self.load()
+        with self._lock:
+            candidates = [
+                template for template in sorted(self.templates.values(), key=lambda t: t['start'])
+                if not document_type or template['document_type'] == document_type
+            ] or sorted(self.templates.values(), key=lambda t: t['start'])
+            if not candidates or len(query_embeddings) == 0:
+                return {'templates': [], 'similarity': np.zeros((len(query_embeddings), 0), dtype=np.float32), 'offsets': []}
+
+            library = self.library_matrix(backend)
+            columns = np.concatenate([
+                np.arange(t['start'], t['start'] + t['clause_count']) for t in candidates
+            ])
+            offsets = np.cumsum([0] + [t['clause_count'] for t in candidates[:-1]])
+            counts = np.array([t['clause_count'] for t in candidates], dtype=np.float32)
+
+            query = normalize_rows(np.asarray(query_embeddings, dtype=np.float32))
+            similarity = query @ library[columns].T  # (query clauses, candidate template clauses)
+
+            best_per_template = np.maximum.reduceat(similarity, offsets, axis=1)  # (query clauses, templates)
+            document_coverage = best_per_template.mean(axis=0)
+            template_coverage = np.add.reduceat(similarity.max(axis=0), offsets) / counts
+            scores = (document_coverage + template_coverage) / 2
+
+            return {
+                'templates': [dict(t) for t in candidates],
+                'clauses': [self.clauses[column] for column in columns],
+                'similarity': similarity,
+                'offsets': offsets.tolist(),
+                'scores': scores.tolist()
+            }
+
+    def get_stats(self) -> Dict[str, Any]:
+        self.load()
+        return {
+            'templates': len(self.templates),
+            'clauses': len(self.clauses),
+            'embedding_backend': self.embedding_backend,
+            'embedding_dim': int(self.matrix.shape[1]) if self.matrix.ndim == 2 and self.matrix.size else 0,
+            'directory': self.directory
+        }
+
+
+# Global instance
+clause_template_library = ClauseTemplateLibrary()
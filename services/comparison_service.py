@@ -2,8 +2,10 @@
 Enhanced document comparison service with Vertex AI embeddings for semantic analysis
 """
 
+import os
 import uuid
 import time
+import hashlib
 import logging
 import asyncio
 import numpy as np
@@ -13,11 +15,18 @@ from cachetools import TTLCache
 
 from models.comparison_models import (
     DocumentComparisonRequest, DocumentComparisonResponse,
-    DocumentDifference, ClauseComparison, ComparisonSummaryResponse
+    DocumentDifference, ClauseComparison, ComparisonSummaryResponse,
+    TemplateRegistrationRequest, TemplateComparisonRequest, TemplateComparisonResponse,
+    TemplateMatch, ClauseDeviation
 )
-from models.document_models import DocumentAnalysisRequest, RiskAssessment, ClauseAnalysis
+from models.document_models import DocumentAnalysisRequest, DocumentAnalysisResponse, RiskAssessment, ClauseAnalysis
 from services.document_service import DocumentService
 from services.ai_service import AIService
+from services.clause_template_library import clause_template_library, hashed_embedding, HASHED_EMBEDDING_DIM
+from services.text_diff import diff_text_pairs
+from services.worker_pool import run_in_process_pool
+from services.report_rendering import RenderQueueFull
+from services.export_cache import export_artifact_cache, artifact_key
 
 logger = logging.getLogger(__name__)
 
@@ -32,6 +41,10 @@ class ComparisonService:
         # Cache for embeddings and comparison results
         self.embedding_cache = TTLCache(maxsize=500, ttl=7200)  # 2 hour TTL
         self.comparison_cache = TTLCache(maxsize=100, ttl=3600)  # 1 hour TTL
+        self.diff_cache = TTLCache(maxsize=2000, ttl=7200)  # Clause pair edit scripts, 2 hour TTL
+        
+        # Precomputed house templates for one-vs-many comparison
+        self.template_library = clause_template_library
         
         # Semantic similarity thresholds
         self.SIMILARITY_THRESHOLDS = {
@@ -39,6 +52,13 @@ class ComparisonService:
             'medium': 0.70,
             'low': 0.50
         }
+        
+        # Clause diffs move to worker processes once a comparison has this much clause text
+        self.PARALLEL_DIFF_MIN_CHARS = 40000
+        self.DIFF_WORKERS = 4
+        
+        # Embedding requests in flight at once for one clause list
+        self.max_concurrent_embeddings = int(os.getenv('EMBEDDING_MAX_CONCURRENT_REQUESTS', '8'))
     
     async def compare_documents(self, request: DocumentComparisonRequest) -> DocumentComparisonResponse:
         """OPTIMIZED: Compare documents with full analysis but better performance"""
@@ -90,46 +110,35 @@ class ComparisonService:
     
     async def _perform_optimized_comparison(self, request: DocumentComparisonRequest, comparison_id: str, start_time: float) -> DocumentComparisonResponse:
         """OPTIMIZED comparison using full analysis with performance improvements"""
+        # Documents given only by analysis_id take their text from the stored analysis
+        document1_text, document2_text = self._resolve_document_texts(request)
+        
         # Validate document content
-        if not request.document1_text or not request.document1_text.strip():
+        if not document1_text or not document1_text.strip():
             raise ValueError("Document 1 is empty or contains no text")
         
-        if not request.document2_text or not request.document2_text.strip():
+        if not document2_text or not document2_text.strip():
             raise ValueError("Document 2 is empty or contains no text")
         
-        if len(request.document1_text.strip()) < 100:
+        if len(document1_text.strip()) < 100:
             raise ValueError("Document 1 must be at least 100 characters long")
         
-        if len(request.document2_text.strip()) < 100:
+        if len(document2_text.strip()) < 100:
             raise ValueError("Document 2 must be at least 100 characters long")
         
         # Extract meaningful text content
-        doc1_text = self._extract_document_text(request.document1_text)
-        doc2_text = self._extract_document_text(request.document2_text)
+        doc1_text = self._extract_document_text(document1_text)
+        doc2_text = self._extract_document_text(document2_text)
         
         if not doc1_text or not doc2_text:
             raise ValueError("Unable to extract meaningful text from one or both documents")
         
-        # OPTIMIZATION: Use asyncio.gather for parallel document analysis
+        # OPTIMIZATION: Reuse stored analyses and analyze only new documents, in parallel
         logger.info("⚡ Starting OPTIMIZED parallel document analysis...")
         analysis_start = time.time()
         
-        doc1_request = DocumentAnalysisRequest(
-            document_text=request.document1_text,
-            document_type=request.document1_type,
-            user_expertise_level="intermediate"  # Use intermediate for comparison
-        )
-        
-        doc2_request = DocumentAnalysisRequest(
-            document_text=request.document2_text,
-            document_type=request.document2_type,
-            user_expertise_level="intermediate"
-        )
-        
-        # PARALLEL EXECUTION: Analyze both documents simultaneously
-        doc1_analysis, doc2_analysis = await asyncio.gather(
-            self.document_service.analyze_document(doc1_request),
-            self.document_service.analyze_document(doc2_request)
+        doc1_analysis, doc2_analysis, reused = await self._get_document_analyses(
+            request, document1_text, document2_text
         )
         
         analysis_time = time.time() - analysis_start
@@ -165,6 +174,9 @@ class ComparisonService:
             recommendation_summary_task
         )
         
+        # Token-level edit scripts travel with the result, so re-renders and exports reuse them
+        await self._attach_clause_diffs(clause_comparisons)
+        
         comparison_time = time.time() - comparison_start
         logger.info(f"✅ Parallel comparison analysis completed in {comparison_time:.2f}s")
         
@@ -182,13 +194,17 @@ class ComparisonService:
                 "type": request.document1_type,
                 "overall_risk": doc1_analysis.overall_risk.dict(),
                 "clause_count": len(doc1_analysis.clause_assessments),
-                "processing_time": doc1_analysis.processing_time
+                "processing_time": doc1_analysis.processing_time,
+                "analysis_id": doc1_analysis.analysis_id,
+                "analysis_reused": reused[0]
             },
             document2_summary={
                 "type": request.document2_type,
                 "overall_risk": doc2_analysis.overall_risk.dict(),
                 "clause_count": len(doc2_analysis.clause_assessments),
-                "processing_time": doc2_analysis.processing_time
+                "processing_time": doc2_analysis.processing_time,
+                "analysis_id": doc2_analysis.analysis_id,
+                "analysis_reused": reused[1]
             },
             overall_risk_comparison=overall_risk_comparison,
             key_differences=key_differences,
@@ -203,46 +219,35 @@ class ComparisonService:
     
     async def _perform_comparison(self, request: DocumentComparisonRequest, comparison_id: str, start_time: float) -> DocumentComparisonResponse:
         """Perform the actual comparison logic"""
+        # Documents given only by analysis_id take their text from the stored analysis
+        document1_text, document2_text = self._resolve_document_texts(request)
+        
         # Validate document content
-        if not request.document1_text or not request.document1_text.strip():
+        if not document1_text or not document1_text.strip():
             raise ValueError("Document 1 is empty or contains no text")
         
-        if not request.document2_text or not request.document2_text.strip():
+        if not document2_text or not document2_text.strip():
             raise ValueError("Document 2 is empty or contains no text")
         
-        if len(request.document1_text.strip()) < 100:
+        if len(document1_text.strip()) < 100:
             raise ValueError("Document 1 must be at least 100 characters long")
         
-        if len(request.document2_text.strip()) < 100:
+        if len(document2_text.strip()) < 100:
             raise ValueError("Document 2 must be at least 100 characters long")
         
         # Extract meaningful text content
-        doc1_text = self._extract_document_text(request.document1_text)
-        doc2_text = self._extract_document_text(request.document2_text)
+        doc1_text = self._extract_document_text(document1_text)
+        doc2_text = self._extract_document_text(document2_text)
         
         if not doc1_text or not doc2_text:
             raise ValueError("Unable to extract meaningful text from one or both documents")
         
-        # OPTIMIZATION: Use asyncio.gather for parallel document analysis
+        # OPTIMIZATION: Reuse stored analyses and analyze only new documents, in parallel
         logger.info("⚡ Starting parallel document analysis...")
         analysis_start = time.time()
         
-        doc1_request = DocumentAnalysisRequest(
-            document_text=request.document1_text,
-            document_type=request.document1_type,
-            user_expertise_level="intermediate"  # Use intermediate for comparison
-        )
-        
-        doc2_request = DocumentAnalysisRequest(
-            document_text=request.document2_text,
-            document_type=request.document2_type,
-            user_expertise_level="intermediate"
-        )
-        
-        # PARALLEL EXECUTION: Analyze both documents simultaneously
-        doc1_analysis, doc2_analysis = await asyncio.gather(
-            self.document_service.analyze_document(doc1_request),
-            self.document_service.analyze_document(doc2_request)
+        doc1_analysis, doc2_analysis, reused = await self._get_document_analyses(
+            request, document1_text, document2_text
         )
         
         analysis_time = time.time() - analysis_start
@@ -278,6 +283,9 @@ class ComparisonService:
             recommendation_summary_task
         )
         
+        # Token-level edit scripts travel with the result, so re-renders and exports reuse them
+        await self._attach_clause_diffs(clause_comparisons)
+        
         comparison_time = time.time() - comparison_start
         logger.info(f"✅ Parallel comparison analysis completed in {comparison_time:.2f}s")
         
@@ -295,13 +303,17 @@ class ComparisonService:
                 "type": request.document1_type,
                 "overall_risk": doc1_analysis.overall_risk.dict(),
                 "clause_count": len(doc1_analysis.clause_assessments),
-                "processing_time": doc1_analysis.processing_time
+                "processing_time": doc1_analysis.processing_time,
+                "analysis_id": doc1_analysis.analysis_id,
+                "analysis_reused": reused[0]
             },
             document2_summary={
                 "type": request.document2_type,
                 "overall_risk": doc2_analysis.overall_risk.dict(),
                 "clause_count": len(doc2_analysis.clause_assessments),
-                "processing_time": doc2_analysis.processing_time
+                "processing_time": doc2_analysis.processing_time,
+                "analysis_id": doc2_analysis.analysis_id,
+                "analysis_reused": reused[1]
             },
             overall_risk_comparison=overall_risk_comparison,
             key_differences=key_differences,
@@ -314,6 +326,259 @@ class ComparisonService:
         logger.info(f"🎉 OPTIMIZED document comparison completed: {comparison_id} in {processing_time:.2f}s")
         return response
     
+    def _resolve_document_texts(self, request: DocumentComparisonRequest) -> Tuple[Optional[str], Optional[str]]:
+        """Get each document's text from the request, or from its stored analysis"""
+        texts = []
+        for text, analysis_id in (
+            (request.document1_text, request.document1_analysis_id),
+            (request.document2_text, request.document2_analysis_id)
+        ):
+            if not text and analysis_id:
+                stored_analysis = self.document_service.get_stored_analysis(analysis_id)
+                text = stored_analysis.document_text if stored_analysis else None
+            texts.append(text)
+        return texts[0], texts[1]
+    
+    def _find_existing_analysis(
+        self, 
+        analysis_id: Optional[str], 
+        document_text: str, 
+        document_type: str
+    ) -> Optional[DocumentAnalysisResponse]:
+        """Find a stored analysis by ID, falling back to a content hash lookup"""
+        if analysis_id:
+            stored_analysis = self.document_service.get_stored_analysis(analysis_id)
+            if stored_analysis:
+                return stored_analysis
+            logger.warning(f"Analysis {analysis_id} not found, looking up by content")
+        return self.document_service.find_analysis_by_content(document_text, document_type)
+    
+    async def _get_document_analyses(
+        self, 
+        request: DocumentComparisonRequest, 
+        document1_text: str, 
+        document2_text: str
+    ) -> Tuple[DocumentAnalysisResponse, DocumentAnalysisResponse, List[bool]]:
+        """
+        Get analyses for both documents, running the analysis pipeline only for new documents
+        
+        Returns both analyses and whether each one was reused from storage. Clause
+        embeddings are cached by clause text, so reused analyses also reuse embeddings.
+        """
+        documents = [
+            (request.document1_analysis_id, document1_text, request.document1_type),
+            (request.document2_analysis_id, document2_text, request.document2_type)
+        ]
+        analyses = [self._find_existing_analysis(*document) for document in documents]
+        reused = [analysis is not None for analysis in analyses]
+        
+        # Analyze each distinct new document once (identical documents share one analysis)
+        pending: Dict[str, Tuple[str, str, List[int]]] = {}
+        for index, (_, text, document_type) in enumerate(documents):
+            if analyses[index] is None:
+                content_hash = self.document_service.content_hash(text, document_type)
+                pending.setdefault(content_hash, (text, document_type, []))[2].append(index)
+        
+        if pending:
+            results = await asyncio.gather(*(
+                self.document_service.analyze_document(DocumentAnalysisRequest(
+                    document_text=text,
+                    document_type=document_type,
+                    user_expertise_level="intermediate"  # Use intermediate for comparison
+                ))
+                for text, document_type, _ in pending.values()
+            ))
+            for (_, _, indices), result in zip(pending.values(), results):
+                for index in indices:
+                    analyses[index] = result
+        
+        logger.info(f"Comparison analyses: {sum(reused)} reused, {len(pending)} newly analyzed")
+        return analyses[0], analyses[1], reused
+    
+    async def _get_analysis(
+        self, 
+        analysis_id: Optional[str], 
+        document_text: Optional[str], 
+        document_type: str
+    ) -> Tuple[DocumentAnalysisResponse, bool]:
+        """Get a stored analysis for one document, or analyze it; returns (analysis, reused)"""
+        if analysis_id and not document_text:
+            stored_analysis = self.document_service.get_stored_analysis(analysis_id)
+            if not stored_analysis:
+                raise ValueError(f"Analysis {analysis_id} not found")
+            return stored_analysis, True
+        
+        stored_analysis = self._find_existing_analysis(analysis_id, document_text, document_type)
+        if stored_analysis:
+            return stored_analysis, True
+        
+        analysis = await self.document_service.analyze_document(DocumentAnalysisRequest(
+            document_text=document_text,
+            document_type=document_type,
+            user_expertise_level="intermediate"
+        ))
+        return analysis, False
+    
+    async def _embed_clauses(self, clauses: List[ClauseAnalysis], backend: Optional[str]) -> Tuple[np.ndarray, str]:
+        """
+        Embed clause texts with Vertex AI, or with the local hashed embedding when the
+        library was built with it or any Vertex AI embedding is unavailable
+        """
+        if not clauses:
+            return np.zeros((0, HASHED_EMBEDDING_DIM), dtype=np.float32), backend or 'hashed'
+        
+        if backend in (None, 'vertex'):
+            embeddings = await self._get_clause_embeddings(clauses)
+            if all(embeddings):
+                return np.array(embeddings, dtype=np.float32), 'vertex'
+            logger.warning("Vertex AI embeddings unavailable for some clauses, using hashed embeddings")
+        
+        return np.stack([hashed_embedding(clause.clause_text) for clause in clauses]), 'hashed'
+    
+    async def register_template(self, request: TemplateRegistrationRequest) -> Dict[str, Any]:
+        """Analyze and embed a house template once and add it to the persistent library"""
+        self.template_library.load()
+        analysis, reused = await self._get_analysis(None, request.document_text, request.document_type)
+        if not analysis.clause_assessments:
+            raise ValueError("No clauses could be extracted from the template")
+        
+        embeddings, backend = await self._embed_clauses(
+            analysis.clause_assessments, self.template_library.embedding_backend
+        )
+        clauses = [
+            {
+                'clause_id': clause.clause_id,
+                'clause_text': clause.clause_text,
+                'topic': self._extract_clause_topic(clause.clause_text),
+                'risk_score': clause.risk_assessment.score,
+                'risk_level': clause.risk_assessment.level
+            }
+            for clause in analysis.clause_assessments
+        ]
+        
+        template = self.template_library.add_template(
+            template_id=request.template_id or str(uuid.uuid4()),
+            name=request.name,
+            document_type=analysis.document_type or request.document_type,
+            clauses=clauses,
+            embeddings=embeddings,
+            embedding_backend=backend,
+            overall_risk_score=analysis.overall_risk.score
+        )
+        logger.info(f"Registered template {template['template_id']} with {len(clauses)} clauses ({backend} embeddings)")
+        return {**template, 'analysis_id': analysis.analysis_id, 'analysis_reused': reused}
+    
+    def list_templates(self) -> List[Dict[str, Any]]:
+        return self.template_library.list_templates()
+    
+    def remove_template(self, template_id: str) -> bool:
+        return self.template_library.remove_template(template_id)
+    
+    async def compare_against_templates(self, request: TemplateComparisonRequest) -> TemplateComparisonResponse:
+        """Match a document's clauses against every library template and report deviations from the closest"""
+        start_time = time.time()
+        comparison_id = str(uuid.uuid4())
+        self.template_library.load()
+        
+        analysis, reused = await self._get_analysis(request.analysis_id, request.document_text, request.document_type)
+        embeddings, backend = await self._embed_clauses(
+            analysis.clause_assessments, self.template_library.embedding_backend
+        )
+        
+        match = self.template_library.match(embeddings, backend, analysis.document_type or request.document_type)
+        ranked = sorted(
+            (
+                TemplateMatch(
+                    template_id=template['template_id'],
+                    name=template['name'],
+                    document_type=template['document_type'],
+                    score=round(float(score), 4)
+                )
+                for template, score in zip(match['templates'], match.get('scores', []))
+            ),
+            key=lambda template: template.score,
+            reverse=True
+        )
+        
+        deviations = []
+        if ranked:
+            best_index = next(i for i, t in enumerate(match['templates']) if t['template_id'] == ranked[0].template_id)
+            deviations = self._template_clause_deviations(analysis.clause_assessments, match, best_index)
+        
+        processing_time = time.time() - start_time
+        logger.info(f"Template comparison {comparison_id}: {len(match['templates'])} templates scored in {processing_time:.2f}s")
+        
+        return TemplateComparisonResponse(
+            comparison_id=comparison_id,
+            analysis_id=analysis.analysis_id,
+            analysis_reused=reused,
+            closest_template=ranked[0] if ranked else None,
+            ranked_templates=ranked[:request.top_k],
+            clause_deviations=deviations,
+            embedding_backend=backend,
+            processing_time=processing_time
+        )
+    
+    def _template_clause_deviations(
+        self, 
+        clauses: List[ClauseAnalysis], 
+        match: Dict[str, Any], 
+        template_index: int
+    ) -> List[ClauseDeviation]:
+        """Per-clause deviations of a document from one matched template"""
+        start = match['offsets'][template_index]
+        count = match['templates'][template_index]['clause_count']
+        similarity = match['similarity'][:, start:start + count]
+        template_clauses = match['clauses'][start:start + count]
+        
+        best_columns = similarity.argmax(axis=1)
+        deviations = []
+        for row, clause in enumerate(clauses):
+            column = int(best_columns[row])
+            score = float(similarity[row, column])
+            document_risk = clause.risk_assessment.score
+            
+            if score < self.SIMILARITY_THRESHOLDS['low']:
+                deviations.append(ClauseDeviation(
+                    clause_id=clause.clause_id,
+                    clause_type=self._extract_clause_topic(clause.clause_text),
+                    deviation="non_standard",
+                    similarity=round(score, 4),
+                    document_clause_text=clause.clause_text,
+                    document_risk_score=document_risk,
+                    risk_difference=document_risk
+                ))
+                continue
+            
+            template_clause = template_clauses[column]
+            deviations.append(ClauseDeviation(
+                clause_id=clause.clause_id,
+                clause_type=template_clause['topic'],
+                deviation="standard" if score >= self.SIMILARITY_THRESHOLDS['high'] else
+                          "modified" if score >= self.SIMILARITY_THRESHOLDS['medium'] else "divergent",
+                similarity=round(score, 4),
+                document_clause_text=clause.clause_text,
+                template_clause_text=template_clause['clause_text'],
+                document_risk_score=document_risk,
+                template_risk_score=template_clause['risk_score'],
+                risk_difference=document_risk - template_clause['risk_score']
+            ))
+        
+        # Template clauses with no counterpart in the document
+        column_best = similarity.max(axis=0) if len(clauses) else np.zeros(count)
+        for column, template_clause in enumerate(template_clauses):
+            if column_best[column] < self.SIMILARITY_THRESHOLDS['low']:
+                deviations.append(ClauseDeviation(
+                    clause_type=template_clause['topic'],
+                    deviation="missing",
+                    similarity=round(float(column_best[column]), 4),
+                    template_clause_text=template_clause['clause_text'],
+                    template_risk_score=template_clause['risk_score'],
+                    risk_difference=-template_clause['risk_score']
+                ))
+        
+        return deviations
+    
     async def _compare_overall_risk_async(self, risk1: RiskAssessment, risk2: RiskAssessment) -> Dict[str, Any]:
         """Async version of overall risk comparison"""
         return self._compare_overall_risk(risk1, risk2)
@@ -996,30 +1261,34 @@ class ComparisonService:
             return self._compare_clauses(clauses1, clauses2)
     
     async def _get_clause_embeddings(self, clauses: List[ClauseAnalysis]) -> List[Optional[List[float]]]:
-        """Get embeddings for a list of clauses with caching"""
-        embeddings = []
+        """Get embeddings for a list of clauses with caching (bounded by max_concurrent_embeddings)"""
+        semaphore = asyncio.Semaphore(self.max_concurrent_embeddings)
         
-        for clause in clauses:
-            # Create cache key based on clause text
-            import hashlib
-            cache_key = f"clause_embedding:{hashlib.md5(clause.clause_text.encode()).hexdigest()}"
-            
-            # Check cache first
-            cached_embedding = self.embedding_cache.get(cache_key)
-            if cached_embedding:
-                embeddings.append(cached_embedding)
-                continue
-            
-            # Get embedding from AI service
-            embedding = await self.ai_service.get_document_embeddings(clause.clause_text)
-            
-            # Cache the result
-            if embedding:
-                self.embedding_cache[cache_key] = embedding
-            
-            embeddings.append(embedding)
+        async def embed_one(text: str) -> Optional[List[float]]:
+            async with semaphore:
+                return await self._get_text_embedding(text)
+        
+        return list(await asyncio.gather(*(embed_one(clause.clause_text) for clause in clauses)))
+    
+    async def _get_text_embedding(self, text: str) -> Optional[List[float]]:
+        """Get an embedding for one clause text with caching"""
+        # Create cache key based on clause text
+        import hashlib
+        cache_key = f"clause_embedding:{hashlib.md5(text.encode()).hexdigest()}"
+        
+        # Check cache first
+        cached_embedding = self.embedding_cache.get(cache_key)
+        if cached_embedding:
+            return cached_embedding
+        
+        # Get embedding from AI service
+        embedding = await self.ai_service.get_document_embeddings(text)
+        
+        # Cache the result
+        if embedding:
+            self.embedding_cache[cache_key] = embedding
         
-        return embeddings
+        return embedding
     
     def _find_semantic_matches(
         self, 
@@ -1291,6 +1560,50 @@ class ComparisonService:
             logger.error(f"Failed to calculate change impact assessment: {e}")
             return {"error": f"Impact assessment failed: {str(e)}"}
     
+    async def _diff_clause_pairs(self, pairs: List[Tuple[str, str]]) -> List[Dict[str, Any]]:
+        """Token-level diffs for (document 1, document 2) clause text pairs, cached by content"""
+        keys = [hashlib.sha256(f"{text1}\x00{text2}".encode('utf-8')).hexdigest() for text1, text2 in pairs]
+        missing = [i for i, key in enumerate(keys) if key not in self.diff_cache]
+        
+        if missing:
+            missing_pairs = [pairs[i] for i in missing]
+            total_chars = sum(len(text1) + len(text2) for text1, text2 in missing_pairs)
+            
+            if total_chars >= self.PARALLEL_DIFF_MIN_CHARS and len(missing_pairs) > 1:
+                # Large comparison: diff contiguous batches in worker processes
+                batch_size = -(-len(missing_pairs) // self.DIFF_WORKERS)
+                batches = [missing_pairs[i:i + batch_size] for i in range(0, len(missing_pairs), batch_size)]
+                batch_results = await asyncio.gather(*(
+                    run_in_process_pool('text_diff', diff_text_pairs, batch, max_workers=self.DIFF_WORKERS)
+                    for batch in batches
+                ))
+                results = [result for batch in batch_results for result in batch]
+            else:
+                results = await asyncio.to_thread(diff_text_pairs, missing_pairs)
+            
+            for i, result in zip(missing, results):
+                self.diff_cache[keys[i]] = result
+        
+        return [self.diff_cache[key] for key in keys]
+    
+    async def _attach_clause_diffs(self, comparisons: List[ClauseComparison]):
+        """Compute edit scripts for matched clause pairs that do not have one yet"""
+        matched = [
+            comp for comp in comparisons
+            if comp.document1_clause and comp.document2_clause and comp.text_diff is None
+        ]
+        if not matched:
+            return
+        
+        try:
+            diffs = await self._diff_clause_pairs([
+                (comp.document1_clause.clause_text, comp.document2_clause.clause_text) for comp in matched
+            ])
+            for comp, text_diff in zip(matched, diffs):
+                comp.text_diff = text_diff
+        except Exception as e:
+            logger.warning(f"Clause diff generation failed: {e}")
+    
     async def _generate_visual_differences(self, comparison_result: DocumentComparisonResponse) -> Dict[str, Any]:
         """Generate visual differences for side-by-side comparison interface"""
         try:
@@ -1309,6 +1622,9 @@ class ComparisonService:
                 "unique_to_doc2": []
             }
             
+            # Edit scripts are usually already attached; only older results need diffing here
+            await self._attach_clause_diffs(comparison_result.clause_comparisons)
+            
             # Process clause comparisons for visual highlighting
             for i, comp in enumerate(comparison_result.clause_comparisons):
                 if comp.document1_clause and comp.document2_clause:
@@ -1321,8 +1637,12 @@ class ComparisonService:
                     side_by_side_diff["matched_pairs"].append({
                         "index": i,
                         "clause_type": comp.clause_type,
-                        "document1_text": comp.document1_clause.clause_text[:500] + "..." if len(comp.document1_clause.clause_text) > 500 else comp.document1_clause.clause_text,
-                        "document2_text": comp.document2_clause.clause_text[:500] + "..." if len(comp.document2_clause.clause_text) > 500 else comp.document2_clause.clause_text,
+                        "document1_text": comp.document1_clause.clause_text,
+                        "document2_text": comp.document2_clause.clause_text,
+                        "edit_script": comp.text_diff['ops'] if comp.text_diff else None,
+                        "inserted_words": comp.text_diff['inserted_words'] if comp.text_diff else None,
+                        "deleted_words": comp.text_diff['deleted_words'] if comp.text_diff else None,
+                        "text_similarity": comp.text_diff['similarity'] if comp.text_diff else None,
                         "risk_difference": comp.risk_difference,
                         "highlight_level": highlight_level,
                         "semantic_similarity": similarity_score,
@@ -1460,24 +1780,26 @@ class ComparisonService:
         try:
             logger.info(f"🔄 Starting fallback document comparison: {comparison_id}")
             
+            document1_text, document2_text = self._resolve_document_texts(request)
+            
             # Validate document content
-            if not request.document1_text or not request.document1_text.strip():
+            if not document1_text or not document1_text.strip():
                 raise ValueError("Document 1 is empty or contains no text")
             
-            if not request.document2_text or not request.document2_text.strip():
+            if not document2_text or not document2_text.strip():
                 raise ValueError("Document 2 is empty or contains no text")
             
             # Extract meaningful text content
-            doc1_text = self._extract_document_text(request.document1_text)
-            doc2_text = self._extract_document_text(request.document2_text)
+            doc1_text = self._extract_document_text(document1_text)
+            doc2_text = self._extract_document_text(document2_text)
             
             if not doc1_text or not doc2_text:
                 raise ValueError("Unable to extract meaningful text from one or both documents")
             
             # Perform lightweight analysis
             logger.info("⚡ Performing lightweight document analysis...")
-            doc1_analysis = await self._lightweight_document_analysis(request.document1_text, request.document1_type)
-            doc2_analysis = await self._lightweight_document_analysis(request.document2_text, request.document2_type)
+            doc1_analysis = await self._lightweight_document_analysis(document1_text, request.document1_type)
+            doc2_analysis = await self._lightweight_document_analysis(document2_text, request.document2_type)
             
             # Basic risk comparison
             overall_risk_comparison = {
@@ -1496,6 +1818,8 @@ class ComparisonService:
                 doc2_analysis['clauses']
             )
             
+            await self._attach_clause_diffs(clause_comparisons)
+            
             # Generate summary
             recommendation_summary = self._generate_fast_summary(doc1_analysis, doc2_analysis)
             
@@ -1553,19 +1877,31 @@ class ComparisonService:
             from services.export_service import ExportService
             export_service = ExportService()
             
-            # Generate comprehensive report data
-            report_data = await self.generate_comparison_report(comparison_result, "detailed")
+            async def render() -> bytes:
+                # Generate comprehensive report data
+                report_data = await self.generate_comparison_report(comparison_result, "detailed")
+                
+                # Export in requested format
+                return await export_service.export_report(report_data, format)
             
-            # Export in requested format
-            exported_data = await export_service.export_report(report_data, format)
+            # Identical comparisons reuse the artifact rendered for an earlier export
+            exported_data = await export_artifact_cache.get_or_render(
+                self.export_artifact_key(comparison_result, format), render
+            )
             
             logger.info(f"Comparison report exported successfully in {format} format")
             return exported_data
             
+        except RenderQueueFull:
+            raise
         except Exception as e:
             logger.error(f"Failed to export comparison report: {e}")
             raise Exception(f"Export failed: {str(e)}")
     
+    def export_artifact_key(self, comparison_result: DocumentComparisonResponse, format: str) -> str:
+        """Export cache key (and ETag) of a comparison report in the given format"""
+        return artifact_key('comparison', format, comparison_result)
+    
     async def get_export_formats(self) -> List[str]:
         """Get supported export formats"""
         try:
@@ -1581,10 +1917,12 @@ class ComparisonService:
         return {
             "embedding_cache_size": len(self.embedding_cache),
             "comparison_cache_size": len(self.comparison_cache),
+            "diff_cache_size": len(self.diff_cache),
             "cache_hit_rates": {
                 "embeddings": getattr(self.embedding_cache, 'hits', 0) / max(getattr(self.embedding_cache, 'misses', 1), 1),
                 "comparisons": getattr(self.comparison_cache, 'hits', 0) / max(getattr(self.comparison_cache, 'misses', 1), 1)
             },
             "similarity_thresholds": self.SIMILARITY_THRESHOLDS,
+            "template_library": self.template_library.get_stats(),
             "export_formats_available": ["pdf", "docx", "word"]
         }
\ No newline at end of file
@@ -0,0 +1,190 @@
+"""
+Size-bounded on-disk cache for FastAPI backend services
+Stores opaque byte blobs as files named by key and evicts least recently used files
+"""
+
+import os
+import tempfile
+import logging
+import threading
+from collections import OrderedDict
+from typing import Dict, Any, BinaryIO, Optional
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CACHE_ROOT = os.getenv('LEGAL_SAATHI_CACHE_DIR', os.path.join(tempfile.gettempdir(), 'legal_saathi_cache'))
+
+
+class DiskLRUCache:
+    """
+    Content cache backed by one file per key under a directory.
+    Total size is kept under max_bytes by deleting the least recently used files;
+    access order survives restarts through file modification times.
+    """
+
+    def __init__(self, namespace: str, max_bytes: int, suffix: str = "", root: Optional[str] = None):
+        self.directory = os.path.join(root or DEFAULT_CACHE_ROOT, namespace)
+        self.max_bytes = max_bytes
+        self.suffix = suffix
+        self._index: "OrderedDict[str, int]" = OrderedDict()  # key -> size in bytes
+        self._total_bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            self._load_index()
+            self.enabled = True
+        except OSError as e:
+            logger.warning(f"Disk cache disabled for {namespace}: {e}")
+            self.enabled = False
+
+    def _load_index(self):
+        """Rebuild the LRU index from files already on disk, oldest first"""
+        entries = []
+        for entry in os.scandir(self.directory):
+            if entry.is_file() and entry.name.endswith(self.suffix) and not entry.name.startswith('.'):
+                stat = entry.stat()
+                key = entry.name[:len(entry.name) - len(self.suffix)] if self.suffix else entry.name
+                entries.append((stat.st_mtime, key, stat.st_size))
+
+        for _, key, size in sorted(entries):
+            self._index[key] = size
+            self._total_bytes += size
+
+        self._evict()
+
+    def path_for(self, key: str) -> str:
+        """Filesystem path used for a key (whether or not it exists)"""
+        return os.path.join(self.directory, f"{key}{self.suffix}")
+
+    def contains(self, key: str) -> bool:
+        return self.enabled and key in self._index
+
+    def get_path(self, key: str) -> Optional[str]:
+        """Return the file path for a cached key and mark it recently used"""
+        if not self.enabled:
+            return None
+
+        path = self.path_for(key)
+        with self._lock:
+            if key not in self._index:
+                # Another worker may have written it since our index was built
+                try:
+                    size = os.stat(path).st_size
+                except OSError:
+                    self.misses += 1
+                    return None
+                self._index[key] = size
+                self._total_bytes += size
+            self._index.move_to_end(key)
+            self.hits += 1
+
+        try:
+            os.utime(path)
+        except OSError:
+            # File removed underneath us (another worker evicted it)
+            self._forget(key)
+            self.hits -= 1
+            self.misses += 1
+            return None
+        return path
+
+    def get(self, key: str) -> Optional[bytes]:
+        """Read cached bytes for a key"""
+        path = self.get_path(key)
+        if path is None:
+            return None
+        try:
+            with open(path, 'rb') as f:
+                return f.read()
+        except OSError:
+            self._forget(key)
+            return None
+
+    def open(self, key: str) -> Optional[BinaryIO]:
+        """
+        Open the cached file for a key for reading
+
+        The open file stays readable even if eviction unlinks it afterwards (POSIX),
+        so it can be streamed to a client without racing other workers.
+        """
+        path = self.get_path(key)
+        if path is None:
+            return None
+        try:
+            return open(path, 'rb')
+        except OSError:
+            self._forget(key)
+            return None
+
+    def set(self, key: str, data: bytes) -> Optional[str]:
+        """Write bytes for a key atomically and return the file path"""
+        if not self.enabled or len(data) > self.max_bytes:
+            return None
+
+        path = self.path_for(key)
+        try:
+            fd, temp_path = tempfile.mkstemp(dir=self.directory, prefix='.tmp-')
+            with os.fdopen(fd, 'wb') as f:
+                f.write(data)
+            os.replace(temp_path, path)
+        except OSError as e:
+            logger.warning(f"Disk cache write failed for {key}: {e}")
+            return None
+
+        with self._lock:
+            previous_size = self._index.pop(key, 0)
+            self._index[key] = len(data)
+            self._total_bytes += len(data) - previous_size
+            self._evict()
+        return path
+
+    def delete(self, key: str):
+        """Remove a key from the cache"""
+        self._forget(key)
+        try:
+            os.remove(self.path_for(key))
+        except OSError:
+            pass
+
+    def clear(self):
+        """Remove every cached file"""
+        with self._lock:
+            keys = list(self._index)
+        for key in keys:
+            self.delete(key)
+
+    def _forget(self, key: str):
+        with self._lock:
+            size = self._index.pop(key, None)
+            if size is not None:
+                self._total_bytes -= size
+
+    def _evict(self):
+        """Delete least recently used files until under the byte budget (lock held by caller)"""
+        while self._total_bytes > self.max_bytes and self._index:
+            key, size = self._index.popitem(last=False)
+            self._total_bytes -= size
+            self.evictions += 1
+            try:
+                os.remove(self.path_for(key))
+            except OSError:
+                pass
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get cache statistics"""
+        total = self.hits + self.misses
+        return {
+            'enabled': self.enabled,
+            'directory': self.directory,
+            'entries': len(self._index),
+            'size_bytes': self._total_bytes,
+            'max_bytes': self.max_bytes,
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+            'hit_rate': self.hits / total if total else 0.0
+        }
@@ -5,6 +5,7 @@ Document processing service for FastAPI backend
 import asyncio
 import time
 import uuid
+import hashlib
 import logging
 import os
 from typing import Dict, Any, Optional, List
@@ -47,6 +48,7 @@ class DocumentService:
             self.advanced_rag_service = advanced_rag_service
             self.processing_jobs = {}  # Store async processing jobs
             self.analysis_storage = {}  # Store complete analysis results for pagination/search
+            self.content_index = {}  # Content hash -> analysis_id, so identical documents reuse stored analyses
             self.rag_knowledge_base_built = False  # Track if RAG knowledge base is initialized
             DocumentService._initialized = True
         
@@ -364,8 +366,10 @@ class DocumentService:
                 'document_type': request.document_type,
                 'user_expertise_level': request.user_expertise_level,
                 'timestamp': datetime.now(),
-                'total_clauses': len(clause_assessments)
+                'total_clauses': len(clause_assessments),
+                'content_hash': self.content_hash(request.document_text, request.document_type)
             }
+            self.content_index[self.analysis_storage[analysis_id]['content_hash']] = analysis_id
             
             logger.info(f"📚 Stored analysis {analysis_id} with {len(clause_assessments)} clauses for pagination/search")
             # Clean up expired mappings for privacy compliance
@@ -385,6 +389,31 @@ class DocumentService:
             })
             raise Exception(f"Analysis failed: {str(e)}")
     
+    @staticmethod
+    def content_hash(document_text: str, document_type) -> str:
+        """Hash of whitespace-normalized document text and type, used to find repeat analyses"""
+        type_value = getattr(document_type, 'value', document_type)
+        normalized = " ".join(document_text.split())
+        return hashlib.sha256(f"{type_value}|{normalized}".encode('utf-8')).hexdigest()
+    
+    def get_stored_analysis(self, analysis_id: str) -> Optional[DocumentAnalysisResponse]:
+        """Get a completed analysis by analysis ID (or async job ID)"""
+        stored_analysis = self.analysis_storage.get(analysis_id)
+        if stored_analysis:
+            return stored_analysis['response']
+        
+        job = self.processing_jobs.get(analysis_id)
+        if job and job['status'] == 'completed':
+            return job['result']
+        return None
+    
+    def find_analysis_by_content(self, document_text: str, document_type) -> Optional[DocumentAnalysisResponse]:
+        """Get a stored analysis of the same document text and type, if one exists"""
+        analysis_id = self.content_index.get(self.content_hash(document_text, document_type))
+        if analysis_id is None:
+            return None
+        return self.get_stored_analysis(analysis_id)
+    
     async def start_async_analysis(self, request: DocumentAnalysisRequest) -> str:
         """Start async document analysis and return job ID"""
         job_id = str(uuid.uuid4())
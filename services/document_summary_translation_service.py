@@ -5,14 +5,13 @@ with caching, rate limiting, and cost monitoring
 """
 
 import time
-import hashlib
 import logging
 from typing import Dict, Any, Optional, List
-from datetime import datetime, timedelta
+from datetime import datetime
 import asyncio
 
 from services.google_translate_service import GoogleTranslateService
-from services.cache_service import CacheService
+from services.translation_memory import translation_memory
 
 logger = logging.getLogger(__name__)
 
@@ -21,7 +20,7 @@ class DocumentSummaryTranslationService:
     """
     Service for translating document summary sections with advanced features:
     - Section-specific translation with legal context preservation
-    - 1-hour caching system for translated content
+    - Shared persistent translation memory for translated content
     - Rate limiting (50 requests/minute per user)
     - Cost monitoring with daily usage limits
     - Confidence scoring for translation quality
@@ -30,7 +29,6 @@ class DocumentSummaryTranslationService:
     
     def __init__(self):
         self.google_translate = GoogleTranslateService()
-        self.cache_service = CacheService()
         
         # Rate limiting: 50 requests per minute per user
         self.rate_limits = {}  # user_id -> {'count': int, 'window_start': timestamp}
@@ -42,9 +40,6 @@ class DocumentSummaryTranslationService:
         self.daily_request_limit = 1000
         self.daily_character_limit = 100000
         
-        # Translation cache with 1-hour TTL
-        self.translation_cache_ttl = 3600  # 1 hour
-        
         # Supported languages with enhanced coverage (20+ languages)
         self.supported_languages = {
             'en': {'name': 'English', 'native': 'English', 'flag': '🇺🇸'},
@@ -79,15 +74,6 @@ class DocumentSummaryTranslationService:
             'te': {'name': 'Telugu', 'native': 'తెలుగు', 'flag': '🇮🇳'},
             'ur': {'name': 'Urdu', 'native': 'اردو', 'flag': '🇵🇰'},
         }
-        
-        # Section-specific translation contexts for legal terminology
-        self.section_contexts = {
-            'what_this_document_means': 'Legal document overview and general meaning',
-            'key_points': 'Important legal provisions and terms',
-            'risk_assessment': 'Legal risk analysis and potential consequences',
-            'what_you_should_do': 'Legal recommendations and actionable advice',
-            'simple_explanation': 'Simplified legal explanation for non-lawyers'
-        }
     
     async def check_rate_limit(self, user_id: str) -> bool:
         """Check if user has exceeded rate limit (50 requests/minute)"""
@@ -132,28 +118,6 @@ class DocumentSummaryTranslationService:
         self.daily_usage[today]['requests'] += 1
         self.daily_usage[today]['characters'] += character_count
     
-    def generate_cache_key(self, content: str, section_type: str, target_language: str) -> str:
-        """Generate cache key for translation"""
-        content_hash = hashlib.md5(content.encode('utf-8')).hexdigest()
-        return f"summary_translation:{section_type}:{target_language}:{content_hash}"
-    
-    async def get_cached_translation(self, cache_key: str) -> Optional[Dict[str, Any]]:
-        """Get cached translation if available and not expired"""
-        cached = await self.cache_service.get_cached_translation(cache_key)
-        if cached and 'timestamp' in cached:
-            cache_time = datetime.fromisoformat(cached['timestamp'])
-            if datetime.now() - cache_time < timedelta(seconds=self.translation_cache_ttl):
-                logger.info(f"Cache hit for summary translation: {cache_key}")
-                return cached
-            else:
-                logger.info(f"Cache expired for summary translation: {cache_key}")
-        return None
-    
-    async def cache_translation(self, cache_key: str, translation_data: Dict[str, Any]):
-        """Cache translation result with timestamp"""
-        translation_data['timestamp'] = datetime.now().isoformat()
-        await self.cache_service.store_translation(cache_key, translation_data)
-    
     async def translate_summary_section(
         self,
         section_content: str,
@@ -208,19 +172,11 @@ class DocumentSummaryTranslationService:
                     'section_type': section_type
                 }
             
-            # Check cache first
-            cache_key = self.generate_cache_key(section_content, section_type, target_language)
-            cached_result = await self.get_cached_translation(cache_key)
-            if cached_result:
-                return cached_result
-            
-            # Add legal context for better translation accuracy
-            context = self.section_contexts.get(section_type, 'Legal document section')
-            contextual_content = f"[Legal Context: {context}] {section_content}"
-            
-            # Perform translation
-            translation_result = self.google_translate.translate_text(
-                text=contextual_content,
+            # Translate the bare section text (a context prefix would come back translated and
+            # could not be stripped reliably); translate_text checks and fills the shared
+            # translation memory under the section text
+            translation_result = await self.google_translate.translate_text(
+                text=section_content,
                 target_language=target_language,
                 source_language=source_language
             )
@@ -232,37 +188,16 @@ class DocumentSummaryTranslationService:
                     'section_type': section_type
                 }
             
-            # Remove context prefix from translated text
             translated_text = translation_result['translated_text']
-            if translated_text.startswith('[Legal Context:'):
-                # Find the end of the context marker and remove it
-                context_end = translated_text.find('] ')
-                if context_end != -1:
-                    translated_text = translated_text[context_end + 2:].strip()
-            
-            # Calculate confidence score based on translation quality indicators
-            confidence_score = await self.calculate_confidence_score(
-                section_content, translated_text, section_type
-            )
             
-            # Update usage statistics
-            await self.update_daily_usage(len(section_content))
+            # Update usage statistics (translation memory hits cost nothing)
+            if not translation_result.get('cached'):
+                await self.update_daily_usage(len(section_content))
             
-            # Prepare result
-            result = {
-                'success': True,
-                'section_type': section_type,
-                'original_text': section_content,
-                'translated_text': translated_text,
-                'source_language': translation_result['source_language'],
-                'target_language': target_language,
-                'language_name': self.supported_languages[target_language]['name'],
-                'confidence_score': confidence_score,
-                'timestamp': datetime.now().isoformat()
-            }
-            
-            # Cache the result
-            await self.cache_translation(cache_key, result)
+            result = await self._section_result(
+                section_content, section_type, target_language,
+                translated_text, translation_result['source_language']
+            )
             
             logger.info(f"Successfully translated {section_type} to {target_language}")
             return result
@@ -275,6 +210,31 @@ class DocumentSummaryTranslationService:
                 'section_type': section_type
             }
     
+    async def _section_result(
+        self,
+        section_content: str,
+        section_type: str,
+        target_language: str,
+        translated_text: str,
+        detected_language: str
+    ) -> Dict[str, Any]:
+        """Build a section translation result with its confidence score"""
+        # Calculate confidence score based on translation quality indicators
+        confidence_score = await self.calculate_confidence_score(
+            section_content, translated_text, section_type
+        )
+        return {
+            'success': True,
+            'section_type': section_type,
+            'original_text': section_content,
+            'translated_text': translated_text,
+            'source_language': detected_language,
+            'target_language': target_language,
+            'language_name': self.supported_languages[target_language]['name'],
+            'confidence_score': confidence_score,
+            'timestamp': datetime.now().isoformat()
+        }
+    
     async def translate_document_summary(
         self,
         summary_content: Dict[str, Any],
@@ -324,11 +284,9 @@ class DocumentSummaryTranslationService:
                 'simple_explanation': ['simplifiedExplanation', 'simple_explanation', 'simplified']
             }
             
+            # Gather every translatable string up front: (output key, list index or None, section type, text)
+            segments = []
             translated_summary = {}
-            translation_results = []
-            sections_translated = 0
-            
-            # Translate each section
             for section_type, possible_keys in section_mapping.items():
                 section_content = None
                 original_key = None
@@ -346,40 +304,43 @@ class DocumentSummaryTranslationService:
                 
                 # Handle list content (like key_points)
                 if isinstance(section_content, list):
-                    translated_items = []
-                    for item in section_content:
+                    translated_summary[original_key] = list(section_content)
+                    for index, item in enumerate(section_content):
                         if isinstance(item, str) and item.strip():
-                            item_result = await self.translate_summary_section(
-                                item, section_type, target_language, source_language, user_id
-                            )
-                            if item_result.get('success'):
-                                translated_items.append(item_result['translated_text'])
-                                sections_translated += 1
-                            else:
-                                # Fallback to original on failure
-                                translated_items.append(item)
-                                translation_results.append(item_result)
-                    
-                    translated_summary[original_key] = translated_items
+                            segments.append((original_key, index, section_type, item))
                 
                 # Handle string content
                 elif isinstance(section_content, str) and section_content.strip():
-                    section_result = await self.translate_summary_section(
-                        section_content, section_type, target_language, source_language, user_id
-                    )
-                    
-                    if section_result.get('success'):
-                        translated_summary[original_key] = section_result['translated_text']
-                        sections_translated += 1
-                    else:
-                        # Fallback to original on failure
-                        translated_summary[original_key] = section_content
-                        translation_results.append(section_result)
+                    translated_summary[original_key] = section_content
+                    segments.append((original_key, None, section_type, section_content))
                 
                 else:
                     # Keep original content if not translatable
                     translated_summary[original_key] = section_content
             
+            # Each distinct string is translated once, whichever sections it appears in
+            segment_results = await self._translate_segments(
+                list(dict.fromkeys(text for _, _, _, text in segments)),
+                target_language, source_language, user_id
+            )
+            
+            # Scatter translations back into the summary structure; failures keep the original
+            translation_results = []
+            sections_translated = 0
+            for original_key, index, section_type, text in segments:
+                segment_result = segment_results[text]
+                if segment_result.get('success'):
+                    translated_text = segment_result['translated_text']
+                    sections_translated += 1
+                else:
+                    translated_text = text
+                    translation_results.append({**segment_result, 'section_type': section_type})
+                
+                if index is None:
+                    translated_summary[original_key] = translated_text
+                else:
+                    translated_summary[original_key][index] = translated_text
+            
             # Copy over any other fields that weren't translated
             for key, value in summary_content.items():
                 if key not in translated_summary:
@@ -418,6 +379,56 @@ class DocumentSummaryTranslationService:
                 'fallback_summary': summary_content  # Return original as fallback
             }
     
+    async def _translate_segments(
+        self,
+        texts: List[str],
+        target_language: str,
+        source_language: str,
+        user_id: str
+    ) -> Dict[str, Dict[str, Any]]:
+        """
+        Translate distinct summary strings in batched multi-segment requests
+        (strings already in the shared translation memory are not sent)
+        
+        Returns:
+            Mapping of source text to its translation result
+        """
+        if not texts:
+            return {}
+        
+        if not await self.check_rate_limit(user_id):
+            error = {'success': False, 'error': 'Rate limit exceeded. Please wait before making more requests.', 'retry_after': 60}
+            return {text: error for text in texts}
+        
+        if not await self.check_daily_limits():
+            error = {'success': False, 'error': 'Daily translation limit exceeded. Please try again tomorrow.'}
+            return {text: error for text in texts}
+        
+        translations = await self.google_translate.translate_batch(texts, target_language, source_language)
+        translated_characters = sum(
+            len(text) for text, translation in zip(texts, translations) if not translation.get('cached')
+        )
+        if translated_characters:
+            await self.update_daily_usage(translated_characters)
+        
+        results = {}
+        for text, translation in zip(texts, translations):
+            if translation.get('success', False):
+                results[text] = {
+                    'success': True,
+                    'original_text': text,
+                    'translated_text': translation['translated_text'],
+                    'source_language': translation['source_language'],
+                    'target_language': target_language,
+                    'cached': translation.get('cached', False)
+                }
+            else:
+                results[text] = {'success': False, 'error': translation.get('error', 'Translation failed')}
+        
+        cached = sum(1 for result in results.values() if result.get('cached'))
+        logger.info(f"Summary segments to {target_language}: {cached} from translation memory, {len(texts) - cached} translated")
+        return results
+    
     async def calculate_confidence_score(
         self, 
         original_text: str, 
@@ -472,7 +483,8 @@ class DocumentSummaryTranslationService:
             'daily_request_limit': self.daily_request_limit,
             'daily_character_limit': self.daily_character_limit,
             'supported_languages_count': len(self.supported_languages),
-            'cache_ttl_hours': self.translation_cache_ttl / 3600
+            'cache_ttl_hours': translation_memory.max_age / 3600,
+            'translation_memory': translation_memory.get_stats()
         }
         
         if user_id and user_id in self.rate_limits:
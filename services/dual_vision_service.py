@@ -5,11 +5,17 @@ Integrates Google Cloud Vision API for images and Document AI for PDFs with inte
 
 import os
 import time
+import json
+import asyncio
+import hashlib
 import logging
+from collections import OrderedDict
 from typing import Dict, List, Any, Optional, Union
-from dataclasses import dataclass
+from dataclasses import dataclass, asdict
 from enum import Enum
 
+from services.disk_cache import DiskLRUCache
+from services.pdf_text_extraction import extract_pdf_pages, extract_pdf_pages_async, build_sub_pdf
 from services.google_document_ai_service import document_ai_service
 from services.google_cloud_vision_service import vision_service
 
@@ -19,6 +25,7 @@ class ProcessingMethod(Enum):
     """Document processing methods"""
     DOCUMENT_AI = "document_ai"
     VISION_API = "vision_api"
+    PDF_TEXT_LAYER = "pdf_text_layer"
     FALLBACK = "fallback"
 
 @dataclass
@@ -33,6 +40,90 @@ class ProcessingResult:
     error_message: Optional[str] = None
     fallback_used: bool = False
 
+class ExtractionResultCache:
+    """
+    Two-tier cache of extraction results keyed by SHA-256 of the file bytes and processing method.
+    A small in-memory LRU sits in front of a size-bounded disk tier shared across workers and restarts.
+    """
+    
+    def __init__(self, max_memory_entries: int = 64, max_disk_bytes: int = 256 * 1024 * 1024):
+        self.max_memory_entries = max_memory_entries
+        self.memory: "OrderedDict[str, ProcessingResult]" = OrderedDict()
+        self.disk = DiskLRUCache('extraction', max_bytes=max_disk_bytes, suffix='.json')
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+    
+    @staticmethod
+    def content_hash(file_content: bytes) -> str:
+        return hashlib.sha256(file_content).hexdigest()
+    
+    @staticmethod
+    def _key(content_hash: str, method: ProcessingMethod) -> str:
+        return f"{content_hash}_{method.value}"
+    
+    async def get(self, content_hash: str, method: ProcessingMethod) -> Optional[ProcessingResult]:
+        """Look up a cached result, promoting disk hits into memory"""
+        key = self._key(content_hash, method)
+        
+        result = self.memory.get(key)
+        if result is not None:
+            self.memory.move_to_end(key)
+            self.memory_hits += 1
+            return result
+        
+        raw = await asyncio.to_thread(self.disk.get, key)
+        if raw is None:
+            self.misses += 1
+            return None
+        
+        try:
+            data = json.loads(raw)
+            data['method_used'] = ProcessingMethod(data['method_used'])
+            result = ProcessingResult(**data)
+        except Exception as e:
+            logger.warning(f"Discarding unreadable extraction cache entry {key}: {e}")
+            self.disk.delete(key)
+            self.misses += 1
+            return None
+        
+        self._remember(key, result)
+        self.disk_hits += 1
+        return result
+    
+    async def set(self, content_hash: str, method: ProcessingMethod, result: ProcessingResult):
+        """Store a result in both tiers"""
+        key = self._key(content_hash, method)
+        self._remember(key, result)
+        
+        data = asdict(result)
+        data['method_used'] = result.method_used.value
+        try:
+            raw = json.dumps(data, default=str).encode('utf-8')
+        except (TypeError, ValueError) as e:
+            logger.warning(f"Extraction result not serializable, caching in memory only: {e}")
+            return
+        await asyncio.to_thread(self.disk.set, key, raw)
+    
+    def _remember(self, key: str, result: ProcessingResult):
+        self.memory[key] = result
+        self.memory.move_to_end(key)
+        while len(self.memory) > self.max_memory_entries:
+            self.memory.popitem(last=False)
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """Get cache statistics"""
+        lookups = self.memory_hits + self.disk_hits + self.misses
+        return {
+            'memory_entries': len(self.memory),
+            'memory_hits': self.memory_hits,
+            'disk_hits': self.disk_hits,
+            'misses': self.misses,
+            'hit_rate': (self.memory_hits + self.disk_hits) / lookups if lookups else 0.0,
+            'disk': self.disk.get_stats()
+        }
+
+
 class DualVisionService:
     """
     Dual vision service that intelligently routes documents to optimal processing method
@@ -69,6 +160,9 @@ class DualVisionService:
         self.prefer_vision_api_for_images = True
         self.enable_fallback = True
         
+        # Extraction results are reused across re-uploads of the same file
+        self.extraction_cache = ExtractionResultCache()
+        
         logger.info("Dual Vision Service initialized")
     
     async def process_document(
@@ -98,8 +192,26 @@ class DualVisionService:
             
             logger.info(f"Processing document with {processing_method.value} - MIME: {mime_type}, Size: {len(file_content)} bytes")
             
+            # Reuse a previous extraction of the same bytes with the same method
+            content_hash = await asyncio.to_thread(self.extraction_cache.content_hash, file_content)
+            cached_result = await self.extraction_cache.get(content_hash, processing_method)
+            if cached_result:
+                logger.info(f"Returning cached {processing_method.value} extraction for {content_hash[:12]}")
+                return ProcessingResult(
+                    success=cached_result.success,
+                    text=cached_result.text,
+                    method_used=cached_result.method_used,
+                    confidence_scores=cached_result.confidence_scores,
+                    processing_time=time.time() - start_time,
+                    metadata={**cached_result.metadata, 'cache_hit': True},
+                    error_message=cached_result.error_message,
+                    fallback_used=cached_result.fallback_used
+                )
+            
             # Route to appropriate service
-            if processing_method == ProcessingMethod.DOCUMENT_AI:
+            if self._is_pdf(mime_type, filename) and processing_method in (ProcessingMethod.DOCUMENT_AI, ProcessingMethod.FALLBACK):
+                result = await self._process_pdf(file_content, mime_type, user_id, processing_method)
+            elif processing_method == ProcessingMethod.DOCUMENT_AI:
                 result = await self._process_with_document_ai(file_content, mime_type, user_id)
             elif processing_method == ProcessingMethod.VISION_API:
                 result = await self._process_with_vision_api(file_content, mime_type, user_id)
@@ -110,6 +222,10 @@ class DualVisionService:
             processing_time = time.time() - start_time
             result.processing_time = processing_time
             
+            # Only cache results produced by the intended method, not degraded fallbacks after an error
+            if result.success and result.method_used in (processing_method, ProcessingMethod.PDF_TEXT_LAYER):
+                await self.extraction_cache.set(content_hash, processing_method, result)
+            
             logger.info(f"Document processing completed in {processing_time:.2f}s using {result.method_used.value}")
             return result
             
@@ -162,6 +278,121 @@ class DualVisionService:
         # Default fallback
         return ProcessingMethod.FALLBACK
     
+    def _is_pdf(self, mime_type: str, filename: Optional[str] = None) -> bool:
+        """Check whether a document is a PDF by MIME type or extension"""
+        if mime_type in self.pdf_mime_types:
+            return True
+        return bool(filename) and filename.lower().endswith('.pdf')
+    
+    async def _process_pdf(
+        self,
+        file_content: bytes,
+        mime_type: str,
+        user_id: str,
+        processing_method: ProcessingMethod
+    ) -> ProcessingResult:
+        """
+        Extract born-digital pages locally and send only image-only pages to OCR
+        
+        E-signed and exported contracts usually have a complete text layer, in which
+        case Document AI is skipped entirely.
+        """
+        try:
+            extraction = await extract_pdf_pages_async(file_content)
+        except Exception as e:
+            logger.warning(f"Local PDF text extraction failed: {e}")
+            extraction = None
+        
+        if extraction is None or not extraction.pages:
+            if processing_method == ProcessingMethod.DOCUMENT_AI:
+                return await self._process_with_document_ai(file_content, mime_type, user_id)
+            return await self._process_with_fallback(file_content, mime_type)
+        
+        page_metadata = {
+            'pages': extraction.page_report(),
+            'digital_pages': len(extraction.pages) - len(extraction.image_pages),
+            'ocr_pages': 0,
+            'parallel_extraction': extraction.parallel,
+            'local_extraction_time': extraction.total_time
+        }
+        
+        if extraction.fully_digital:
+            logger.info(f"PDF has a complete text layer ({len(extraction.pages)} pages) - skipping OCR")
+            return ProcessingResult(
+                success=True,
+                text=extraction.text,
+                method_used=ProcessingMethod.PDF_TEXT_LAYER,
+                confidence_scores={'overall_extraction': 0.95, 'text_quality': 0.95},
+                processing_time=0.0,  # Will be set by caller
+                metadata={'api_used': 'PDF text layer', 'method': 'PyPDF2', **page_metadata}
+            )
+        
+        if processing_method != ProcessingMethod.DOCUMENT_AI:
+            # No OCR available - return whatever text layer exists, as the basic fallback did
+            if not extraction.text:
+                return await self._process_with_fallback(file_content, mime_type)
+            return ProcessingResult(
+                success=True,
+                text=extraction.text,
+                method_used=ProcessingMethod.FALLBACK,
+                confidence_scores={'overall_extraction': 0.5},
+                processing_time=0.0,
+                metadata={'api_used': 'Fallback PDF extraction', 'method': 'PyPDF2', **page_metadata},
+                fallback_used=True
+            )
+        
+        image_pages = extraction.image_pages
+        if len(image_pages) == len(extraction.pages):
+            # Fully scanned document - nothing to gain from splitting
+            result = await self._process_with_document_ai(file_content, mime_type, user_id)
+            result.metadata.update({**page_metadata, 'ocr_pages': len(image_pages)})
+            return result
+        
+        # Mixed document: OCR only the image-only pages and splice them back in page order
+        logger.info(f"Sending {len(image_pages)} of {len(extraction.pages)} PDF pages to Document AI")
+        ocr_content = await asyncio.to_thread(build_sub_pdf, file_content, image_pages)
+        ocr_result = await asyncio.to_thread(self.document_ai.process_legal_document, ocr_content, mime_type)
+        
+        if not ocr_result.get('success') or ocr_result.get('fallback_used'):
+            logger.warning("Document AI unavailable for image-only pages - returning text layer only")
+            return ProcessingResult(
+                success=True,
+                text=extraction.text,
+                method_used=ProcessingMethod.FALLBACK,
+                confidence_scores={'overall_extraction': 0.5},
+                processing_time=0.0,
+                metadata={'api_used': 'Fallback PDF extraction', 'method': 'PyPDF2', **page_metadata},
+                fallback_used=True
+            )
+        
+        page_texts = ocr_result.get('page_texts') or []
+        if len(page_texts) != len(image_pages):
+            # Page boundaries unknown - keep the OCR text together at the first scanned page
+            page_texts = [ocr_result['text']] + [''] * (len(image_pages) - 1)
+        
+        for index, ocr_text in zip(image_pages, page_texts):
+            page = extraction.pages[index]
+            page.text = ocr_text
+            page.method = 'document_ai'
+        
+        page_metadata.update({'pages': extraction.page_report(), 'ocr_pages': len(image_pages)})
+        return ProcessingResult(
+            success=True,
+            text=extraction.text,
+            method_used=ProcessingMethod.DOCUMENT_AI,
+            confidence_scores=ocr_result['confidence_scores'],
+            processing_time=0.0,  # Will be set by caller
+            metadata={
+                'entities': len(ocr_result.get('entities', [])),
+                'tables': len(ocr_result.get('tables', [])),
+                'key_value_pairs': len(ocr_result.get('key_value_pairs', [])),
+                'legal_clauses': len(ocr_result.get('legal_clauses', [])),
+                'api_used': 'PDF text layer + Google Document AI',
+                'fallback_used': False,
+                **page_metadata
+            }
+        )
+    
     async def _process_with_document_ai(
         self, 
         file_content: bytes, 
@@ -170,8 +401,8 @@ class DualVisionService:
     ) -> ProcessingResult:
         """Process document using Document AI"""
         try:
-            # Use existing Document AI service
-            doc_ai_result = self.document_ai.process_legal_document(file_content, mime_type)
+            # Use existing Document AI service (blocking client call kept off the event loop)
+            doc_ai_result = await asyncio.to_thread(self.document_ai.process_legal_document, file_content, mime_type)
             
             if doc_ai_result['success']:
                 return ProcessingResult(
@@ -262,7 +493,7 @@ class DualVisionService:
         try:
             # Try basic text extraction for PDFs
             if mime_type in self.pdf_mime_types:
-                text = self._extract_pdf_text_fallback(file_content)
+                text = await asyncio.to_thread(self._extract_pdf_text_fallback, file_content)
                 if text:
                     return ProcessingResult(
                         success=True,
@@ -321,15 +552,7 @@ class DualVisionService:
     def _extract_pdf_text_fallback(self, file_content: bytes) -> str:
         """Fallback PDF text extraction using PyPDF2"""
         try:
-            import io
-            from PyPDF2 import PdfReader
-            
-            pdf_reader = PdfReader(io.BytesIO(file_content))
-            text = ""
-            for page in pdf_reader.pages:
-                text += page.extract_text() + "\n"
-            
-            return text.strip()
+            return extract_pdf_pages(file_content).text
         except Exception as e:
             logger.error(f"Fallback PDF extraction failed: {e}")
             return ""
@@ -352,7 +575,8 @@ class DualVisionService:
         status = {
             'dual_vision_service': {
                 'enabled': True,
-                'fallback_enabled': self.enable_fallback
+                'fallback_enabled': self.enable_fallback,
+                'extraction_cache': self.extraction_cache.get_stats()
             },
             'document_ai': {
                 'enabled': self.document_ai.enabled,
@@ -0,0 +1,380 @@
+"""
+Durable email outbox with background delivery workers
+Request handlers enqueue messages into a SQLite outbox and return immediately;
+worker tasks deliver them with bounded concurrency, jittered exponential backoff,
+per-recipient ordering and dead-lettering. Undelivered mail survives restarts.
+"""
+
+import os
+import json
+import time
+import uuid
+import random
+import sqlite3
+import asyncio
+import logging
+import threading
+from collections import deque
+from typing import Dict, Any, List, Optional, Callable, Awaitable, Tuple
+
+from models.email_models import EmailSendResponse, EmailDeliveryStatus
+
+logger = logging.getLogger(__name__)
+
+EMAIL_OUTBOX_DB = os.getenv('EMAIL_OUTBOX_DB', os.path.join('data', 'email_outbox.db'))
+
+# A message claimed longer ago than this by a worker that died is handed out again
+CLAIM_LEASE_SECONDS = 300
+
+# Delivered messages (with their full bodies) are deleted after this long
+EMAIL_OUTBOX_RETENTION_SECONDS = float(os.getenv('EMAIL_OUTBOX_RETENTION_DAYS', '7')) * 86400
+PRUNE_INTERVAL_SECONDS = 3600
+
+_outboxes: List["EmailOutbox"] = []
+
+
+class EmailOutbox:
+    """
+    Persistent outbox drained by worker tasks.
+    Rows move pending -> sending -> sent, or back to pending with a later
+    next_attempt_at after a failure, or to dead once max_attempts is reached.
+    A message is only claimed when no earlier message to the same recipient is
+    still pending or in flight, so each recipient receives mail in enqueue order.
+    """
+
+    def __init__(
+        self,
+        deliver: Callable[[Dict[str, Any]], Awaitable[EmailSendResponse]],
+        db_path: str = EMAIL_OUTBOX_DB,
+        workers: int = 4,
+        max_attempts: int = 5,
+        base_delay: float = 5.0,
+        max_delay: float = 900.0,
+        poll_interval: float = 2.0,
+        retention_seconds: float = EMAIL_OUTBOX_RETENTION_SECONDS
+    ):
+        self.deliver = deliver
+        self.db_path = db_path
+        self.workers = workers
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.poll_interval = poll_interval
+        self.retention_seconds = retention_seconds
+        self._next_prune = 0.0
+
+        self._lock = threading.Lock()
+        self._running = False
+        self._tasks: List[asyncio.Task] = []
+        self._wakeup: Optional[asyncio.Event] = None
+        self._latencies: deque = deque(maxlen=1000)
+        self.metrics = {'delivered': 0, 'failed_attempts': 0, 'dead_lettered': 0, 'pruned': 0}
+
+        directory = os.path.dirname(db_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS email_outbox (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                message_id TEXT UNIQUE NOT NULL,
+                recipient TEXT NOT NULL,
+                kind TEXT,
+                payload TEXT NOT NULL,
+                attachment BLOB,
+                status TEXT NOT NULL DEFAULT 'pending',
+                attempts INTEGER NOT NULL DEFAULT 0,
+                next_attempt_at REAL NOT NULL,
+                claimed_at REAL,
+                created_at REAL NOT NULL,
+                sent_at REAL,
+                last_error TEXT
+            )
+        """)
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_outbox_due ON email_outbox(status, next_attempt_at)")
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_outbox_recipient ON email_outbox(recipient, status, id)")
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_outbox_sent ON email_outbox(status, sent_at)")
+        self._conn.commit()
+        _outboxes.append(self)
+
+    # Storage (blocking; called through asyncio.to_thread)
+
+    def _insert(self, row: Tuple) -> None:
+        with self._lock:
+            self._conn.execute(
+                "INSERT INTO email_outbox (message_id, recipient, kind, payload, attachment, next_attempt_at, created_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                row
+            )
+            self._conn.commit()
+
+    def _claim_next(self) -> Optional[Dict[str, Any]]:
+        """Atomically claim the next due message whose recipient has nothing earlier outstanding"""
+        now = time.time()
+        with self._lock:
+            # Recover messages claimed by a worker that died mid-delivery
+            self._conn.execute(
+                "UPDATE email_outbox SET status = 'pending', claimed_at = NULL WHERE status = 'sending' AND claimed_at < ?",
+                (now - CLAIM_LEASE_SECONDS,)
+            )
+            row = self._conn.execute("""
+                SELECT id, message_id, recipient, kind, payload, attachment, attempts, created_at
+                FROM email_outbox o
+                WHERE status = 'pending' AND next_attempt_at <= ?
+                  AND NOT EXISTS (
+                      SELECT 1 FROM email_outbox p
+                      WHERE p.recipient = o.recipient AND p.id < o.id AND p.status IN ('pending', 'sending')
+                  )
+                ORDER BY next_attempt_at, id
+                LIMIT 1
+            """, (now,)).fetchone()
+            if row is None:
+                self._conn.commit()
+                return None
+            claimed = self._conn.execute(
+                "UPDATE email_outbox SET status = 'sending', claimed_at = ? WHERE id = ? AND status = 'pending'",
+                (now, row[0])
+            ).rowcount
+            self._conn.commit()
+        if not claimed:
+            # Another process sharing the outbox claimed it first
+            return None
+
+        return {
+            'id': row[0],
+            'message_id': row[1],
+            'recipient': row[2],
+            'kind': row[3],
+            **json.loads(row[4]),
+            'attachment': row[5],
+            'attempts': row[6],
+            'created_at': row[7]
+        }
+
+    def _mark_sent(self, row_id: int) -> None:
+        with self._lock:
+            self._conn.execute(
+                "UPDATE email_outbox SET status = 'sent', sent_at = ?, attempts = attempts + 1, attachment = NULL, last_error = NULL "
+                "WHERE id = ?",
+                (time.time(), row_id)
+            )
+            self._conn.commit()
+
+    def _mark_failed(self, row_id: int, attempts: int, error: str) -> bool:
+        """Schedule a retry, or dead-letter the message; returns True if dead-lettered"""
+        dead = attempts >= self.max_attempts
+        delay = min(self.max_delay, self.base_delay * 2 ** (attempts - 1)) * random.uniform(0.5, 1.5)
+        with self._lock:
+            self._conn.execute(
+                "UPDATE email_outbox SET status = ?, attempts = ?, next_attempt_at = ?, claimed_at = NULL, last_error = ? "
+                "WHERE id = ?",
+                ('dead' if dead else 'pending', attempts, time.time() + delay, error[:1000], row_id)
+            )
+            self._conn.commit()
+        return dead
+
+    def _prune(self) -> int:
+        """Delete sent messages older than the retention period; returns the number removed"""
+        with self._lock:
+            removed = self._conn.execute(
+                "DELETE FROM email_outbox WHERE status = 'sent' AND sent_at < ?",
+                (time.time() - self.retention_seconds,)
+            ).rowcount
+            self._conn.commit()
+        return removed
+
+    def _release(self, row_id: int) -> None:
+        """Return an in-flight message to the queue unchanged (worker shutdown)"""
+        with self._lock:
+            self._conn.execute(
+                "UPDATE email_outbox SET status = 'pending', claimed_at = NULL WHERE id = ? AND status = 'sending'",
+                (row_id,)
+            )
+            self._conn.commit()
+
+    # Public API
+
+    async def enqueue(
+        self,
+        recipient: str,
+        subject: str,
+        html_content: str,
+        text_content: str,
+        attachment: Optional[bytes] = None,
+        attachment_name: Optional[str] = None,
+        kind: str = "notification",
+        user_id: Optional[str] = None,
+        priority: str = "normal"
+    ) -> EmailSendResponse:
+        """Persist a message for background delivery and return immediately"""
+        message_id = f"outbox_{uuid.uuid4().hex}"
+        payload = json.dumps({
+            'subject': subject,
+            'html_content': html_content,
+            'text_content': text_content,
+            'attachment_name': attachment_name,
+            'user_id': user_id,
+            'priority': priority
+        })
+        now = time.time()
+        await asyncio.to_thread(
+            self._insert, (message_id, recipient, kind, payload, attachment, now, now)
+        )
+
+        self.start()
+        self._wakeup.set()
+        logger.info(f"Queued {kind} email {message_id} for {recipient}")
+        return EmailSendResponse(
+            success=True,
+            message_id=message_id,
+            delivery_status=EmailDeliveryStatus.PENDING
+        )
+
+    def start(self):
+        """Start the worker tasks (idempotent; needs a running event loop)"""
+        self._tasks = [task for task in self._tasks if not task.done()]
+        if self._tasks:
+            return
+        self._running = True
+        self._wakeup = asyncio.Event()
+        self._tasks = [
+            asyncio.create_task(self._worker(index), name=f"email-outbox-{index}")
+            for index in range(self.workers)
+        ]
+        logger.info(f"Email outbox started with {self.workers} workers")
+
+    async def stop(self):
+        """Stop the workers; messages in flight return to the queue"""
+        self._running = False
+        tasks, self._tasks = self._tasks, []
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    async def _claim(self) -> Optional[Dict[str, Any]]:
+        """Claim a message; if cancelled meanwhile, hand the claimed message back"""
+        claim = asyncio.ensure_future(asyncio.to_thread(self._claim_next))
+        try:
+            return await asyncio.shield(claim)
+        except asyncio.CancelledError:
+            message = await claim
+            if message is not None:
+                await asyncio.to_thread(self._release, message['id'])
+            raise
+
+    async def _worker(self, index: int):
+        # The _running check matters: wait_for can swallow a cancellation on Python < 3.12
+        while self._running:
+            message = await self._claim()
+            if message is None:
+                # The first worker sweeps delivered mail while the queue is idle
+                if index == 0 and time.time() >= self._next_prune:
+                    self._next_prune = time.time() + PRUNE_INTERVAL_SECONDS
+                    removed = await asyncio.to_thread(self._prune)
+                    if removed:
+                        self.metrics['pruned'] += removed
+                        logger.info(f"Pruned {removed} delivered emails from the outbox")
+                self._wakeup.clear()
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), timeout=self.poll_interval)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+
+            try:
+                response = await self.deliver(message)
+                error = None if response.success else (response.error or "Delivery failed")
+            except asyncio.CancelledError:
+                await asyncio.to_thread(self._release, message['id'])
+                raise
+            except Exception as e:
+                error = str(e)
+
+            attempts = message['attempts'] + 1
+            if error is None:
+                await asyncio.to_thread(self._mark_sent, message['id'])
+                latency = time.time() - message['created_at']
+                self._latencies.append(latency)
+                self.metrics['delivered'] += 1
+                logger.info(f"Delivered {message['message_id']} to {message['recipient']} "
+                            f"after {attempts} attempt(s), {latency:.1f}s after enqueue")
+            else:
+                self.metrics['failed_attempts'] += 1
+                dead = await asyncio.to_thread(self._mark_failed, message['id'], attempts, error)
+                if dead:
+                    self.metrics['dead_lettered'] += 1
+                    logger.error(f"Dead-lettered {message['message_id']} to {message['recipient']} "
+                                 f"after {attempts} attempts: {error}")
+                else:
+                    logger.warning(f"Delivery attempt {attempts} for {message['message_id']} failed: {error}")
+                # Wake another worker: the recipient's next message may now be ordered behind this retry
+                self._wakeup.set()
+
+    def requeue(self, message_id: str) -> bool:
+        """Move a dead-lettered message back to the queue"""
+        with self._lock:
+            cursor = self._conn.execute(
+                "UPDATE email_outbox SET status = 'pending', attempts = 0, next_attempt_at = ? "
+                "WHERE message_id = ? AND status = 'dead'",
+                (time.time(), message_id)
+            )
+            self._conn.commit()
+        if cursor.rowcount and self._wakeup is not None:
+            self._wakeup.set()
+        return bool(cursor.rowcount)
+
+    def get_message_status(self, message_id: str) -> Optional[Dict[str, Any]]:
+        """Delivery state of one message"""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT status, attempts, created_at, sent_at, last_error FROM email_outbox WHERE message_id = ?",
+                (message_id,)
+            ).fetchone()
+        if row is None:
+            return None
+        return {
+            'message_id': message_id,
+            'status': row[0],
+            'attempts': row[1],
+            'created_at': row[2],
+            'sent_at': row[3],
+            'last_error': row[4]
+        }
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Queue depth by status and delivery latency metrics"""
+        with self._lock:
+            counts = dict(self._conn.execute("SELECT status, COUNT(*) FROM email_outbox GROUP BY status").fetchall())
+            oldest = self._conn.execute(
+                "SELECT MIN(created_at) FROM email_outbox WHERE status IN ('pending', 'sending')"
+            ).fetchone()[0]
+
+        latencies = sorted(self._latencies)
+        return {
+            'pending': counts.get('pending', 0),
+            'sending': counts.get('sending', 0),
+            'sent': counts.get('sent', 0),
+            'dead': counts.get('dead', 0),
+            'oldest_pending_age_seconds': time.time() - oldest if oldest else 0.0,
+            'workers': len([task for task in self._tasks if not task.done()]),
+            **self.metrics,
+            'latency_seconds': {
+                'avg': sum(latencies) / len(latencies) if latencies else 0.0,
+                'p50': latencies[len(latencies) // 2] if latencies else 0.0,
+                'p95': latencies[int(len(latencies) * 0.95)] if latencies else 0.0,
+                'max': latencies[-1] if latencies else 0.0
+            }
+        }
+
+
+async def start_email_outboxes():
+    """Start workers for every outbox so mail left over from a previous run is delivered"""
+    for outbox in _outboxes:
+        outbox.start()
+
+
+async def stop_email_outboxes():
+    """Stop every outbox's workers (application shutdown)"""
+    for outbox in _outboxes:
+        await outbox.stop()
@@ -5,16 +5,14 @@ Combines Gmail API and SMTP email functionality
 
 import os
 import logging
-import smtplib
-import base64
-from email.mime.text import MIMEText
-from email.mime.multipart import MIMEMultipart
-from email.mime.application import MIMEApplication
 from typing import Dict, Any, Optional, List
 from datetime import datetime, timedelta
 from enum import Enum
 from cachetools import TTLCache
 
+from services.smtp_pool import get_smtp_pool
+from services.streaming_mime import StreamingEmailMessage
+
 logger = logging.getLogger(__name__)
 
 class EmailProvider(Enum):
@@ -41,6 +39,14 @@ class EmailServices:
             'password': os.getenv('SMTP_PASSWORD'),
             'use_tls': True
         }
+        self.smtp_pool = get_smtp_pool(
+            self.smtp_config['server'],
+            self.smtp_config['port'],
+            self.smtp_config['username'] or '',
+            self.smtp_config['password'] or '',
+            use_tls=self.smtp_config['use_tls'],
+            max_connections=int(os.getenv('SMTP_POOL_SIZE', '3'))
+        )
         
         # Initialize Gmail API (if available)
         self.gmail_service = None
@@ -119,39 +125,25 @@ class EmailServices:
             if not self._is_smtp_available():
                 return {'success': False, 'error': 'SMTP not configured'}
             
-            # Create message
-            msg = MIMEMultipart('alternative')
-            msg['Subject'] = subject
-            msg['From'] = self.smtp_config['username']
-            msg['To'] = to_email
-            
-            # Add text content
-            if text_content:
-                text_part = MIMEText(text_content, 'plain', 'utf-8')
-                msg.attach(text_part)
-            
-            # Add HTML content
-            if html_content:
-                html_part = MIMEText(html_content, 'html', 'utf-8')
-                msg.attach(html_part)
+            # Parts are kept as-is; MIME encoding happens while the pool's worker thread writes the message
+            msg = StreamingEmailMessage(
+                from_addr=self.smtp_config['username'],
+                to_addrs=[to_email],
+                subject=subject,
+                text_content=text_content,
+                html_content=html_content
+            )
             
             # Add PDF attachment
             if pdf_content:
-                pdf_part = MIMEApplication(pdf_content, _subtype='pdf')
-                pdf_part.add_header('Content-Disposition', 'attachment', filename='legal_analysis.pdf')
-                msg.attach(pdf_part)
+                msg.add_attachment(pdf_content, 'legal_analysis.pdf', 'application/pdf')
             
-            # Send email
-            with smtplib.SMTP(self.smtp_config['server'], self.smtp_config['port']) as server:
-                if self.smtp_config['use_tls']:
-                    server.starttls()
-                
-                server.login(self.smtp_config['username'], self.smtp_config['password'])
-                server.send_message(msg)
+            # Send email over a pooled connection
+            await self.smtp_pool.send_message(msg)
             
             return {
                 'success': True,
-                'message_id': f"smtp_{datetime.now().timestamp()}",
+                'message_id': msg.message_id,
                 'delivery_status': DeliveryStatus.SENT.value,
                 'provider': EmailProvider.SMTP.value,
                 'timestamp': datetime.now().isoformat()
@@ -3,7 +3,6 @@ Enhanced Experience Level Service for LegalSaathi
 Provides intelligent legal term detection and explanation based on user experience level
 """
 
-import re
 import json
 import logging
 from typing import List, Dict, Optional, Tuple, Any
@@ -11,6 +10,8 @@ from enum import Enum
 from dataclasses import dataclass
 from pathlib import Path
 
+from services.term_matcher import TermMatcher, splice
+
 try:
     import spacy
     import nltk
@@ -66,27 +67,32 @@ class LegalTermDetector:
         self.stop_words = set()
         self._initialize_nlp()
         
-        # Legal term patterns for regex-based detection
-        self.legal_patterns = {
+        # Legal vocabulary for dictionary-based detection, matched in one pass by a word trie
+        self.legal_terms = {
             'contract_terms': [
-                r'\b(?:indemnif(?:y|ication)|liability|breach|covenant|warranty)\b',
-                r'\b(?:consideration|jurisdiction|arbitration|damages|remedy)\b',
-                r'\b(?:force majeure|intellectual property|confidentiality)\b',
-                r'\b(?:termination|assignment|novation|estoppel)\b'
+                'indemnify', 'indemnification', 'liability', 'breach', 'covenant', 'warranty',
+                'consideration', 'jurisdiction', 'arbitration', 'damages', 'remedy',
+                'force majeure', 'intellectual property', 'confidentiality',
+                'termination', 'assignment', 'novation', 'estoppel'
             ],
             'property_terms': [
-                r'\b(?:lien|mortgage|easement|deed|title|escrow)\b',
-                r'\b(?:foreclosure|encumbrance|servitude|usufruct)\b'
+                'lien', 'mortgage', 'easement', 'deed', 'title', 'escrow',
+                'foreclosure', 'encumbrance', 'servitude', 'usufruct'
             ],
             'tort_terms': [
-                r'\b(?:negligence|defamation|trespass|nuisance)\b',
-                r'\b(?:strict liability|proximate cause|duty of care)\b'
+                'negligence', 'defamation', 'trespass', 'nuisance',
+                'strict liability', 'proximate cause', 'duty of care'
             ],
             'corporate_terms': [
-                r'\b(?:fiduciary|shareholder|board of directors)\b',
-                r'\b(?:merger|acquisition|due diligence|compliance)\b'
+                'fiduciary', 'shareholder', 'board of directors',
+                'merger', 'acquisition', 'due diligence', 'compliance'
             ]
         }
+        self.term_domains: Dict[str, str] = {}
+        for domain, terms in self.legal_terms.items():
+            for term in terms:
+                self.term_domains.setdefault(term, domain)
+        self.term_matcher = TermMatcher(self.term_domains)
     
     def _initialize_nlp(self):
         """Initialize NLP models and resources"""
@@ -119,24 +125,27 @@ class LegalTermDetector:
             logging.error(f"Failed to initialize NLP models: {e}")
             self.nlp = None
     
-    def detect_legal_terms(self, text: str) -> List[Tuple[str, str, float]]:
+    def find_legal_terms(self, text: str) -> List[Tuple[int, int, str]]:
+        """
+        Locate vocabulary terms in a single pass
+        Returns: List of (start, end, term) tuples in text order
+        """
+        return self.term_matcher.find_all(text)
+    
+    def detect_legal_terms(self, text: str, use_nlp: bool = True) -> List[Tuple[str, str, float]]:
         """
         Detect legal terms in text
         Returns: List of (term, domain, confidence) tuples
         """
         detected_terms = []
         
-        # Regex-based detection
-        for domain, patterns in self.legal_patterns.items():
-            for pattern in patterns:
-                matches = re.finditer(pattern, text, re.IGNORECASE)
-                for match in matches:
-                    term = match.group().lower()
-                    confidence = 0.8  # High confidence for regex matches
-                    detected_terms.append((term, domain, confidence))
+        # Dictionary-based detection
+        for _, _, term in self.find_legal_terms(text):
+            confidence = 0.8  # High confidence for vocabulary matches
+            detected_terms.append((term, self.term_domains[term], confidence))
         
         # NLP-based detection if available
-        if self.nlp:
+        if use_nlp and self.nlp:
             detected_terms.extend(self._nlp_based_detection(text))
         
         # Remove duplicates and sort by confidence
@@ -508,8 +517,13 @@ class EnhancedExperienceLevelService:
         Adapt response based on user experience level
         """
         try:
-            # Detect legal terms in the response
-            detected_terms = self.term_detector.detect_legal_terms(response)
+            # Locate legal terms in the response in one pass. spaCy detection is skipped:
+            # only glossary terms are explained, and every glossary term is in the vocabulary
+            occurrences = self.term_detector.find_legal_terms(response)
+            detected_terms = [
+                (term, self.term_detector.term_domains[term], 0.8)
+                for term in dict.fromkeys(term for _, _, term in occurrences)
+            ]
             
             # Generate explanations based on experience level
             terms_explained = []
@@ -517,18 +531,22 @@ class EnhancedExperienceLevelService:
             
             if level != ExperienceLevel.EXPERT:
                 threshold = self.complexity_thresholds[level]
+                insertions = []
+                explained = set()
                 
-                for term, domain, confidence in detected_terms:
+                # Explain the first occurrence of each term, positioned against the original text
+                for start, end, term in occurrences:
+                    if term in explained:
+                        continue
+                    explained.add(term)
                     legal_term = self.glossary.get_term(term)
                     
                     if legal_term and legal_term.complexity_level <= threshold:
                         explanation = self.generate_term_explanation(legal_term, level)
                         terms_explained.append(explanation)
-                        
-                        # Insert explanation into response
-                        adapted_response = self._insert_explanation(
-                            adapted_response, term, explanation, level
-                        )
+                        insertions.append((end, self._format_explanation(explanation, level)))
+                
+                adapted_response = splice(response, insertions)
             
             # Calculate complexity score
             complexity_score = self._calculate_complexity_score(detected_terms)
@@ -578,24 +596,12 @@ class EnhancedExperienceLevelService:
             confidence=0.9
         )
     
-    def _insert_explanation(self, text: str, term: str, explanation: TermExplanation, level: ExperienceLevel) -> str:
-        """Insert explanation into text appropriately"""
-        
-        if level == ExperienceLevel.EXPERT:
-            return text  # No modifications for experts
-        
-        # Find the term in text (case insensitive)
-        pattern = re.compile(re.escape(term), re.IGNORECASE)
-        
-        def replace_func(match):
-            matched_term = match.group()
-            if level == ExperienceLevel.BEGINNER:
-                return f"{matched_term} ({explanation.explanation})"
-            else:  # Intermediate
-                return f"{matched_term} (a legal concept involving {explanation.explanation.split('.')[0].lower()})"
-        
-        # Replace first occurrence only to avoid cluttering
-        return pattern.sub(replace_func, text, count=1)
+    def _format_explanation(self, explanation: TermExplanation, level: ExperienceLevel) -> str:
+        """Parenthetical inserted after an explained term"""
+        if level == ExperienceLevel.BEGINNER:
+            return f" ({explanation.explanation})"
+        # Intermediate
+        return f" (a legal concept involving {explanation.explanation.split('.')[0].lower()})"
     
     def _calculate_complexity_score(self, detected_terms: List[Tuple[str, str, float]]) -> float:
         """Calculate overall complexity score of the text"""
@@ -207,6 +207,7 @@ class ExpertAuthService:
             
             # Set custom claims
             auth.set_custom_user_claims(user_id, custom_claims)
+            self.firebase_service.token_cache.revoke_user(user_id)
             
             # Update expert user record
             await self._get_or_create_expert_user(
@@ -246,6 +247,7 @@ class ExpertAuthService:
             
             # Set updated claims
             auth.set_custom_user_claims(user_id, custom_claims)
+            self.firebase_service.token_cache.revoke_user(user_id)
             
             # Deactivate expert user record
             await self._deactivate_expert_user(user_id)
@@ -29,6 +29,7 @@ except ImportError:
 
 from models.document_models import DocumentAnalysisResponse
 from models.expert_queue_models import ExpertAnalysisResponse
+from services.report_rendering import render_in_pool
 
 logger = logging.getLogger(__name__)
 
@@ -36,6 +37,9 @@ logger = logging.getLogger(__name__)
 class ExpertPDFGenerator:
     """Enhanced PDF generator for expert-certified reports"""
     
+    # Paragraph styles are immutable once built, so every instance in a process shares them
+    _shared_styles: Optional[Dict[str, Any]] = None
+    
     def __init__(self):
         if not REPORTLAB_AVAILABLE:
             logger.warning("ReportLab not available. PDF generation will be limited.")
@@ -52,7 +56,23 @@ class ExpertPDFGenerator:
         } if REPORTLAB_AVAILABLE else {}
         
         # Then initialize styles (which depend on colors)
-        self.styles = self._create_styles() if REPORTLAB_AVAILABLE else None
+        if REPORTLAB_AVAILABLE and ExpertPDFGenerator._shared_styles is None:
+            ExpertPDFGenerator._shared_styles = self._create_styles()
+        self.styles = ExpertPDFGenerator._shared_styles
+    
+    async def render_expert_certified_report(
+        self,
+        expert_analysis: ExpertAnalysisResponse,
+        original_ai_analysis: Optional[DocumentAnalysisResponse],
+        review_id: str,
+        expert_name: str = "Legal Expert",
+        expert_credentials: str = "J.D., Licensed Attorney"
+    ) -> bytes:
+        """Generate the expert-certified PDF in the report render pool"""
+        return await render_in_pool(
+            render_expert_certified_report,
+            expert_analysis, original_ai_analysis, review_id, expert_name, expert_credentials
+        )
     
     def generate_expert_certified_report(
         self,
@@ -470,4 +490,17 @@ This expert analysis is provided for informational purposes and does not
 constitute legal advice. Consult with a licensed attorney for specific legal matters.
         """
         
-        return content.encode('utf-8')
\ No newline at end of file
+        return content.encode('utf-8')
+
+
+def render_expert_certified_report(
+    expert_analysis: ExpertAnalysisResponse,
+    original_ai_analysis: Optional[DocumentAnalysisResponse],
+    review_id: str,
+    expert_name: str,
+    expert_credentials: str
+) -> bytes:
+    """Render pool entry point for expert-certified reports"""
+    return ExpertPDFGenerator().generate_expert_certified_report(
+        expert_analysis, original_ai_analysis, review_id, expert_name, expert_credentials
+    )
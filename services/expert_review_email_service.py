@@ -6,7 +6,6 @@ Handles email notifications for expert review queue and results
 import os
 import logging
 import json
-import asyncio
 from datetime import datetime, timedelta
 from typing import Dict, Any, Optional, List
 from jinja2 import Template, Environment, BaseLoader
@@ -21,9 +20,13 @@ from models.expert_queue_models import (
 from models.document_models import DocumentAnalysisResponse
 from services.gmail_service import GmailService
 from services.smtp_email_service import SMTPEmailService
+from services.email_outbox import EmailOutbox
 
 logger = logging.getLogger(__name__)
 
+# Jinja templates shared by every service instance
+_compiled_templates: Dict[str, Template] = {}
+
 
 class ExpertReviewEmailService:
     """Enhanced email service for expert review notifications"""
@@ -32,15 +35,22 @@ class ExpertReviewEmailService:
         self.gmail_service = GmailService()
         self.smtp_service = SMTPEmailService()
         self.template_env = Environment(loader=BaseLoader())
-        self.max_retries = 3
-        self.retry_delay = 5  # seconds
         
-        # Email templates
-        self.templates = {
-            'review_queued': self._get_review_queued_template(),
-            'expert_results': self._get_expert_results_template(),
-            'review_status_update': self._get_status_update_template()
-        }
+        # Durable outbox drained by background workers
+        self.outbox = EmailOutbox(
+            deliver=self._deliver,
+            workers=int(os.getenv('EMAIL_OUTBOX_WORKERS', '4')),
+            max_attempts=int(os.getenv('EMAIL_OUTBOX_MAX_ATTEMPTS', '5'))
+        )
+        
+        # Email templates (compiled once per process)
+        if not _compiled_templates:
+            _compiled_templates.update({
+                'review_queued': self._get_review_queued_template(),
+                'expert_results': self._get_expert_results_template(),
+                'review_status_update': self._get_status_update_template()
+            })
+        self.templates = _compiled_templates
         
         logger.info("Expert Review Email Service initialized")
     
@@ -79,14 +89,15 @@ class ExpertReviewEmailService:
             html_content = self.templates['review_queued'].render(**template_vars)
             text_content = self._generate_review_queued_text(**template_vars)
             
-            # Send with retry logic
-            return await self._send_email_with_retry(
+            # Queue for background delivery
+            return await self._queue_email(
                 to_email=user_email,
                 subject=subject,
                 html_content=html_content,
                 text_content=text_content,
                 user_id=user_id or user_email,
-                priority=EmailPriority.HIGH
+                priority=EmailPriority.HIGH,
+                kind="review_queued"
             )
             
         except Exception as e:
@@ -137,15 +148,16 @@ class ExpertReviewEmailService:
                 data=pdf_content
             )
             
-            # Send with retry logic
-            return await self._send_email_with_retry(
+            # Queue for background delivery
+            return await self._queue_email(
                 to_email=user_email,
                 subject=subject,
                 html_content=html_content,
                 text_content=text_content,
                 attachments=[attachment],
                 user_id=user_id or user_email,
-                priority=EmailPriority.HIGH
+                priority=EmailPriority.HIGH,
+                kind="expert_results"
             )
             
         except Exception as e:
@@ -194,14 +206,15 @@ class ExpertReviewEmailService:
             html_content = self.templates['review_status_update'].render(**template_vars)
             text_content = self._generate_status_update_text(**template_vars)
             
-            # Send with retry logic
-            return await self._send_email_with_retry(
+            # Queue for background delivery
+            return await self._queue_email(
                 to_email=user_email,
                 subject=subject,
                 html_content=html_content,
                 text_content=text_content,
                 user_id=user_id or user_email,
-                priority=EmailPriority.NORMAL
+                priority=EmailPriority.NORMAL,
+                kind="review_status_update"
             )
             
         except Exception as e:
@@ -212,7 +225,7 @@ class ExpertReviewEmailService:
                 delivery_status=EmailDeliveryStatus.FAILED
             )
     
-    async def _send_email_with_retry(
+    async def _queue_email(
         self,
         to_email: str,
         subject: str,
@@ -220,79 +233,79 @@ class ExpertReviewEmailService:
         text_content: str,
         attachments: List[EmailAttachment] = None,
         user_id: str = None,
-        priority: EmailPriority = EmailPriority.NORMAL
+        priority: EmailPriority = EmailPriority.NORMAL,
+        kind: str = "notification"
     ) -> EmailSendResponse:
-        """Send email with retry logic (3 attempts)"""
+        """Persist email in the outbox; delivery and retries happen in the background"""
+        # Retrying cannot help when no transport is configured, so fail now as before
+        if not (self.smtp_service.is_available() or self.gmail_service.is_available()):
+            return EmailSendResponse(
+                success=False,
+                error="No email service available",
+                delivery_status=EmailDeliveryStatus.FAILED
+            )
         
-        attachments = attachments or []
-        last_error = None
+        attachment = attachments[0] if attachments else None
+        return await self.outbox.enqueue(
+            recipient=to_email,
+            subject=subject,
+            html_content=html_content,
+            text_content=text_content,
+            attachment=attachment.data if attachment else None,
+            attachment_name=attachment.filename if attachment else None,
+            kind=kind,
+            user_id=user_id,
+            priority=priority.value
+        )
+    
+    async def _deliver(self, message: Dict[str, Any]) -> EmailSendResponse:
+        """Single delivery attempt for an outbox message (retries are scheduled by the outbox)"""
+        to_email = message['recipient']
         
-        for attempt in range(1, self.max_retries + 1):
-            try:
-                logger.info(f"Email send attempt {attempt}/{self.max_retries} to {to_email}")
-                
-                # Try SMTP first (more reliable)
-                if self.smtp_service.is_available():
-                    if attachments and len(attachments) > 0:
-                        # Use SMTP for emails with attachments
-                        response = await self._send_via_smtp_with_attachment(
-                            to_email, subject, html_content, text_content, 
-                            attachments[0].data if attachments else None, user_id
-                        )
-                    else:
-                        # Use SMTP for simple emails
-                        response = await self._send_via_smtp_simple(
-                            to_email, subject, html_content, text_content, user_id
-                        )
-                    
-                    if response.success:
-                        logger.info(f"Email sent successfully via SMTP on attempt {attempt}")
-                        return response
-                    else:
-                        last_error = response.error
-                
-                # Fallback to Gmail API
-                elif self.gmail_service.is_available():
-                    email_request = EmailSendRequest(
-                        to_email=to_email,
-                        subject=subject,
-                        html_content=html_content,
-                        text_content=text_content,
-                        attachments=attachments,
-                        priority=priority
-                    )
-                    
-                    response = await self.gmail_service._send_email(email_request)
-                    
-                    if response.success:
-                        logger.info(f"Email sent successfully via Gmail API on attempt {attempt}")
-                        return response
-                    else:
-                        last_error = response.error
-                
-                else:
-                    return EmailSendResponse(
-                        success=False,
-                        error="No email service available",
-                        delivery_status=EmailDeliveryStatus.FAILED
-                    )
-                
-            except Exception as e:
-                last_error = str(e)
-                logger.warning(f"Email send attempt {attempt} failed: {e}")
-            
-            # Wait before retry (except on last attempt)
-            if attempt < self.max_retries:
-                await asyncio.sleep(self.retry_delay * attempt)
+        # Try SMTP first (more reliable)
+        if self.smtp_service.is_available():
+            if message['attachment']:
+                # Use SMTP for emails with attachments
+                return await self._send_via_smtp_with_attachment(
+                    to_email, message['subject'], message['html_content'], message['text_content'],
+                    message['attachment'], message['user_id']
+                )
+            # Use SMTP for simple emails
+            return await self._send_via_smtp_simple(
+                to_email, message['subject'], message['html_content'], message['text_content'],
+                message['user_id']
+            )
+        
+        # Fallback to Gmail API
+        if self.gmail_service.is_available():
+            attachments = []
+            if message['attachment']:
+                attachments.append(EmailAttachment(
+                    filename=message['attachment_name'] or "attachment.pdf",
+                    content_type="application/pdf",
+                    size=len(message['attachment']),
+                    data=message['attachment']
+                ))
+            email_request = EmailSendRequest(
+                to_email=to_email,
+                subject=message['subject'],
+                html_content=message['html_content'],
+                text_content=message['text_content'],
+                attachments=attachments,
+                priority=EmailPriority(message['priority'])
+            )
+            return await self.gmail_service._send_email(email_request)
         
-        # All attempts failed
-        logger.error(f"All {self.max_retries} email send attempts failed. Last error: {last_error}")
         return EmailSendResponse(
             success=False,
-            error=f"Failed after {self.max_retries} attempts: {last_error}",
+            error="No email service available",
             delivery_status=EmailDeliveryStatus.FAILED
         )
     
+    def get_outbox_stats(self) -> Dict[str, Any]:
+        """Outbox queue depth and delivery latency metrics"""
+        return self.outbox.get_stats()
+    
     async def _send_via_smtp_with_attachment(
         self,
         to_email: str,
@@ -0,0 +1,140 @@
+"""
+Content-addressed cache for rendered export artifacts
+A rendered PDF or DOCX is stored on local disk under a hash of its canonical report
+payload, format and EXPORT_TEMPLATE_VERSION, so downloading or emailing the same
+report again skips rendering. The key doubles as the artifact's HTTP ETag.
+"""
+
+import os
+import json
+import asyncio
+import hashlib
+import logging
+from datetime import date, datetime
+from enum import Enum
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+from services.disk_cache import DiskLRUCache
+
+logger = logging.getLogger(__name__)
+
+# Bump whenever a report layout changes so artifacts rendered by older code are not served
+EXPORT_TEMPLATE_VERSION = "1"
+EXPORT_CACHE_MAX_BYTES = int(os.getenv("EXPORT_CACHE_MAX_BYTES", str(256 * 1024 * 1024)))
+
+MEDIA_TYPES = {
+    'pdf': 'application/pdf',
+    'docx': 'application/vnd.openxmlformats-officedocument.wordprocessingml.document'
+}
+
+
+def normalize_format(format: str) -> str:
+    """Canonical export format name ('word' is an alias for 'docx')"""
+    format = format.lower()
+    return 'docx' if format == 'word' else format
+
+
+def _json_default(value: Any) -> Any:
+    if hasattr(value, 'model_dump'):
+        return value.model_dump(mode='json')
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if isinstance(value, Enum):
+        return value.value
+    if isinstance(value, (set, frozenset)):
+        return sorted(value, key=str)
+    if isinstance(value, bytes):
+        return hashlib.sha256(value).hexdigest()
+    return str(value)
+
+
+def canonical_payload(payload: Any) -> bytes:
+    """Stable serialization of a report payload: sorted keys, no whitespace, models as JSON"""
+    return json.dumps(
+        payload, sort_keys=True, separators=(',', ':'), ensure_ascii=False, default=_json_default
+    ).encode('utf-8')
+
+
+def artifact_key(kind: str, format: str, payload: Any) -> str:
+    """Cache key (and ETag value) for a report of the given kind rendered in format"""
+    format = normalize_format(format)
+    digest = hashlib.sha256()
+    for part in (kind, format, EXPORT_TEMPLATE_VERSION):
+        digest.update(part.encode('utf-8'))
+        digest.update(b"\0")
+    digest.update(canonical_payload(payload))
+    return f"{digest.hexdigest()}.{format}"
+
+
+def artifact_etag(key: str) -> str:
+    return f'"{key}"'
+
+
+def etag_matches(if_none_match: Optional[str], key: str) -> bool:
+    """True when an If-None-Match header already names this artifact"""
+    if not if_none_match:
+        return False
+    etag = artifact_etag(key)
+    for candidate in if_none_match.split(','):
+        candidate = candidate.strip()
+        if candidate == '*' or candidate.removeprefix('W/') == etag:
+            return True
+    return False
+
+
+def artifact_headers(key: str) -> Dict[str, str]:
+    """Validator headers sent with every cached artifact and 304/412 response"""
+    return {
+        'ETag': artifact_etag(key),
+        'Cache-Control': 'private, no-cache',
+        'Content-Location': f"/api/export/artifacts/{key}"
+    }
+
+
+class ExportArtifactCache:
+    """
+    Rendered exports on disk, bounded by size with LRU eviction.
+    Concurrent requests for the same artifact share a single render.
+    """
+
+    def __init__(self, max_bytes: int = EXPORT_CACHE_MAX_BYTES):
+        self.disk = DiskLRUCache('export_artifacts', max_bytes)
+        self._rendering: Dict[str, asyncio.Task] = {}
+        self.renders = 0
+
+    async def get(self, key: str) -> Optional[bytes]:
+        return await asyncio.to_thread(self.disk.get, key)
+
+    async def get_or_render(self, key: str, render: Callable[[], Awaitable[bytes]]) -> bytes:
+        """Cached artifact for key, rendering and storing it on a miss"""
+        data = await self.get(key)
+        if data is not None:
+            return data
+
+        task = self._rendering.get(key)
+        if task is None:
+            task = asyncio.ensure_future(self._render(key, render))
+            self._rendering[key] = task
+            task.add_done_callback(lambda _: self._rendering.pop(key, None))
+        # A cancelled download must not abort the render other requests are waiting on
+        return await asyncio.shield(task)
+
+    async def _render(self, key: str, render: Callable[[], Awaitable[bytes]]) -> bytes:
+        data = await render()
+        self.renders += 1
+        if data:
+            await asyncio.to_thread(self.disk.set, key, data)
+        return data
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get cache statistics"""
+        return {
+            **self.disk.get_stats(),
+            'renders': self.renders,
+            'rendering': len(self._rendering),
+            'template_version': EXPORT_TEMPLATE_VERSION
+        }
+
+
+# Global export artifact cache
+export_artifact_cache = ExportArtifactCache()
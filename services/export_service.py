@@ -4,10 +4,11 @@ Export service for generating PDF and Word comparison reports
 
 import io
 import logging
+from functools import lru_cache
 from typing import Dict, Any, Optional
 from datetime import datetime
 from reportlab.lib.pagesizes import letter, A4
-from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
+from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle, StyleSheet1
 from reportlab.lib.units import inch
 from reportlab.lib.colors import HexColor, black, red, orange, green
 from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Table, TableStyle, PageBreak
@@ -17,74 +18,89 @@ from docx.shared import Inches, RGBColor
 from docx.enum.text import WD_ALIGN_PARAGRAPH
 from docx.enum.style import WD_STYLE_TYPE
 
+from services.report_rendering import render_in_pool
+
 logger = logging.getLogger(__name__)
 
 
+@lru_cache(maxsize=None)
+def get_export_styles() -> StyleSheet1:
+    """Sample stylesheet plus the report's custom styles, built once per process"""
+    styles = getSampleStyleSheet()
+    
+    # Title style
+    styles.add(ParagraphStyle(
+        name='CustomTitle',
+        parent=styles['Title'],
+        fontSize=24,
+        spaceAfter=30,
+        textColor=HexColor('#1e40af'),
+        alignment=TA_CENTER
+    ))
+    
+    # Heading style
+    styles.add(ParagraphStyle(
+        name='CustomHeading',
+        parent=styles['Heading1'],
+        fontSize=16,
+        spaceBefore=20,
+        spaceAfter=12,
+        textColor=HexColor('#1e40af'),
+        leftIndent=0
+    ))
+    
+    # Subheading style
+    styles.add(ParagraphStyle(
+        name='CustomSubheading',
+        parent=styles['Heading2'],
+        fontSize=14,
+        spaceBefore=15,
+        spaceAfter=8,
+        textColor=HexColor('#374151'),
+        leftIndent=0
+    ))
+    
+    # Risk styles
+    styles.add(ParagraphStyle(
+        name='HighRisk',
+        parent=styles['Normal'],
+        textColor=HexColor('#dc2626'),
+        fontSize=10
+    ))
+    
+    styles.add(ParagraphStyle(
+        name='MediumRisk',
+        parent=styles['Normal'],
+        textColor=HexColor('#ea580c'),
+        fontSize=10
+    ))
+    
+    styles.add(ParagraphStyle(
+        name='LowRisk',
+        parent=styles['Normal'],
+        textColor=HexColor('#16a34a'),
+        fontSize=10
+    ))
+    
+    return styles
+
+
 class ExportService:
     """Service for exporting comparison reports to PDF and Word formats"""
     
     def __init__(self):
-        self.styles = getSampleStyleSheet()
-        self._setup_custom_styles()
-    
-    def _setup_custom_styles(self):
-        """Setup custom styles for PDF generation"""
-        # Title style
-        self.styles.add(ParagraphStyle(
-            name='CustomTitle',
-            parent=self.styles['Title'],
-            fontSize=24,
-            spaceAfter=30,
-            textColor=HexColor('#1e40af'),
-            alignment=TA_CENTER
-        ))
-        
-        # Heading style
-        self.styles.add(ParagraphStyle(
-            name='CustomHeading',
-            parent=self.styles['Heading1'],
-            fontSize=16,
-            spaceBefore=20,
-            spaceAfter=12,
-            textColor=HexColor('#1e40af'),
-            leftIndent=0
-        ))
-        
-        # Subheading style
-        self.styles.add(ParagraphStyle(
-            name='CustomSubheading',
-            parent=self.styles['Heading2'],
-            fontSize=14,
-            spaceBefore=15,
-            spaceAfter=8,
-            textColor=HexColor('#374151'),
-            leftIndent=0
-        ))
-        
-        # Risk styles
-        self.styles.add(ParagraphStyle(
-            name='HighRisk',
-            parent=self.styles['Normal'],
-            textColor=HexColor('#dc2626'),
-            fontSize=10
-        ))
-        
-        self.styles.add(ParagraphStyle(
-            name='MediumRisk',
-            parent=self.styles['Normal'],
-            textColor=HexColor('#ea580c'),
-            fontSize=10
-        ))
-        
-        self.styles.add(ParagraphStyle(
-            name='LowRisk',
-            parent=self.styles['Normal'],
-            textColor=HexColor('#16a34a'),
-            fontSize=10
-        ))
+        self.styles = get_export_styles()
     
     async def export_comparison_report_pdf(self, report_data: Dict[str, Any]) -> bytes:
-        """Export comparison report as PDF"""
+        """Export comparison report as PDF (rendered in the report render pool)"""
+        return await render_in_pool(render_comparison_pdf, report_data)
+    
+    async def export_comparison_report_word(self, report_data: Dict[str, Any]) -> bytes:
+        """Export comparison report as Word document (rendered in the report render pool)"""
+        return await render_in_pool(render_comparison_word, report_data)
+    
+    def _render_pdf(self, report_data: Dict[str, Any]) -> bytes:
+        """Build the comparison report PDF"""
         try:
             logger.info(f"Generating PDF report for comparison: {report_data.get('comparison_id')}")
             
@@ -218,8 +234,8 @@ class ExportService:
             logger.error(f"Failed to generate PDF report: {e}")
             raise Exception(f"PDF generation failed: {str(e)}")
     
-    async def export_comparison_report_word(self, report_data: Dict[str, Any]) -> bytes:
-        """Export comparison report as Word document"""
+    def _render_word(self, report_data: Dict[str, Any]) -> bytes:
+        """Build the comparison report Word document"""
         try:
             logger.info(f"Generating Word report for comparison: {report_data.get('comparison_id')}")
             
@@ -398,4 +414,14 @@ class ExportService:
         elif format in ['docx', 'word']:
             return await self.export_comparison_report_word(report_data)
         else:
-            raise ValueError(f"Unsupported export format: {format}. Supported formats: {self.get_supported_formats()}")
\ No newline at end of file
+            raise ValueError(f"Unsupported export format: {format}. Supported formats: {self.get_supported_formats()}")
+
+
+def render_comparison_pdf(report_data: Dict[str, Any]) -> bytes:
+    """Render pool entry point for comparison PDFs"""
+    return ExportService()._render_pdf(report_data)
+
+
+def render_comparison_word(report_data: Dict[str, Any]) -> bytes:
+    """Render pool entry point for comparison Word documents"""
+    return ExportService()._render_word(report_data)
@@ -3,11 +3,15 @@ Feedback Collection Service for Expert Review Quality Rating
 Allows users to rate and provide feedback on expert review quality
 """
 
+import os
 import logging
-from datetime import datetime, timedelta
-from typing import Dict, Any, Optional, List
-from sqlalchemy import Column, Integer, String, Float, DateTime, Text, ForeignKey, Boolean
+from datetime import datetime, timedelta, date
+from typing import Dict, Any, Optional, List, Tuple
+from sqlalchemy import Column, Integer, String, Float, DateTime, Date, Text, ForeignKey, Boolean, Index, case, func
 from sqlalchemy.ext.declarative import declarative_base
+from sqlalchemy.dialects.postgresql import insert as postgresql_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import Session, relationship
 
 from models.expert_queue_models import Base, ExpertReviewItem
@@ -35,6 +39,58 @@ class ReviewFeedback(Base):
     
     # Relationship
     review = relationship("ExpertReviewItem", back_populates="feedback")
+    
+    __table_args__ = (
+        # Covers the 30-day window aggregates without touching the table
+        Index('idx_review_feedback_created_rating', 'created_at', 'overall_rating'),
+    )
+
+
+class FeedbackRollup(Base):
+    """
+    Incrementally maintained feedback aggregates, one row per scope and day.
+    Scope is 'all' or 'expert:<expert_id>'; statistics read these rows instead of
+    scanning review_feedback, so their cost does not grow with feedback volume.
+    """
+    __tablename__ = "feedback_rollups"
+    
+    scope = Column(String(120), primary_key=True)
+    day = Column(Date, primary_key=True)
+    feedback_count = Column(Integer, nullable=False, default=0)
+    overall_sum = Column(Integer, nullable=False, default=0)
+    accuracy_sum = Column(Integer, nullable=False, default=0)
+    accuracy_count = Column(Integer, nullable=False, default=0)
+    clarity_sum = Column(Integer, nullable=False, default=0)
+    clarity_count = Column(Integer, nullable=False, default=0)
+    timeliness_sum = Column(Integer, nullable=False, default=0)
+    timeliness_count = Column(Integer, nullable=False, default=0)
+    usefulness_sum = Column(Integer, nullable=False, default=0)
+    usefulness_count = Column(Integer, nullable=False, default=0)
+    recommend_count = Column(Integer, nullable=False, default=0)
+    recommend_total = Column(Integer, nullable=False, default=0)
+    rating_1 = Column(Integer, nullable=False, default=0)
+    rating_2 = Column(Integer, nullable=False, default=0)
+    rating_3 = Column(Integer, nullable=False, default=0)
+    rating_4 = Column(Integer, nullable=False, default=0)
+    rating_5 = Column(Integer, nullable=False, default=0)
+
+
+# Optional ratings aggregated alongside overall_rating
+RATING_FIELDS = ('accuracy', 'clarity', 'timeliness', 'usefulness')
+
+ROLLUP_COLUMNS = (
+    ['feedback_count', 'overall_sum']
+    + [f'{name}_{kind}' for name in RATING_FIELDS for kind in ('sum', 'count')]
+    + ['recommend_count', 'recommend_total']
+    + [f'rating_{n}' for n in range(1, 6)]
+)
+
+# Expert feedback statistics join on review_id filtered by expert
+EXPERT_REVIEW_INDEX = Index(
+    'idx_expert_review_items_expert_review',
+    ExpertReviewItem.assigned_expert_id,
+    ExpertReviewItem.review_id
+)
 
 
 # Add feedback relationship to ExpertReviewItem
@@ -46,8 +102,32 @@ class FeedbackService:
     
     def __init__(self):
         self.queue_service = ExpertQueueService()
+        self.use_rollups = os.getenv('FEEDBACK_ROLLUPS', 'false').lower() == 'true'
+        self._ensure_indexes()
+        if self.use_rollups:
+            self._ensure_rollups()
         logger.info("Feedback Service initialized")
     
+    def _ensure_indexes(self):
+        """Create statistics indexes missing from databases created before they existed"""
+        try:
+            for index in [*ReviewFeedback.__table__.indexes, EXPERT_REVIEW_INDEX]:
+                index.create(bind=self.queue_service.engine, checkfirst=True)
+        except Exception as e:
+            logger.warning(f"Could not create feedback statistics indexes: {e}")
+    
+    def _ensure_rollups(self):
+        """Build rollup rows once if feedback predates them"""
+        try:
+            with self.queue_service.get_db() as session:
+                has_rollups = session.query(FeedbackRollup.scope).first() is not None
+                has_feedback = session.query(ReviewFeedback.id).first() is not None
+            if has_feedback and not has_rollups:
+                self.rebuild_rollups()
+        except Exception as e:
+            logger.error(f"Failed to initialize feedback rollups, using live aggregates: {e}")
+            self.use_rollups = False
+    
     def submit_feedback(
         self,
         review_id: str,
@@ -97,6 +177,8 @@ class FeedbackService:
                 ).first()
                 
                 if existing_feedback:
+                    rollup_deltas = self._rollup_deltas(existing_feedback, review.assigned_expert_id, -1)
+                    
                     # Update existing feedback
                     existing_feedback.overall_rating = overall_rating
                     existing_feedback.accuracy_rating = accuracy_rating
@@ -107,6 +189,9 @@ class FeedbackService:
                     existing_feedback.would_recommend = would_recommend
                     existing_feedback.updated_at = datetime.utcnow()
                     
+                    if self.use_rollups:
+                        self._merge_deltas(rollup_deltas, self._rollup_deltas(existing_feedback, review.assigned_expert_id, 1))
+                        self._apply_rollup_deltas(session, rollup_deltas)
                     session.commit()
                     
                     logger.info(f"Feedback updated for review {review_id}")
@@ -130,6 +215,8 @@ class FeedbackService:
                     )
                     
                     session.add(feedback)
+                    if self.use_rollups:
+                        self._apply_rollup_deltas(session, self._rollup_deltas(feedback, review.assigned_expert_id, 1))
                     session.commit()
                     
                     logger.info(f"New feedback submitted for review {review_id}")
@@ -176,19 +263,78 @@ class FeedbackService:
             logger.error(f"Failed to get feedback for review {review_id}: {e}")
             return None
     
+    @staticmethod
+    def _aggregate_columns(since: Optional[datetime] = None) -> List:
+        """SQL aggregates matching ROLLUP_COLUMNS (plus the recent window when since is given)"""
+        columns = [
+            func.count(ReviewFeedback.id).label('feedback_count'),
+            func.sum(ReviewFeedback.overall_rating).label('overall_sum')
+        ]
+        for name in RATING_FIELDS:
+            rating = getattr(ReviewFeedback, f'{name}_rating')
+            columns.append(func.sum(rating).label(f'{name}_sum'))
+            columns.append(func.count(rating).label(f'{name}_count'))
+        columns.append(func.sum(case((ReviewFeedback.would_recommend.is_(True), 1), else_=0)).label('recommend_count'))
+        columns.append(func.count(ReviewFeedback.would_recommend).label('recommend_total'))
+        for n in range(1, 6):
+            columns.append(func.sum(case((ReviewFeedback.overall_rating == n, 1), else_=0)).label(f'rating_{n}'))
+        if since is not None:
+            recent = ReviewFeedback.created_at >= since
+            columns.append(func.sum(case((recent, 1), else_=0)).label('recent_count'))
+            columns.append(func.sum(case((recent, ReviewFeedback.overall_rating), else_=0)).label('recent_sum'))
+        return columns
+    
+    def _feedback_totals(self, session: Session, expert_id: Optional[str] = None,
+                         since: Optional[datetime] = None) -> Dict[str, int]:
+        """Aggregate totals for all feedback or one expert, from rollups when enabled"""
+        if self.use_rollups:
+            scope = f"expert:{expert_id}" if expert_id else "all"
+            row = session.query(
+                *[func.sum(getattr(FeedbackRollup, column)).label(column) for column in ROLLUP_COLUMNS]
+            ).filter(FeedbackRollup.scope == scope).one()
+            totals = {column: int(getattr(row, column) or 0) for column in ROLLUP_COLUMNS}
+            if since is not None:
+                # Whole days after since come from rollups, the partial boundary day from the rows
+                recent = session.query(
+                    func.sum(FeedbackRollup.feedback_count),
+                    func.sum(FeedbackRollup.overall_sum)
+                ).filter(FeedbackRollup.scope == scope, FeedbackRollup.day > since.date()).one()
+                next_day = datetime.combine(since.date() + timedelta(days=1), datetime.min.time())
+                boundary = session.query(
+                    func.count(ReviewFeedback.id),
+                    func.sum(ReviewFeedback.overall_rating)
+                ).filter(ReviewFeedback.created_at >= since, ReviewFeedback.created_at < next_day)
+                if expert_id:
+                    boundary = boundary.join(
+                        ExpertReviewItem,
+                        ReviewFeedback.review_id == ExpertReviewItem.review_id
+                    ).filter(ExpertReviewItem.assigned_expert_id == expert_id)
+                boundary = boundary.one()
+                totals['recent_count'] = int(recent[0] or 0) + int(boundary[0] or 0)
+                totals['recent_sum'] = int(recent[1] or 0) + int(boundary[1] or 0)
+            return totals
+        
+        query = session.query(*self._aggregate_columns(since))
+        if expert_id:
+            query = query.join(
+                ExpertReviewItem,
+                ReviewFeedback.review_id == ExpertReviewItem.review_id
+            ).filter(ExpertReviewItem.assigned_expert_id == expert_id)
+        row = query.one()
+        return {key: int(value or 0) for key, value in row._mapping.items()}
+    
+    @staticmethod
+    def _average(total: int, count: int) -> float:
+        return total / count if count else 0.0
+    
     def get_expert_feedback_summary(self, expert_id: str) -> Dict[str, Any]:
         """Get feedback summary for a specific expert"""
         try:
             with self.queue_service.get_db() as session:
-                # Get all feedback for reviews completed by this expert
-                feedbacks = session.query(ReviewFeedback).join(
-                    ExpertReviewItem,
-                    ReviewFeedback.review_id == ExpertReviewItem.review_id
-                ).filter(
-                    ExpertReviewItem.assigned_expert_id == expert_id
-                ).all()
+                # Aggregate feedback for reviews completed by this expert
+                totals = self._feedback_totals(session, expert_id=expert_id)
                 
-                if not feedbacks:
+                if not totals['feedback_count']:
                     return {
                         'expert_id': expert_id,
                         'total_reviews': 0,
@@ -201,34 +347,16 @@ class FeedbackService:
                         'rating_distribution': {1: 0, 2: 0, 3: 0, 4: 0, 5: 0}
                     }
                 
-                # Calculate averages
-                total_reviews = len(feedbacks)
-                overall_ratings = [f.overall_rating for f in feedbacks]
-                accuracy_ratings = [f.accuracy_rating for f in feedbacks if f.accuracy_rating is not None]
-                clarity_ratings = [f.clarity_rating for f in feedbacks if f.clarity_rating is not None]
-                timeliness_ratings = [f.timeliness_rating for f in feedbacks if f.timeliness_rating is not None]
-                usefulness_ratings = [f.usefulness_rating for f in feedbacks if f.usefulness_rating is not None]
-                
-                # Rating distribution
-                rating_distribution = {1: 0, 2: 0, 3: 0, 4: 0, 5: 0}
-                for rating in overall_ratings:
-                    rating_distribution[rating] += 1
-                
-                # Recommendation rate
-                recommendations = [f.would_recommend for f in feedbacks if f.would_recommend is not None]
-                recommendation_rate = (sum(recommendations) / len(recommendations) * 100) if recommendations else 0.0
-                
-                return {
+                summary = {
                     'expert_id': expert_id,
-                    'total_reviews': total_reviews,
-                    'average_overall_rating': sum(overall_ratings) / len(overall_ratings),
-                    'average_accuracy_rating': sum(accuracy_ratings) / len(accuracy_ratings) if accuracy_ratings else 0.0,
-                    'average_clarity_rating': sum(clarity_ratings) / len(clarity_ratings) if clarity_ratings else 0.0,
-                    'average_timeliness_rating': sum(timeliness_ratings) / len(timeliness_ratings) if timeliness_ratings else 0.0,
-                    'average_usefulness_rating': sum(usefulness_ratings) / len(usefulness_ratings) if usefulness_ratings else 0.0,
-                    'recommendation_rate': recommendation_rate,
-                    'rating_distribution': rating_distribution
+                    'total_reviews': totals['feedback_count'],
+                    'average_overall_rating': self._average(totals['overall_sum'], totals['feedback_count'])
                 }
+                for name in RATING_FIELDS:
+                    summary[f'average_{name}_rating'] = self._average(totals[f'{name}_sum'], totals[f'{name}_count'])
+                summary['recommendation_rate'] = self._average(totals['recommend_count'], totals['recommend_total']) * 100
+                summary['rating_distribution'] = {n: totals[f'rating_{n}'] for n in range(1, 6)}
+                return summary
                 
         except Exception as e:
             logger.error(f"Failed to get expert feedback summary for {expert_id}: {e}")
@@ -243,9 +371,11 @@ class FeedbackService:
         """Get overall feedback statistics across all reviews"""
         try:
             with self.queue_service.get_db() as session:
-                feedbacks = session.query(ReviewFeedback).all()
+                # Recent feedback (last 30 days)
+                thirty_days_ago = datetime.utcnow() - timedelta(days=30)
+                totals = self._feedback_totals(session, since=thirty_days_ago)
                 
-                if not feedbacks:
+                if not totals['feedback_count']:
                     return {
                         'total_feedback_count': 0,
                         'average_overall_rating': 0.0,
@@ -253,27 +383,13 @@ class FeedbackService:
                         'rating_distribution': {1: 0, 2: 0, 3: 0, 4: 0, 5: 0}
                     }
                 
-                # Calculate statistics
-                total_count = len(feedbacks)
-                overall_ratings = [f.overall_rating for f in feedbacks]
-                recommendations = [f.would_recommend for f in feedbacks if f.would_recommend is not None]
-                
-                # Rating distribution
-                rating_distribution = {1: 0, 2: 0, 3: 0, 4: 0, 5: 0}
-                for rating in overall_ratings:
-                    rating_distribution[rating] += 1
-                
-                # Recent feedback (last 30 days)
-                thirty_days_ago = datetime.utcnow() - timedelta(days=30)
-                recent_feedbacks = [f for f in feedbacks if f.created_at >= thirty_days_ago]
-                
                 return {
-                    'total_feedback_count': total_count,
-                    'average_overall_rating': sum(overall_ratings) / len(overall_ratings),
-                    'recommendation_rate': (sum(recommendations) / len(recommendations) * 100) if recommendations else 0.0,
-                    'rating_distribution': rating_distribution,
-                    'recent_feedback_count': len(recent_feedbacks),
-                    'recent_average_rating': sum([f.overall_rating for f in recent_feedbacks]) / len(recent_feedbacks) if recent_feedbacks else 0.0
+                    'total_feedback_count': totals['feedback_count'],
+                    'average_overall_rating': self._average(totals['overall_sum'], totals['feedback_count']),
+                    'recommendation_rate': self._average(totals['recommend_count'], totals['recommend_total']) * 100,
+                    'rating_distribution': {n: totals[f'rating_{n}'] for n in range(1, 6)},
+                    'recent_feedback_count': totals['recent_count'],
+                    'recent_average_rating': self._average(totals['recent_sum'], totals['recent_count'])
                 }
                 
         except Exception as e:
@@ -284,6 +400,119 @@ class FeedbackService:
                 'error': str(e)
             }
     
+    @staticmethod
+    def _rollup_deltas(feedback: ReviewFeedback, expert_id: Optional[str], sign: int) -> Dict[Tuple[str, date], Dict[str, int]]:
+        """Rollup column changes from adding (sign 1) or removing (sign -1) one feedback row"""
+        values = {
+            'feedback_count': 1,
+            'overall_sum': feedback.overall_rating,
+            'recommend_count': 1 if feedback.would_recommend else 0,
+            'recommend_total': 0 if feedback.would_recommend is None else 1,
+            f'rating_{feedback.overall_rating}': 1
+        }
+        for name in RATING_FIELDS:
+            rating = getattr(feedback, f'{name}_rating')
+            if rating is not None:
+                values[f'{name}_sum'] = rating
+                values[f'{name}_count'] = 1
+        
+        day = (feedback.created_at or datetime.utcnow()).date()
+        scopes = ['all'] + ([f"expert:{expert_id}"] if expert_id else [])
+        return {(scope, day): {column: sign * value for column, value in values.items()} for scope in scopes}
+    
+    @staticmethod
+    def _merge_deltas(target: Dict[Tuple[str, date], Dict[str, int]], other: Dict[Tuple[str, date], Dict[str, int]]):
+        for key, values in other.items():
+            row = target.setdefault(key, {})
+            for column, value in values.items():
+                row[column] = row.get(column, 0) + value
+    
+    @staticmethod
+    def _apply_rollup_deltas(session: Session, deltas: Dict[Tuple[str, date], Dict[str, int]]):
+        """
+        Add deltas to rollup rows in the caller's transaction (atomic column increments)
+        
+        Concurrent first submissions for a day race to create its row, so on SQLite and
+        PostgreSQL the row is upserted; elsewhere a losing insert falls back to the update.
+        """
+        dialect = session.get_bind().dialect.name
+        upsert = {'sqlite': sqlite_insert, 'postgresql': postgresql_insert}.get(dialect)
+        
+        for (scope, day), values in deltas.items():
+            values = {column: value for column, value in values.items() if value}
+            if not values:
+                continue
+            
+            if upsert is not None:
+                statement = upsert(FeedbackRollup).values(
+                    scope=scope, day=day,
+                    **{column: values.get(column, 0) for column in ROLLUP_COLUMNS}
+                )
+                session.execute(statement.on_conflict_do_update(
+                    index_elements=['scope', 'day'],
+                    set_={column: getattr(FeedbackRollup, column) + statement.excluded[column]
+                          for column in values}
+                ))
+                continue
+            
+            def increment() -> int:
+                return session.query(FeedbackRollup).filter(
+                    FeedbackRollup.scope == scope,
+                    FeedbackRollup.day == day
+                ).update(
+                    {getattr(FeedbackRollup, column): getattr(FeedbackRollup, column) + value
+                     for column, value in values.items()},
+                    synchronize_session=False
+                )
+            
+            if increment():
+                continue
+            try:
+                with session.begin_nested():
+                    session.add(FeedbackRollup(
+                        scope=scope, day=day,
+                        **{column: values.get(column, 0) for column in ROLLUP_COLUMNS}
+                    ))
+            except IntegrityError:
+                # Another request created the row first
+                increment()
+    
+    def rebuild_rollups(self) -> Dict[str, Any]:
+        """Recompute every rollup row from review_feedback with grouped aggregates"""
+        try:
+            with self.queue_service.get_db() as session:
+                day_column = func.date(ReviewFeedback.created_at)
+                rows = session.query(
+                    day_column.label('day'),
+                    ExpertReviewItem.assigned_expert_id.label('expert_id'),
+                    *self._aggregate_columns()
+                ).outerjoin(
+                    ExpertReviewItem,
+                    ReviewFeedback.review_id == ExpertReviewItem.review_id
+                ).group_by(day_column, ExpertReviewItem.assigned_expert_id).all()
+                
+                rollups: Dict[Tuple[str, date], Dict[str, int]] = {}
+                for row in rows:
+                    day = row.day if isinstance(row.day, date) else date.fromisoformat(str(row.day))
+                    values = {column: int(getattr(row, column) or 0) for column in ROLLUP_COLUMNS}
+                    scopes = ['all'] + ([f"expert:{row.expert_id}"] if row.expert_id else [])
+                    for scope in scopes:
+                        self._merge_deltas(rollups, {(scope, day): values})
+                
+                session.query(FeedbackRollup).delete(synchronize_session=False)
+                session.add_all([
+                    FeedbackRollup(scope=scope, day=day, **values)
+                    for (scope, day), values in rollups.items()
+                ])
+                session.commit()
+            
+            logger.info(f"Rebuilt {len(rollups)} feedback rollup rows")
+            return {'success': True, 'rollup_rows': len(rollups)}
+            
+        except Exception as e:
+            logger.error(f"Failed to rebuild feedback rollups: {e}")
+            return {'success': False, 'error': str(e)}
+    
     def get_feedback_comments(self, limit: int = 50, min_rating: Optional[int] = None) -> List[Dict[str, Any]]:
         """Get recent feedback comments for analysis"""
         try:
@@ -6,10 +6,8 @@ Enhanced with dual vision service for optimal document processing
 import logging
 from typing import Dict, Any, Optional
 from dataclasses import dataclass
-import PyPDF2
-from io import BytesIO
-
 from services.dual_vision_service import dual_vision_service
+from services.pdf_text_extraction import extract_pdf_pages
 
 logger = logging.getLogger(__name__)
 
@@ -253,14 +251,7 @@ class FileService:
     def _extract_pdf_text(self, file_content: bytes) -> str:
         """Extract text from PDF file"""
         try:
-            pdf_file = BytesIO(file_content)
-            pdf_reader = PyPDF2.PdfReader(pdf_file)
-            
-            text_content = ""
-            for page in pdf_reader.pages:
-                text_content += page.extract_text() + "\n"
-            
-            return text_content.strip()
+            return extract_pdf_pages(file_content).text
             
         except Exception as e:
             logger.error(f"PDF text extraction failed: {e}")
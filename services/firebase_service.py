@@ -4,8 +4,12 @@ Firebase Admin SDK service for backend authentication
 
 import os
 import json
+import time
+import asyncio
+import hashlib
 import logging
-from typing import Optional, Dict, Any
+from collections import OrderedDict
+from typing import Optional, Dict, Any, Set
 from datetime import datetime
 import firebase_admin
 from firebase_admin import credentials, auth
@@ -14,12 +18,117 @@ from models.auth_models import User
 logger = logging.getLogger(__name__)
 
 
+class VerifiedTokenCache:
+    """
+    LRU cache of verified ID token claims keyed by token hash.
+    Entries expire with the token's own `exp` claim, so a cached token is
+    never accepted for longer than Firebase itself would accept it.
+    """
+    
+    def __init__(self, max_entries: int = 10000, max_ttl_seconds: int = 3600):
+        self.max_entries = max_entries
+        self.max_ttl_seconds = max_ttl_seconds
+        self._entries: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()  # token hash -> {'claims', 'expires_at'}
+        self._keys_by_uid: Dict[str, Set[str]] = {}
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+    
+    @staticmethod
+    def _hash_token(token: str) -> str:
+        return hashlib.sha256(token.encode('utf-8')).hexdigest()
+    
+    def get(self, token: str) -> Optional[Dict[str, Any]]:
+        """Return cached claims for a token if present and unexpired"""
+        key = self._hash_token(token)
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+        
+        if time.time() >= entry['expires_at']:
+            self._remove(key)
+            self.misses += 1
+            return None
+        
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return entry['claims']
+    
+    def set(self, token: str, claims: Dict[str, Any]):
+        """Cache verified claims until the token expires"""
+        now = time.time()
+        expires_at = min(claims.get('exp', now), now + self.max_ttl_seconds)
+        if expires_at <= now:
+            return
+        
+        key = self._hash_token(token)
+        if key in self._entries:
+            self._remove(key)
+        
+        self._entries[key] = {'claims': claims, 'expires_at': expires_at}
+        uid = claims.get('uid')
+        if uid:
+            self._keys_by_uid.setdefault(uid, set()).add(key)
+        
+        while len(self._entries) > self.max_entries:
+            oldest_key = next(iter(self._entries))
+            self._remove(oldest_key)
+            self.evictions += 1
+    
+    def revoke_token(self, token: str):
+        """Drop a single token from the cache"""
+        self._remove(self._hash_token(token))
+    
+    def revoke_user(self, uid: str) -> int:
+        """Drop every cached token belonging to a user; returns how many were removed"""
+        keys = self._keys_by_uid.pop(uid, set())
+        for key in keys:
+            self._entries.pop(key, None)
+        if keys:
+            logger.info(f"Revoked {len(keys)} cached token(s) for user: {uid}")
+        return len(keys)
+    
+    def clear(self):
+        """Drop all cached tokens"""
+        self._entries.clear()
+        self._keys_by_uid.clear()
+    
+    def _remove(self, key: str):
+        entry = self._entries.pop(key, None)
+        if entry is None:
+            return
+        uid = entry['claims'].get('uid')
+        uid_keys = self._keys_by_uid.get(uid)
+        if uid_keys is not None:
+            uid_keys.discard(key)
+            if not uid_keys:
+                del self._keys_by_uid[uid]
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """Get cache statistics"""
+        total = self.hits + self.misses
+        return {
+            'entries': len(self._entries),
+            'max_entries': self.max_entries,
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+            'hit_rate': self.hits / total if total else 0.0
+        }
+
+
+# Shared across FirebaseService instances so revocations are seen by every caller
+verified_token_cache = VerifiedTokenCache()
+
+
 class FirebaseService:
     """Firebase Admin SDK service for user authentication and management"""
     
     def __init__(self):
         """Initialize Firebase Admin SDK"""
         self._firebase_available = False
+        self.token_cache = verified_token_cache
         self._initialize_firebase()
     
     def _initialize_firebase(self):
@@ -97,19 +206,16 @@ class FirebaseService:
             return {'success': False, 'error': 'Firebase authentication not configured'}
             
         try:
-            # Verify the ID token
-            decoded_token = auth.verify_id_token(token)
+            # Serve previously verified tokens from cache; verify the rest off the event loop
+            decoded_token = self.token_cache.get(token)
+            if decoded_token is not None:
+                return {'success': True, 'user': self._build_user_info(decoded_token)}
+            
+            decoded_token = await asyncio.to_thread(auth.verify_id_token, token)
+            self.token_cache.set(token, decoded_token)
             
             # Extract user information
-            user_info = {
-                'uid': decoded_token['uid'],
-                'email': decoded_token.get('email', ''),
-                'email_verified': decoded_token.get('email_verified', False),
-                'display_name': decoded_token.get('name', ''),
-                'created_at': datetime.now(),
-                'last_login': datetime.now(),
-                'usage_stats': {}
-            }
+            user_info = self._build_user_info(decoded_token)
             
             logger.info(f"Token verified successfully for user: {user_info['uid']}")
             return {'success': True, 'user': user_info}
@@ -124,6 +230,45 @@ class FirebaseService:
             logger.error(f"Token verification failed: {e}")
             return {'success': False, 'error': 'Token verification failed'}
     
+    def _build_user_info(self, decoded_token: Dict[str, Any]) -> Dict[str, Any]:
+        """Build user information from decoded token claims"""
+        return {
+            'uid': decoded_token['uid'],
+            'email': decoded_token.get('email', ''),
+            'email_verified': decoded_token.get('email_verified', False),
+            'display_name': decoded_token.get('name', ''),
+            'created_at': datetime.now(),
+            'last_login': datetime.now(),
+            'usage_stats': {}
+        }
+    
+    async def revoke_user_tokens(self, uid: str) -> Dict[str, Any]:
+        """
+        Revoke a user's refresh tokens and drop their cached ID tokens
+        
+        Args:
+            uid: Firebase user UID
+            
+        Returns:
+            Dict containing success status or error
+        """
+        self.token_cache.revoke_user(uid)
+        
+        if not self._firebase_available:
+            return {'success': False, 'error': 'Firebase authentication not configured'}
+        
+        try:
+            await asyncio.to_thread(auth.revoke_refresh_tokens, uid)
+            logger.info(f"Refresh tokens revoked for user: {uid}")
+            return {'success': True}
+            
+        except auth.UserNotFoundError:
+            logger.warning(f"User not found for token revocation: {uid}")
+            return {'success': False, 'error': 'User not found'}
+        except Exception as e:
+            logger.error(f"Failed to revoke tokens for {uid}: {e}")
+            return {'success': False, 'error': 'Failed to revoke tokens'}
+    
     async def get_user_info(self, uid: str) -> Dict[str, Any]:
         """
         Get user information by UID
@@ -209,6 +354,7 @@ class FirebaseService:
         """
         try:
             auth.delete_user(uid)
+            self.token_cache.revoke_user(uid)
             logger.info(f"User deleted successfully: {uid}")
             return {'success': True}
             
@@ -233,6 +379,9 @@ class FirebaseService:
         try:
             user_record = auth.update_user(uid, **kwargs)
             
+            # Cached claims (email, name, disabled state) are stale after an update
+            self.token_cache.revoke_user(uid)
+            
             user_info = {
                 'uid': user_record.uid,
                 'email': user_record.email or '',
@@ -123,10 +123,16 @@ class GmailService:
         # Prioritize SMTP service as it's more reliable and simpler
         return (self.smtp_service and self.smtp_service.is_available()) or (self.gmail_client is not None)
     
-    def check_rate_limit(self, user_id: str) -> EmailRateLimitInfo:
+    async def check_rate_limit(self, user_id: str) -> EmailRateLimitInfo:
         """Check rate limiting for user"""
-        rate_limit_data = email_rate_limiter.check_rate_limit(user_id)
-        
+        return self._rate_limit_info(await email_rate_limiter.check_rate_limit(user_id))
+    
+    async def acquire_rate_limit(self, user_id: str) -> EmailRateLimitInfo:
+        """Use up one email from the user's budget, if any is left"""
+        return self._rate_limit_info(await email_rate_limiter.acquire(user_id))
+    
+    @staticmethod
+    def _rate_limit_info(rate_limit_data: Dict[str, Any]) -> EmailRateLimitInfo:
         return EmailRateLimitInfo(
             user_id=rate_limit_data['user_id'],
             emails_sent_today=rate_limit_data['emails_sent_today'],
@@ -137,10 +143,6 @@ class GmailService:
             is_rate_limited=rate_limit_data['is_rate_limited']
         )
     
-    def increment_rate_limit(self, user_id: str):
-        """Increment rate limit counters for user"""
-        email_rate_limiter.increment_counter(user_id)
-    
     async def send_analysis_report(
         self, 
         user_email: str, 
@@ -158,8 +160,8 @@ class GmailService:
                 delivery_status=EmailDeliveryStatus.FAILED
             )
         
-        # Check rate limits
-        rate_limit_info = self.check_rate_limit(user_id)
+        # Check rate limits (the SMTP service reserves its own slot; the Gmail API path reserves below)
+        rate_limit_info = await self.check_rate_limit(user_id)
         if rate_limit_info.is_rate_limited:
             retry_after = int((rate_limit_info.next_reset_time - datetime.now()).total_seconds())
             return EmailSendResponse(
@@ -181,8 +183,6 @@ class GmailService:
                 )
                 
                 if response.success:
-                    # Increment rate limit counters
-                    self.increment_rate_limit(user_id)
                     logger.info(f"Analysis report sent successfully via SMTP to {user_email}")
                 
                 return response
@@ -212,11 +212,16 @@ class GmailService:
                     priority=EmailPriority.NORMAL
                 )
                 
+                if (await self.acquire_rate_limit(user_id)).is_rate_limited:
+                    return EmailSendResponse(
+                        success=False,
+                        error="Rate limit exceeded. Please try again later.",
+                        delivery_status=EmailDeliveryStatus.FAILED
+                    )
+                
                 response = await self._send_email(email_request)
                 
                 if response.success:
-                    # Increment rate limit counters
-                    self.increment_rate_limit(user_id)
                     logger.info(f"Analysis report sent successfully via Gmail API to {user_email}")
                 
                 return response
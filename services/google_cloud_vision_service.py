@@ -7,14 +7,23 @@ import os
 import json
 import time
 import hashlib
+import asyncio
 from typing import Dict, List, Any, Optional, Tuple
 from google.cloud import vision
 from google.api_core.client_options import ClientOptions
-from PIL import Image, ImageEnhance, ImageFilter
+from PIL import Image
 import io
 import logging
 from datetime import datetime, timedelta
 
+from middleware.rate_limit_engine import RateLimitEngine, rate_limit_engine
+from services.worker_pool import run_in_process_pool
+from services.image_preprocessing import (
+    preprocess_legal_document_image,
+    preprocess_with_timings,
+    detect_and_correct_rotation
+)
+
 logger = logging.getLogger(__name__)
 
 class GoogleCloudVisionService:
@@ -39,6 +48,12 @@ class GoogleCloudVisionService:
         self.cost_monitor = VisionAPICostMonitor()
         self.response_cache = VisionAPICache()
         
+        # Multi-image OCR pipeline settings
+        self.max_preprocess_workers = 4
+        self.max_concurrent_batches = 4
+        self.batch_annotate_max_images = 16  # Vision API batch limit
+        self.batch_annotate_max_bytes = 8 * 1024 * 1024  # Stay under the 10MB request limit
+        
         if not self.project_id:
             logger.warning("Google Cloud Vision API not configured - missing project ID")
             self.enabled = False
@@ -88,10 +103,6 @@ class GoogleCloudVisionService:
             return self._fallback_image_processing(image_content)
         
         try:
-            # Check rate limits
-            if not self.rate_limiter.check_rate_limit(user_id):
-                raise Exception("Rate limit exceeded for Vision API (max 100 requests per user per day)")
-            
             # Check cost limits
             if not self.cost_monitor.check_cost_limit(user_id):
                 raise Exception("Daily cost limit exceeded for Vision API")
@@ -108,9 +119,14 @@ class GoogleCloudVisionService:
                 logger.info("Returning cached Vision API result")
                 return cached_result
             
+            # Take a request from the user's daily budget (cached results are free)
+            if not await self.rate_limiter.acquire(user_id):
+                raise Exception("Rate limit exceeded for Vision API (max 100 requests per user per day)")
+            
             # Preprocess image for legal document optimization
+            preprocessing_timings = {}
             if preprocess:
-                processed_image = self._preprocess_legal_document_image(image_content)
+                processed_image, preprocessing_timings = await self._run_preprocess(image_content)
             else:
                 processed_image = image_content
             
@@ -126,7 +142,7 @@ class GoogleCloudVisionService:
             ]
             
             request = vision.AnnotateImageRequest(image=image, features=features)
-            response = self.client.annotate_image(request=request)
+            response = await asyncio.to_thread(self.client.annotate_image, request=request)
             
             # Check for errors
             if response.error.message:
@@ -134,9 +150,9 @@ class GoogleCloudVisionService:
             
             # Extract and process results
             extracted_data = self._process_vision_response(response)
+            self._attach_preprocessing_timings(extracted_data, preprocess, preprocessing_timings)
             
-            # Update rate limiting and cost monitoring
-            self.rate_limiter.record_request(user_id)
+            # Update cost monitoring (the rate limit was taken before the call)
             self.cost_monitor.record_request(user_id)
             
             # Cache the result
@@ -150,6 +166,148 @@ class GoogleCloudVisionService:
             logger.info("Falling back to basic image processing")
             return self._fallback_image_processing(image_content)
     
+    async def detect_text_in_images(
+        self,
+        images: List[Tuple[bytes, str]],
+        user_id: str,
+        preprocess: bool = True
+    ) -> List[Dict[str, Any]]:
+        """
+        Detect text in several images as one pipeline, preserving input order
+        
+        Preprocessing runs concurrently in worker processes and the Vision calls are
+        grouped into batch annotate requests dispatched with bounded concurrency, so
+        a multi-page scan costs roughly one OCR round-trip instead of one per page.
+        
+        Args:
+            images: List of (raw image bytes, image format) tuples in page order
+            user_id: User ID for rate limiting
+            preprocess: Whether to apply image preprocessing for legal documents
+            
+        Returns:
+            List of results in the same order and shape as detect_text_in_image
+        """
+        if not self.enabled:
+            logger.info("Vision API not available, using fallback processing")
+            return [self._fallback_image_processing(content) for content, _ in images]
+        
+        results: List[Optional[Dict[str, Any]]] = [None] * len(images)
+        pending: List[Tuple[int, str]] = []  # (page index, cache key)
+        
+        for index, (image_content, image_format) in enumerate(images):
+            try:
+                if not self.cost_monitor.check_cost_limit(user_id):
+                    raise Exception("Daily cost limit exceeded for Vision API")
+                
+                validation_result = self._validate_image(image_content, image_format)
+                if not validation_result['valid']:
+                    raise Exception(validation_result['error'])
+                
+                cache_key = self._generate_cache_key(image_content, preprocess)
+                cached_result = self.response_cache.get(cache_key)
+                if cached_result:
+                    logger.info(f"Returning cached Vision API result for page {index + 1}")
+                    results[index] = cached_result
+                    continue
+                
+                if not await self.rate_limiter.acquire(user_id):
+                    raise Exception("Rate limit exceeded for Vision API (max 100 requests per user per day)")
+                
+                pending.append((index, cache_key))
+                
+            except Exception as e:
+                logger.error(f"Vision API processing failed for page {index + 1}: {e}")
+                results[index] = self._fallback_image_processing(image_content)
+        
+        if pending:
+            # Preprocess all pending pages concurrently
+            if preprocess:
+                preprocessed = await asyncio.gather(
+                    *[self._run_preprocess(images[index][0]) for index, _ in pending]
+                )
+            else:
+                preprocessed = [(images[index][0], {}) for index, _ in pending]
+            
+            batches = self._build_annotate_batches(list(zip(pending, preprocessed)))
+            semaphore = asyncio.Semaphore(self.max_concurrent_batches)
+            
+            async def run_batch(batch):
+                async with semaphore:
+                    return await self._annotate_batch(batch, user_id)
+            
+            logger.info(f"Processing {len(pending)} images with Vision API in {len(batches)} batch request(s)")
+            batch_results = await asyncio.gather(*[run_batch(batch) for batch in batches])
+            
+            for batch_result in batch_results:
+                for index, extracted_data in batch_result:
+                    results[index] = extracted_data
+        
+        return results
+    
+    def _build_annotate_batches(self, items: List[Tuple[Tuple[int, str], Tuple[bytes, Dict[str, float]]]]) -> List[list]:
+        """Group processed images into batch annotate requests within the API count and size limits"""
+        batches = []
+        current_batch = []
+        current_size = 0
+        
+        for item in items:
+            image_size = len(item[1][0])
+            if current_batch and (
+                len(current_batch) >= self.batch_annotate_max_images
+                or current_size + image_size > self.batch_annotate_max_bytes
+            ):
+                batches.append(current_batch)
+                current_batch = []
+                current_size = 0
+            current_batch.append(item)
+            current_size += image_size
+        
+        if current_batch:
+            batches.append(current_batch)
+        
+        return batches
+    
+    async def _annotate_batch(
+        self,
+        batch: List[Tuple[Tuple[int, str], Tuple[bytes, Dict[str, float]]]],
+        user_id: str
+    ) -> List[Tuple[int, Dict[str, Any]]]:
+        """Send one batch annotate request and map each response back to its page index"""
+        features = [
+            vision.Feature(type_=vision.Feature.Type.DOCUMENT_TEXT_DETECTION),
+            vision.Feature(type_=vision.Feature.Type.TEXT_DETECTION)
+        ]
+        requests = [
+            vision.AnnotateImageRequest(image=vision.Image(content=processed_image), features=features)
+            for _, (processed_image, _) in batch
+        ]
+        
+        try:
+            batch_response = await asyncio.to_thread(self.client.batch_annotate_images, requests=requests)
+            responses = list(batch_response.responses)
+        except Exception as e:
+            logger.error(f"Vision API batch request failed: {e}")
+            logger.info("Falling back to basic image processing")
+            return [(index, self._fallback_image_processing(processed_image)) for (index, _), (processed_image, _) in batch]
+        
+        results = []
+        for ((index, cache_key), (processed_image, timings)), response in zip(batch, responses):
+            if response.error.message:
+                logger.error(f"Vision API error for page {index + 1}: {response.error.message}")
+                results.append((index, self._fallback_image_processing(processed_image)))
+                continue
+            
+            extracted_data = self._process_vision_response(response)
+            self._attach_preprocessing_timings(extracted_data, bool(timings), timings)
+            
+            # Update cost monitoring (the rate limit was taken before the call)
+            self.cost_monitor.record_request(user_id)
+            
+            self.response_cache.set(cache_key, extracted_data)
+            results.append((index, extracted_data))
+        
+        return results
+    
     def _validate_image(self, image_content: bytes, image_format: str) -> Dict[str, Any]:
         """Validate image format, size, and resolution"""
         try:
@@ -204,55 +362,27 @@ class GoogleCloudVisionService:
         Preprocess image for optimal legal document text extraction
         Applies contrast enhancement, rotation detection, and noise reduction
         """
-        try:
-            # Open image
-            image = Image.open(io.BytesIO(image_content))
-            
-            # Convert to RGB if necessary
-            if image.mode != 'RGB':
-                image = image.convert('RGB')
-            
-            # Apply legal document optimizations
-            
-            # 1. Contrast enhancement for better text visibility
-            enhancer = ImageEnhance.Contrast(image)
-            image = enhancer.enhance(1.2)  # Increase contrast by 20%
-            
-            # 2. Sharpness enhancement for clearer text
-            enhancer = ImageEnhance.Sharpness(image)
-            image = enhancer.enhance(1.1)  # Increase sharpness by 10%
-            
-            # 3. Noise reduction using median filter
-            image = image.filter(ImageFilter.MedianFilter(size=3))
-            
-            # 4. Auto-rotation detection (basic implementation)
-            # This is a simplified version - in production, you might want more sophisticated rotation detection
-            image = self._detect_and_correct_rotation(image)
-            
-            # Convert back to bytes
-            output_buffer = io.BytesIO()
-            image.save(output_buffer, format='JPEG', quality=95, optimize=True)
-            processed_content = output_buffer.getvalue()
-            
-            logger.info(f"Image preprocessing completed - original: {len(image_content)} bytes, processed: {len(processed_content)} bytes")
-            return processed_content
-            
-        except Exception as e:
-            logger.warning(f"Image preprocessing failed: {e}, using original image")
-            return image_content
+        return preprocess_legal_document_image(image_content)
     
     def _detect_and_correct_rotation(self, image: Image.Image) -> Image.Image:
-        """
-        Basic rotation detection and correction for legal documents
-        This is a simplified implementation - more sophisticated methods could be used
-        """
-        try:
-            # For now, we'll skip rotation detection as it requires more complex algorithms
-            # In a production environment, you might use libraries like OpenCV for better rotation detection
-            return image
-        except Exception as e:
-            logger.warning(f"Rotation detection failed: {e}")
-            return image
+        """Basic rotation detection and correction for legal documents"""
+        return detect_and_correct_rotation(image)
+    
+    def _attach_preprocessing_timings(self, extracted_data: Dict[str, Any], preprocess: bool, timings: Dict[str, float]):
+        """Record whether preprocessing ran and its per-stage timings in the processing metadata"""
+        metadata = extracted_data.get('processing_metadata')
+        if metadata is None:
+            return
+        metadata['image_preprocessing_applied'] = preprocess
+        if timings:
+            metadata['preprocessing_timings_ms'] = timings
+    
+    async def _run_preprocess(self, image_content: bytes) -> Tuple[bytes, Dict[str, float]]:
+        """Run image preprocessing off the event loop, in a worker process when possible"""
+        return await run_in_process_pool(
+            'image_preprocessing', preprocess_with_timings, image_content,
+            max_workers=self.max_preprocess_workers
+        )
     
     def _process_vision_response(self, response) -> Dict[str, Any]:
         """Process Vision API response and extract structured data"""
@@ -477,33 +607,21 @@ class GoogleCloudVisionService:
 class VisionAPIRateLimiter:
     """Rate limiter for Vision API calls (max 100 requests per user per day)"""
     
-    def __init__(self):
-        self.user_requests = {}  # user_id -> {'count': int, 'reset_time': datetime}
+    WINDOW_SECONDS = 86400
+    
+    def __init__(self, engine: Optional[RateLimitEngine] = None):
+        self.engine = engine or rate_limit_engine
         self.max_requests_per_day = 100
     
-    def check_rate_limit(self, user_id: str) -> bool:
-        """Check if user has exceeded rate limit"""
-        now = datetime.now()
-        
-        if user_id not in self.user_requests:
-            self.user_requests[user_id] = {
-                'count': 0,
-                'reset_time': now + timedelta(days=1)
-            }
-        
-        user_data = self.user_requests[user_id]
-        
-        # Reset counter if day has passed
-        if now >= user_data['reset_time']:
-            user_data['count'] = 0
-            user_data['reset_time'] = now + timedelta(days=1)
-        
-        return user_data['count'] < self.max_requests_per_day
+    async def check_rate_limit(self, user_id: str) -> bool:
+        """Check if user has exceeded rate limit, without using up a request"""
+        decision = await self.engine.peek_async(f"vision:{user_id}", self.max_requests_per_day, self.WINDOW_SECONDS)
+        return decision.allowed
     
-    def record_request(self, user_id: str):
-        """Record a request for rate limiting"""
-        if user_id in self.user_requests:
-            self.user_requests[user_id]['count'] += 1
+    async def acquire(self, user_id: str) -> bool:
+        """Atomically take one request from the user's daily budget; False when none is left"""
+        decision = await self.engine.hit_async(f"vision:{user_id}", self.max_requests_per_day, self.WINDOW_SECONDS)
+        return decision.allowed
 
 
 class VisionAPICostMonitor:
@@ -6,12 +6,22 @@ audio validation, caching, cost monitoring, and multi-language support
 
 import os
 import io
+import re
 import time
+import asyncio
 import hashlib
-from typing import Dict, List, Any, Optional, Tuple
+import threading
+from collections import OrderedDict, deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import BinaryIO, Dict, List, Any, Optional, Tuple
 from google.cloud import speech
 from google.cloud import texttospeech
 import logging
+
+from services.disk_cache import DiskLRUCache
+from services.streaming_transcription import (
+    StreamingTranscriber, GoogleStreamingRecognizer, FakeStreamingRecognizer
+)
 from datetime import datetime, timedelta
 from collections import defaultdict
 import wave
@@ -19,12 +29,70 @@ import struct
 
 logger = logging.getLogger(__name__)
 
+# Text-to-speech requests are limited to 5000 bytes of input; stay safely below it
+TTS_CHUNK_MAX_BYTES = 4500
+# A short first chunk keeps time-to-first-audio low for long read-aloud text
+TTS_FIRST_CHUNK_CHARS = 200
+
+_SENTENCE_BOUNDARY = re.compile(r'(?<=[.!?।])\s+')
+
+
+def split_text_for_speech(text: str, max_bytes: int = TTS_CHUNK_MAX_BYTES,
+                          first_chunk_chars: int = TTS_FIRST_CHUNK_CHARS) -> List[str]:
+    """
+    Split text into synthesis chunks at sentence boundaries
+    
+    Sentences are packed into chunks under max_bytes (UTF-8); the first chunk is kept
+    to about first_chunk_chars so the first audio is ready quickly. Sentences longer
+    than a chunk are split between words.
+    """
+    sentences = []
+    for sentence in _SENTENCE_BOUNDARY.split(text.strip()):
+        while len(sentence.encode('utf-8')) > max_bytes:
+            cut = sentence.encode('utf-8')[:max_bytes].decode('utf-8', 'ignore')
+            space = cut.rfind(' ')
+            cut = cut[:space] if space > 0 else cut
+            sentences.append(cut)
+            sentence = sentence[len(cut):].lstrip()
+        if sentence:
+            sentences.append(sentence)
+    
+    chunks: List[str] = []
+    current = ""
+    for sentence in sentences:
+        candidate = f"{current} {sentence}" if current else sentence
+        limit_reached = len(candidate.encode('utf-8')) > max_bytes
+        first_chunk_full = not chunks and current and len(candidate) > first_chunk_chars
+        if current and (limit_reached or first_chunk_full):
+            chunks.append(current)
+            current = sentence
+        else:
+            current = candidate
+    if current:
+        chunks.append(current)
+    return chunks
+
+
 class AudioCache:
-    """Audio caching system to reduce API calls and improve performance"""
+    """
+    Audio caching system to reduce API calls and improve performance
+    
+    Two tiers: a byte-budgeted in-memory LRU for hot clips, and a content-addressed
+    on-disk LRU (files named by the cache key hash) shared by every worker on the host,
+    whose files can be served directly with FileResponse.
+    """
     
-    def __init__(self, ttl: int = 3600):  # 1 hour TTL
-        self.cache = {}
-        self.ttl = ttl
+    def __init__(self, ttl: int = 3600, max_memory_bytes: int = 32 * 1024 * 1024,
+                 max_disk_bytes: int = 512 * 1024 * 1024):
+        self.cache: "OrderedDict[str, Tuple[bytes, float]]" = OrderedDict()  # key -> (audio, timestamp)
+        self.ttl = ttl  # Memory tier only; disk entries live until evicted by size
+        self.max_memory_bytes = max_memory_bytes
+        self.memory_bytes = 0
+        self.disk_cache = DiskLRUCache('tts_audio', max_disk_bytes, suffix='.mp3')
+        self._lock = threading.Lock()
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
     
     def _generate_key(self, text: str, language_code: str, voice_params: Dict[str, Any]) -> str:
         """Generate cache key for audio content"""
@@ -34,32 +102,85 @@ class AudioCache:
     def get(self, text: str, language_code: str, voice_params: Dict[str, Any]) -> Optional[bytes]:
         """Get cached audio content"""
         key = self._generate_key(text, language_code, voice_params)
-        if key in self.cache:
-            cached_data, timestamp = self.cache[key]
-            if time.time() - timestamp < self.ttl:
-                logger.info(f"Audio cache hit for key: {key[:8]}...")
-                return cached_data
-            else:
-                del self.cache[key]
+        with self._lock:
+            entry = self.cache.get(key)
+            if entry is not None:
+                cached_data, timestamp = entry
+                if time.time() - timestamp < self.ttl:
+                    self.cache.move_to_end(key)
+                    self.memory_hits += 1
+                    logger.info(f"Audio cache hit for key: {key[:8]}...")
+                    return cached_data
+                self._remove_locked(key)
+        
+        cached_data = self.disk_cache.get(key)
+        if cached_data is not None:
+            self.disk_hits += 1
+            logger.info(f"Audio disk cache hit for key: {key[:8]}...")
+            self._remember(key, cached_data)
+            return cached_data
+        
+        self.misses += 1
         return None
     
+    def open_file(self, text: str, language_code: str, voice_params: Dict[str, Any]) -> Optional[BinaryIO]:
+        """Open the on-disk file for cached audio, for FileResponse serving"""
+        audio_file = self.disk_cache.open(self._generate_key(text, language_code, voice_params))
+        if audio_file is not None:
+            self.disk_hits += 1
+        return audio_file
+    
     def set(self, text: str, language_code: str, voice_params: Dict[str, Any], audio_content: bytes):
         """Cache audio content"""
         key = self._generate_key(text, language_code, voice_params)
-        self.cache[key] = (audio_content, time.time())
+        self._remember(key, audio_content)
+        self.disk_cache.set(key, audio_content)
         logger.info(f"Cached audio for key: {key[:8]}...")
     
+    def _remember(self, key: str, audio_content: bytes):
+        """Add to the memory tier, evicting least recently used clips over the byte budget"""
+        if len(audio_content) > self.max_memory_bytes:
+            return
+        with self._lock:
+            self._remove_locked(key)
+            self.cache[key] = (audio_content, time.time())
+            self.memory_bytes += len(audio_content)
+            while self.memory_bytes > self.max_memory_bytes:
+                oldest_key = next(iter(self.cache))
+                self._remove_locked(oldest_key)
+    
+    def _remove_locked(self, key: str):
+        entry = self.cache.pop(key, None)
+        if entry is not None:
+            self.memory_bytes -= len(entry[0])
+    
     def clear_expired(self):
         """Clear expired cache entries"""
         current_time = time.time()
-        expired_keys = [
-            key for key, (_, timestamp) in self.cache.items()
-            if current_time - timestamp >= self.ttl
-        ]
-        for key in expired_keys:
-            del self.cache[key]
+        with self._lock:
+            expired_keys = [
+                key for key, (_, timestamp) in self.cache.items()
+                if current_time - timestamp >= self.ttl
+            ]
+            for key in expired_keys:
+                self._remove_locked(key)
         if expired_keys:
             logger.info(f"Cleared {len(expired_keys)} expired audio cache entries")
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """Get cache statistics"""
+        hits = self.memory_hits + self.disk_hits
+        total = hits + self.misses
+        return {
+            'memory_entries': len(self.cache),
+            'memory_bytes': self.memory_bytes,
+            'max_memory_bytes': self.max_memory_bytes,
+            'memory_hits': self.memory_hits,
+            'disk_hits': self.disk_hits,
+            'misses': self.misses,
+            'hit_rate': hits / total if total else 0.0,
+            'disk': self.disk_cache.get_stats()
+        }
 
 class CostMonitor:
     """Cost monitoring and daily usage limits for Google Cloud APIs"""
@@ -117,7 +238,7 @@ class EnhancedGoogleCloudSpeechService:
     audio validation, caching, cost monitoring, and rate limiting
     """
     
-    def __init__(self):
+    def __init__(self, streaming_recognizer=None):
         try:
             # Set up authentication
             credentials_path = os.getenv('GOOGLE_APPLICATION_CREDENTIALS', 'google-cloud-credentials.json')
@@ -137,6 +258,8 @@ class EnhancedGoogleCloudSpeechService:
             self.supported_formats = ['webm', 'wav', 'mp3', 'ogg']
             self.max_file_size = 10 * 1024 * 1024  # 10MB
             self.max_duration = 300  # 5 minutes
+            self.max_tts_text_length = 50000  # Longer than one API request; synthesized in chunks
+            self.max_concurrent_tts_chunks = 4
             
             # Language-specific voice mapping
             self.voice_mapping = {
@@ -160,6 +283,14 @@ class EnhancedGoogleCloudSpeechService:
             self.tts_client = None
             self.audio_cache = None
             self.cost_monitor = None
+        
+        # Streaming recognition: Google when available, or the local fake when configured/injected
+        if streaming_recognizer is None and os.getenv('SPEECH_STREAMING_RECOGNIZER', '').lower() == 'fake':
+            streaming_recognizer = FakeStreamingRecognizer()
+        if streaming_recognizer is None and self.speech_client is not None:
+            streaming_recognizer = GoogleStreamingRecognizer(self.speech_client)
+        self.streaming_transcriber = StreamingTranscriber(streaming_recognizer) if streaming_recognizer else None
+        self.max_streaming_seconds = int(os.getenv('SPEECH_STREAMING_MAX_SECONDS', '3600'))
     
     def validate_audio_file(self, audio_content: bytes, filename: str = "") -> Tuple[bool, str]:
         """
@@ -354,11 +485,107 @@ class EnhancedGoogleCloudSpeechService:
             logger.error(f"Speech transcription failed: {e}")
             return self._fallback_transcription(f"Transcription failed: {str(e)}")
     
+    def _check_tts_request(self, text: str, user_id: str) -> Optional[str]:
+        """Return an error message if a text-to-speech request cannot be served"""
+        if not self.enabled or not self.tts_client:
+            return "Text-to-speech service not available"
+        
+        # Check daily usage limits
+        if not self.cost_monitor.check_daily_limit('text_to_speech', user_id):
+            return "Daily text-to-speech limit exceeded"
+        
+        # Validate text length
+        if len(text) > self.max_tts_text_length:
+            return f"Text too long for speech synthesis (max {self.max_tts_text_length} characters)"
+        
+        if not text.strip():
+            return "Empty text provided"
+        
+        return None
+    
+    def _synthesize_chunk(self, text: str, language_code: str, voice_gender: str,
+                          speaking_rate: float, pitch: float) -> Tuple[bytes, bool]:
+        """
+        Synthesize one chunk (under the API's 5000 byte limit), using the audio cache
+        
+        Returns:
+            Tuple of (MP3 bytes, whether they came from the cache)
+        """
+        voice_params = {
+            'voice_gender': voice_gender,
+            'speaking_rate': speaking_rate,
+            'pitch': pitch
+        }
+        
+        cached_audio = self.audio_cache.get(text, language_code, voice_params)
+        if cached_audio:
+            return cached_audio, True
+        
+        # Prepare synthesis input
+        synthesis_input = texttospeech.SynthesisInput(text=text)
+        
+        # Configure voice selection with neural voices using enhanced mapping
+        voice_name = self.voice_mapping.get(language_code, {}).get(voice_gender)
+        
+        if voice_name:
+            voice = texttospeech.VoiceSelectionParams(
+                language_code=language_code,
+                name=voice_name
+            )
+        else:
+            # Fallback to standard voice
+            gender_map = {
+                'MALE': texttospeech.SsmlVoiceGender.MALE,
+                'FEMALE': texttospeech.SsmlVoiceGender.FEMALE,
+                'NEUTRAL': texttospeech.SsmlVoiceGender.NEUTRAL
+            }
+            voice = texttospeech.VoiceSelectionParams(
+                language_code=language_code,
+                ssml_gender=gender_map.get(voice_gender, texttospeech.SsmlVoiceGender.NEUTRAL)
+            )
+        
+        # Configure audio output
+        audio_config = texttospeech.AudioConfig(
+            audio_encoding=texttospeech.AudioEncoding.MP3,
+            speaking_rate=speaking_rate,
+            pitch=pitch,
+            effects_profile_id=['telephony-class-application']  # Optimize for clarity
+        )
+        
+        response = self.tts_client.synthesize_speech(
+            input=synthesis_input,
+            voice=voice,
+            audio_config=audio_config
+        )
+        
+        # Cache the result
+        self.audio_cache.set(text, language_code, voice_params, response.audio_content)
+        return response.audio_content, False
+    
+    def open_cached_audio(self, text: str, language_code: str = 'en-US', voice_gender: str = 'NEUTRAL',
+                          speaking_rate: float = 0.9, pitch: float = 0.0,
+                          user_id: str = "anonymous") -> Optional[BinaryIO]:
+        """Open cached MP3 file for a servable request whose text is synthesized as a single chunk, if present"""
+        if not self.audio_cache or self._check_tts_request(text, user_id):
+            return None
+        chunks = split_text_for_speech(text)
+        if len(chunks) != 1:
+            return None
+        voice_params = {
+            'voice_gender': voice_gender,
+            'speaking_rate': speaking_rate,
+            'pitch': pitch
+        }
+        return self.audio_cache.open_file(chunks[0], language_code, voice_params)
+    
     def text_to_speech(self, text: str, language_code: str = 'en-US', voice_gender: str = 'NEUTRAL', 
                       speaking_rate: float = 0.9, pitch: float = 0.0, user_id: str = "anonymous") -> Dict[str, Any]:
         """
         Convert text to speech for accessibility with caching and enhanced features
         
+        Long text is split at sentence boundaries and the chunks are synthesized
+        concurrently; MP3 frames concatenate into a single playable stream.
+        
         Args:
             text: Text to convert to speech
             language_code: Language code (e.g., 'en-US', 'hi-IN')
@@ -370,111 +597,146 @@ class EnhancedGoogleCloudSpeechService:
         Returns:
             Dict containing audio content and metadata
         """
-        if not self.enabled or not self.tts_client:
-            return self._fallback_tts("Text-to-speech service not available")
+        error = self._check_tts_request(text, user_id)
+        if error:
+            return self._fallback_tts(error)
         
-        # Check daily usage limits
-        if not self.cost_monitor.check_daily_limit('text_to_speech', user_id):
-            return self._fallback_tts("Daily text-to-speech limit exceeded")
+        start_time = time.time()
+        chunks = split_text_for_speech(text)
         
-        # Validate text length
-        if len(text) > 5000:
-            return self._fallback_tts("Text too long for speech synthesis (max 5000 characters)")
+        try:
+            if len(chunks) == 1:
+                results = [self._synthesize_chunk(chunks[0], language_code, voice_gender, speaking_rate, pitch)]
+            else:
+                with ThreadPoolExecutor(max_workers=self.max_concurrent_tts_chunks) as executor:
+                    results = list(executor.map(
+                        lambda chunk: self._synthesize_chunk(chunk, language_code, voice_gender, speaking_rate, pitch),
+                        chunks
+                    ))
+        except Exception as api_error:
+            logger.error(f"TTS API error: {api_error}")
+            return self._fallback_tts(f"Text-to-speech API error: {str(api_error)}")
         
-        if not text.strip():
-            return self._fallback_tts("Empty text provided")
+        cached = all(chunk_cached for _, chunk_cached in results)
+        if not cached:
+            # Increment usage counter
+            self.cost_monitor.increment_usage('text_to_speech', user_id)
         
-        # Check cache first
-        voice_params = {
+        return {
+            'success': True,
+            'audio_content': b"".join(audio for audio, _ in results),
+            'language_code': language_code,
             'voice_gender': voice_gender,
-            'speaking_rate': speaking_rate,
-            'pitch': pitch
+            'processing_time': time.time() - start_time,
+            'audio_format': 'MP3',
+            'text_length': len(text),
+            'chunks': len(chunks),
+            'estimated_duration': len(text) / (speaking_rate * 150),
+            'cached': cached,
+            'usage_stats': self.cost_monitor.get_usage_stats(user_id)
         }
+    
+    async def start_text_to_speech_stream(self, text: str, language_code: str = 'en-US', voice_gender: str = 'NEUTRAL',
+                                          speaking_rate: float = 0.9, pitch: float = 0.0,
+                                          user_id: str = "anonymous") -> Dict[str, Any]:
+        """
+        Start progressive text-to-speech synthesis
         
-        cached_audio = self.audio_cache.get(text, language_code, voice_params)
-        if cached_audio:
-            return {
-                'success': True,
-                'audio_content': cached_audio,
-                'language_code': language_code,
-                'voice_gender': voice_gender,
-                'processing_time': 0.0,
-                'audio_format': 'MP3',
-                'text_length': len(text),
-                'estimated_duration': len(text) / (speaking_rate * 150),
-                'cached': True,
-                'usage_stats': self.cost_monitor.get_usage_stats(user_id)
-            }
+        The first (short) chunk is synthesized before returning so errors surface as a
+        failed result; the returned 'audio_stream' then yields each chunk's MP3 bytes in
+        order while a bounded window of following chunks is synthesized concurrently.
         
-        start_time = time.time()
+        Returns:
+            Dict with 'success', 'audio_stream' (async iterator of bytes), 'chunks' and 'first_chunk_cached'
+        """
+        error = self._check_tts_request(text, user_id)
+        if error:
+            return self._fallback_tts(error)
+        
+        chunks = split_text_for_speech(text)
+        pending: deque = deque()
+        next_index = 0
+        
+        def schedule():
+            nonlocal next_index
+            while next_index < len(chunks) and len(pending) < self.max_concurrent_tts_chunks:
+                pending.append(asyncio.create_task(asyncio.to_thread(
+                    self._synthesize_chunk, chunks[next_index], language_code, voice_gender, speaking_rate, pitch
+                )))
+                next_index += 1
         
+        def cancel_pending():
+            for task in pending:
+                task.cancel()
+            pending.clear()
+        
+        start_time = time.time()
+        schedule()
         try:
-            # Prepare synthesis input
-            synthesis_input = texttospeech.SynthesisInput(text=text)
-            
-            # Configure voice selection with neural voices using enhanced mapping
-            voice_name = self.voice_mapping.get(language_code, {}).get(voice_gender)
-            
-            if voice_name:
-                voice = texttospeech.VoiceSelectionParams(
-                    language_code=language_code,
-                    name=voice_name
-                )
-            else:
-                # Fallback to standard voice
-                gender_map = {
-                    'MALE': texttospeech.SsmlVoiceGender.MALE,
-                    'FEMALE': texttospeech.SsmlVoiceGender.FEMALE,
-                    'NEUTRAL': texttospeech.SsmlVoiceGender.NEUTRAL
-                }
-                voice = texttospeech.VoiceSelectionParams(
-                    language_code=language_code,
-                    ssml_gender=gender_map.get(voice_gender, texttospeech.SsmlVoiceGender.NEUTRAL)
-                )
-            
-            # Configure audio output
-            audio_config = texttospeech.AudioConfig(
-                audio_encoding=texttospeech.AudioEncoding.MP3,
-                speaking_rate=speaking_rate,
-                pitch=pitch,
-                effects_profile_id=['telephony-class-application']  # Optimize for clarity
-            )
-            
-            # Perform text-to-speech synthesis with timeout handling
-            try:
-                response = self.tts_client.synthesize_speech(
-                    input=synthesis_input,
-                    voice=voice,
-                    audio_config=audio_config
-                )
-            except Exception as api_error:
-                logger.error(f"TTS API error: {api_error}")
-                return self._fallback_tts(f"Text-to-speech API error: {str(api_error)}")
-            
-            processing_time = time.time() - start_time
-            
-            # Cache the result
-            self.audio_cache.set(text, language_code, voice_params, response.audio_content)
-            
-            # Increment usage counter
+            first_audio, first_cached = await pending.popleft()
+        except Exception as api_error:
+            cancel_pending()
+            logger.error(f"TTS API error: {api_error}")
+            return self._fallback_tts(f"Text-to-speech API error: {str(api_error)}")
+        
+        logger.info(f"First of {len(chunks)} TTS chunks ready in {time.time() - start_time:.2f}s (cached: {first_cached})")
+        if not first_cached:
             self.cost_monitor.increment_usage('text_to_speech', user_id)
+        
+        async def audio_stream():
+            try:
+                yield first_audio
+                while pending:
+                    schedule()
+                    audio, _ = await pending.popleft()
+                    yield audio
+                logger.info(f"Streamed {len(chunks)} TTS chunks in {time.time() - start_time:.2f}s")
+            except Exception as e:
+                logger.error(f"TTS streaming failed after partial audio: {e}")
+                # Propagate so the server aborts the response instead of ending truncated audio cleanly
+                raise
+            finally:
+                cancel_pending()
+        
+        return {
+            'success': True,
+            'audio_stream': audio_stream(),
+            'chunks': len(chunks),
+            'first_chunk_cached': first_cached,
+            'language_code': language_code,
+            'voice_gender': voice_gender
+        }
+    
+    async def transcribe_stream(self, frames, audio_config: Dict[str, Any], user_id: str = "anonymous"):
+        """
+        Transcribe an async stream of fixed-duration audio frames
+        
+        Args:
+            frames: Async iterator of audio frames (see streaming_transcription.iter_frames)
+            audio_config: encoding, sample_rate_hertz, language_code and enable_punctuation
+            user_id: User ID for cost monitoring
             
-            return {
-                'success': True,
-                'audio_content': response.audio_content,
-                'language_code': language_code,
-                'voice_gender': voice_gender,
-                'processing_time': processing_time,
-                'audio_format': 'MP3',
-                'text_length': len(text),
-                'estimated_duration': len(text) / (speaking_rate * 150),
-                'cached': False,
-                'usage_stats': self.cost_monitor.get_usage_stats(user_id)
-            }
-            
-        except Exception as e:
-            logger.error(f"Text-to-speech synthesis failed: {e}")
-            return self._fallback_tts(f"TTS synthesis failed: {str(e)}")
+        Yields:
+            'partial', 'final', 'complete' or 'error' event dicts
+        """
+        if not self.streaming_transcriber:
+            yield {'type': 'error', 'error': 'Streaming speech recognition not available'}
+            return
+        
+        if self.cost_monitor and not self.cost_monitor.check_daily_limit('speech_to_text', user_id):
+            yield {'type': 'error', 'error': 'Daily speech-to-text limit exceeded'}
+            return
+        
+        completed = False
+        async for event in self.streaming_transcriber.transcribe(frames, audio_config, self.max_streaming_seconds):
+            if event['type'] == 'complete':
+                completed = True
+                event['legal_terms_detected'] = self._detect_legal_terms(event['transcript'])
+                event['language_detected'] = audio_config.get('language_code', 'en-US')
+            yield event
+        
+        if completed and self.cost_monitor:
+            self.cost_monitor.increment_usage('speech_to_text', user_id)
     
     def transcribe_streaming(self, audio_generator, language_code: str = 'en-US') -> Dict[str, Any]:
         """
@@ -671,7 +933,10 @@ class EnhancedGoogleCloudSpeechService:
         """Get usage statistics for a user"""
         if not self.cost_monitor:
             return {'error': 'Cost monitoring not available'}
-        return self.cost_monitor.get_usage_stats(user_id)
+        stats = self.cost_monitor.get_usage_stats(user_id)
+        if self.audio_cache:
+            stats['audio_cache'] = self.audio_cache.get_stats()
+        return stats
     
     def clear_audio_cache(self):
         """Clear expired audio cache entries"""
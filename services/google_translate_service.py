@@ -7,11 +7,14 @@ import os
 import requests
 import json
 import time
-from typing import Dict, Any, Optional
+import asyncio
+from typing import Dict, Any, Optional, List
 from dataclasses import dataclass
 from google.cloud import translate_v2 as translate
 import logging
 
+from services.translation_memory import translation_memory
+
 # Cost monitoring integration
 try:
     from services.cost_monitoring_service import cost_monitor, ServiceType
@@ -22,6 +25,10 @@ except ImportError:
 
 logger = logging.getLogger(__name__)
 
+# Translate API v2 limits for one multi-segment request
+MAX_BATCH_SEGMENTS = 128
+MAX_BATCH_CHARACTERS = 30000
+
 @dataclass
 class TranslationResult:
     success: bool
@@ -134,6 +141,9 @@ class GoogleTranslateService:
         # Google Cloud Translate API endpoint
         self.base_url = "https://translation.googleapis.com/language/translate/v2"
         
+        # Concurrent translate requests issued by one batch call
+        self.max_concurrent_requests = int(os.getenv('TRANSLATE_MAX_CONCURRENT_REQUESTS', '4'))
+        
     async def translate_text(self, text: str, target_language: str = 'hi', source_language: Optional[str] = None) -> Dict[str, Any]:
         """
         Translate text using Google Cloud Translate API
@@ -149,7 +159,30 @@ class GoogleTranslateService:
         # Handle None source_language
         if source_language is None:
             source_language = 'auto'
-            
+        
+        # Shared translation memory first
+        if text and text.strip() and target_language in self.supported_languages:
+            remembered = await translation_memory.get_async(text, source_language, target_language)
+            if remembered:
+                return self._remembered_result(remembered, target_language)
+        
+        result = await self._translate_text(text, target_language, source_language)
+        if result.get('success'):
+            await translation_memory.put_async(text, source_language, target_language, result['translated_text'], result.get('source_language'))
+        return result
+    
+    def _remembered_result(self, remembered: Dict[str, Any], target_language: str) -> Dict[str, Any]:
+        return {
+            'success': True,
+            'translated_text': remembered['translated_text'],
+            'source_language': remembered['source_language'],
+            'target_language': target_language,
+            'language_name': self.supported_languages.get(target_language, target_language),
+            'cached': True
+        }
+    
+    async def _translate_text(self, text: str, target_language: str, source_language: str) -> Dict[str, Any]:
+        """Translate one text with the API (or the free fallback), bypassing translation memory"""
         if not self.cloud_enabled:
             return self._fallback_translation(text, target_language, source_language)
         
@@ -232,6 +265,125 @@ class GoogleTranslateService:
             
             return self._fallback_translation(text, target_language, source_language)
     
+    async def translate_batch(self, texts: List[str], target_language: str = 'hi', source_language: Optional[str] = None) -> List[Dict[str, Any]]:
+        """
+        Translate many segments with multi-segment API requests
+        
+        Segments already in translation memory are answered from it; the rest are
+        packed into requests within the API's segment and size limits, and the
+        requests run concurrently (bounded by max_concurrent_requests).
+        
+        Args:
+            texts: Segments to translate
+            target_language: Target language code
+            source_language: Source language code (default: auto-detect)
+            
+        Returns:
+            One result dictionary per segment, in input order (same shape as translate_text)
+        """
+        if source_language is None:
+            source_language = 'auto'
+        
+        if target_language not in self.supported_languages:
+            error = {'success': False, 'error': f'Unsupported target language: {target_language}'}
+            return [dict(error) for _ in texts]
+        
+        # Segments already in translation memory are not sent again
+        remembered = await translation_memory.get_many_async(texts, source_language, target_language)
+        misses = list(dict.fromkeys(text for text in texts if text not in remembered))
+        translated = dict(zip(misses, await self._translate_batch(misses, target_language, source_language))) if misses else {}
+        
+        for detected in {result.get('source_language') for result in translated.values() if result.get('success')}:
+            await translation_memory.put_many_async(
+                [(text, result['translated_text']) for text, result in translated.items()
+                 if result.get('success') and result.get('source_language') == detected],
+                source_language, target_language, detected
+            )
+        
+        return [
+            self._remembered_result(remembered[text], target_language) if text in remembered else translated[text]
+            for text in texts
+        ]
+    
+    async def _translate_batch(self, texts: List[str], target_language: str, source_language: str) -> List[Dict[str, Any]]:
+        """Translate segments with the API in packed, concurrent requests, bypassing translation memory"""
+        semaphore = asyncio.Semaphore(self.max_concurrent_requests)
+        
+        if not self.cloud_enabled:
+            # The free endpoint takes one segment per request
+            async def translate_one(text: str) -> Dict[str, Any]:
+                async with semaphore:
+                    return await asyncio.to_thread(self._fallback_translation, text, target_language, source_language)
+            return list(await asyncio.gather(*(translate_one(text) for text in texts)))
+        
+        batches: List[List[int]] = []
+        batch_chars = 0
+        for index, text in enumerate(texts):
+            length = len(text[:5000])
+            if not batches or len(batches[-1]) >= MAX_BATCH_SEGMENTS or batch_chars + length > MAX_BATCH_CHARACTERS:
+                batches.append([])
+                batch_chars = 0
+            batches[-1].append(index)
+            batch_chars += length
+        
+        results: List[Optional[Dict[str, Any]]] = [None] * len(texts)
+        
+        async def translate_request(indices: List[int]):
+            segments = [texts[i][:5000] for i in indices]
+            async with semaphore:
+                try:
+                    if COST_MONITORING_AVAILABLE:
+                        rate_limit_result = await quota_manager.check_rate_limit(
+                            service="translation_api",
+                            operation="translate_batch",
+                            usage_amount=sum(len(segment) for segment in segments),
+                            priority=ServicePriority.MEDIUM
+                        )
+                        if not rate_limit_result.allowed:
+                            raise RuntimeError(f"Translation request throttled: {rate_limit_result.message}")
+                    
+                    kwargs = {'target_language': target_language}
+                    if source_language != 'auto':
+                        kwargs['source_language'] = source_language
+                    translations = await asyncio.to_thread(self.client.translate, segments, **kwargs)
+                    
+                    for i, translation in zip(indices, translations):
+                        results[i] = {
+                            'success': True,
+                            'translated_text': translation['translatedText'],
+                            'source_language': translation.get('detectedSourceLanguage', source_language) if source_language == 'auto' else source_language,
+                            'target_language': target_language,
+                            'language_name': self.supported_languages.get(target_language, target_language)
+                        }
+                    
+                    if COST_MONITORING_AVAILABLE:
+                        await cost_monitor.track_api_usage(
+                            service="translation_api",
+                            operation="translate_batch",
+                            characters=sum(len(segment) for segment in segments),
+                            request_id=f"translate_batch_{int(time.time())}",
+                            metadata={
+                                "source_language": source_language,
+                                "target_language": target_language,
+                                "segments": len(segments),
+                                "success": True
+                            }
+                        )
+                        await quota_manager.record_success("translation_api")
+                    return
+                except Exception as e:
+                    logger.error(f"Google Cloud Translate batch error: {e}")
+                    if COST_MONITORING_AVAILABLE:
+                        await quota_manager.record_failure("translation_api")
+            
+            # Batch failed: fall back segment by segment
+            for i in indices:
+                results[i] = await asyncio.to_thread(self._fallback_translation, texts[i], target_language, source_language)
+        
+        await asyncio.gather(*(translate_request(indices) for indices in batches))
+        logger.info(f"Translated {len(texts)} segments to {target_language} in {len(batches)} requests")
+        return results
+    
     def _fallback_translation(self, text: str, target_language: str, source_language: str) -> Dict[str, Any]:
         """Fallback translation using free API when Google Cloud is unavailable"""
         try:
@@ -0,0 +1,123 @@
+"""
+Image preprocessing for legal document OCR
+Pure PIL routines kept free of service state so they can run in worker processes
+"""
+
+import io
+import time
+import logging
+from typing import Dict, Tuple
+
+from PIL import Image, ImageEnhance, ImageFilter
+
+logger = logging.getLogger(__name__)
+
+# Long edge of an A4/Letter page scanned at ~200 DPI; OCR accuracy barely improves above this
+OCR_TARGET_LONG_EDGE = 2200
+OUTPUT_JPEG_QUALITY = 90
+# Resampling by at least this factor already averages out sensor noise, so the median filter is skipped
+DENOISE_SKIP_SCALE = 1.5
+
+
+def preprocess_legal_document_image(image_content: bytes) -> bytes:
+    """
+    Preprocess image for optimal legal document text extraction
+    Applies contrast enhancement, rotation detection, and noise reduction
+    """
+    processed_content, _ = preprocess_with_timings(image_content)
+    return processed_content
+
+
+def preprocess_with_timings(image_content: bytes) -> Tuple[bytes, Dict[str, float]]:
+    """
+    Preprocess image and report how long each stage took (in milliseconds)
+
+    The image is reduced to OCR resolution and grayscale before any filtering, and
+    JPEGs are decoded in draft mode so the decoder never materializes full-size
+    colour pixels for large phone photos.
+    """
+    timings: Dict[str, float] = {}
+    stage_start = time.perf_counter()
+
+    def mark(stage: str):
+        nonlocal stage_start
+        now = time.perf_counter()
+        timings[stage] = round((now - stage_start) * 1000, 2)
+        stage_start = now
+
+    try:
+        # 1. Decode, letting the JPEG decoder downscale and drop chroma where possible
+        image = Image.open(io.BytesIO(image_content))
+        original_size = image.size
+        target_size = _ocr_target_size(image.size)
+        if image.format == 'JPEG':
+            image.draft('L', target_size)
+        image.load()
+        mark('decode')
+
+        # 2. Downsample to OCR resolution before doing any per-pixel work
+        if image.size[0] > target_size[0] or image.size[1] > target_size[1]:
+            image.thumbnail(target_size, Image.LANCZOS)
+        mark('resize')
+
+        # 3. Work in grayscale - colour carries no information for OCR
+        if image.mode != 'L':
+            image = image.convert('L')
+        mark('grayscale')
+
+        # 4. Contrast enhancement for better text visibility
+        image = ImageEnhance.Contrast(image).enhance(1.2)  # Increase contrast by 20%
+
+        # 5. Sharpness enhancement for clearer text
+        image = ImageEnhance.Sharpness(image).enhance(1.1)  # Increase sharpness by 10%
+        mark('enhance')
+
+        # 6. Noise reduction using median filter (the most expensive stage)
+        if max(original_size) / max(image.size) < DENOISE_SKIP_SCALE:
+            image = image.filter(ImageFilter.MedianFilter(size=3))
+        mark('denoise')
+
+        # 7. Auto-rotation detection (basic implementation)
+        image = detect_and_correct_rotation(image)
+        mark('rotation')
+
+        # Convert back to bytes
+        output_buffer = io.BytesIO()
+        image.save(output_buffer, format='JPEG', quality=OUTPUT_JPEG_QUALITY)
+        processed_content = output_buffer.getvalue()
+        mark('encode')
+
+        timings['total'] = round(sum(timings.values()), 2)
+        logger.info(
+            f"Image preprocessing completed - original: {len(image_content)} bytes {original_size}, "
+            f"processed: {len(processed_content)} bytes {image.size}, {timings['total']}ms"
+        )
+        return processed_content, timings
+
+    except Exception as e:
+        logger.warning(f"Image preprocessing failed: {e}, using original image")
+        return image_content, timings
+
+
+def _ocr_target_size(size: Tuple[int, int]) -> Tuple[int, int]:
+    """Scale an image size so its long edge is at most OCR_TARGET_LONG_EDGE"""
+    width, height = size
+    long_edge = max(width, height)
+    if long_edge <= OCR_TARGET_LONG_EDGE:
+        return width, height
+    scale = OCR_TARGET_LONG_EDGE / long_edge
+    return max(1, round(width * scale)), max(1, round(height * scale))
+
+
+def detect_and_correct_rotation(image: Image.Image) -> Image.Image:
+    """
+    Basic rotation detection and correction for legal documents
+    This is a simplified implementation - more sophisticated methods could be used
+    """
+    try:
+        # For now, we'll skip rotation detection as it requires more complex algorithms
+        # In a production environment, you might use libraries like OpenCV for better rotation detection
+        return image
+    except Exception as e:
+        logger.warning(f"Rotation detection failed: {e}")
+        return image
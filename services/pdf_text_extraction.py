@@ -0,0 +1,176 @@
+"""
+Page-level PDF text extraction with a digital-text fast path
+Born-digital pages are extracted locally (page-parallel in worker processes for large
+files); pages without a usable text layer are reported so only they are sent to OCR.
+"""
+
+import io
+import os
+import time
+import asyncio
+import logging
+from dataclasses import dataclass, field
+from typing import Dict, List, Any, Optional, Tuple
+from concurrent.futures.process import BrokenProcessPool
+
+from PyPDF2 import PdfReader, PdfWriter
+
+from services.worker_pool import get_process_pool, mark_pool_broken
+
+logger = logging.getLogger(__name__)
+
+# A page with fewer alphanumeric characters than this is treated as a scanned image
+MIN_DIGITAL_CHARS = 40
+# Below this page count the process pool costs more than it saves
+PARALLEL_MIN_PAGES = 8
+MAX_WORKERS = 4
+POOL_NAME = 'pdf_text'
+
+
+@dataclass
+class PageExtraction:
+    """Text extraction result for a single PDF page"""
+    page_number: int
+    text: str
+    is_digital: bool
+    elapsed_ms: float
+    method: str = "text_layer"
+
+
+@dataclass
+class PDFTextExtraction:
+    """Text extraction result for a whole PDF"""
+    pages: List[PageExtraction] = field(default_factory=list)
+    total_time: float = 0.0
+    parallel: bool = False
+
+    @property
+    def text(self) -> str:
+        return "\n".join(page.text for page in self.pages).strip()
+
+    @property
+    def image_pages(self) -> List[int]:
+        """Zero-based indices of pages that need OCR"""
+        return [page.page_number - 1 for page in self.pages if not page.is_digital]
+
+    @property
+    def fully_digital(self) -> bool:
+        return bool(self.pages) and not self.image_pages
+
+    def page_report(self) -> List[Dict[str, Any]]:
+        """Per-page method and timing for response metadata"""
+        return [
+            {
+                'page_number': page.page_number,
+                'method': page.method,
+                'characters': len(page.text),
+                'elapsed_ms': page.elapsed_ms
+            }
+            for page in self.pages
+        ]
+
+
+def _is_digital_text(text: str) -> bool:
+    return sum(1 for char in text if char.isalnum()) >= MIN_DIGITAL_CHARS
+
+
+def extract_page_range(pdf_bytes: bytes, start: int, end: int) -> List[PageExtraction]:
+    """Extract pages [start, end) of a PDF; module-level so it can run in worker processes"""
+    reader = PdfReader(io.BytesIO(pdf_bytes))
+    pages = []
+    for index in range(start, min(end, len(reader.pages))):
+        page_start = time.perf_counter()
+        try:
+            text = reader.pages[index].extract_text() or ""
+        except Exception as e:
+            logger.warning(f"Text extraction failed for page {index + 1}: {e}")
+            text = ""
+        is_digital = _is_digital_text(text)
+        pages.append(PageExtraction(
+            page_number=index + 1,
+            text=text,
+            is_digital=is_digital,
+            elapsed_ms=round((time.perf_counter() - page_start) * 1000, 2),
+            method="text_layer" if is_digital else "needs_ocr"
+        ))
+    return pages
+
+
+def extract_pdf_pages(pdf_bytes: bytes, parallel: bool = True) -> PDFTextExtraction:
+    """
+    Extract text from every page of a PDF
+
+    Blocking; async callers should use extract_pdf_pages_async. Large PDFs are split into
+    contiguous page ranges extracted concurrently in the shared process pool.
+    """
+    start_time = time.perf_counter()
+    page_count = len(PdfReader(io.BytesIO(pdf_bytes)).pages)
+
+    pool = get_process_pool(POOL_NAME, max_workers=MAX_WORKERS) if parallel and page_count >= PARALLEL_MIN_PAGES else None
+    pages: Optional[List[PageExtraction]] = None
+
+    if pool is not None:
+        workers = min(MAX_WORKERS, os.cpu_count() or 1)
+        chunk_size = -(-page_count // workers)
+        ranges = [(start, start + chunk_size) for start in range(0, page_count, chunk_size)]
+        try:
+            futures = [pool.submit(extract_page_range, pdf_bytes, start, end) for start, end in ranges]
+            pages = [page for future in futures for page in future.result()]
+        except BrokenProcessPool as e:
+            logger.warning(f"PDF extraction pool broken: {e}, extracting serially")
+            mark_pool_broken(POOL_NAME)
+            pages = None
+        except Exception as e:
+            # A failure in one document (memory, pickling) says nothing about the pool itself
+            logger.warning(f"Parallel PDF extraction failed: {e}, extracting serially")
+            pages = None
+
+    parallel_used = pages is not None
+    if pages is None:
+        pages = extract_page_range(pdf_bytes, 0, page_count)
+
+    result = PDFTextExtraction(
+        pages=pages,
+        total_time=time.perf_counter() - start_time,
+        parallel=parallel_used
+    )
+    logger.info(
+        f"Extracted {page_count} PDF pages in {result.total_time:.2f}s "
+        f"({page_count - len(result.image_pages)} digital, {len(result.image_pages)} need OCR, parallel={parallel_used})"
+    )
+    return result
+
+
+async def extract_pdf_pages_async(pdf_bytes: bytes) -> PDFTextExtraction:
+    """Extract PDF pages without blocking the event loop"""
+    return await asyncio.to_thread(extract_pdf_pages, pdf_bytes)
+
+
+def count_pdf_pages(pdf_bytes: bytes) -> int:
+    """Number of pages in a PDF"""
+    return len(PdfReader(io.BytesIO(pdf_bytes)).pages)
+
+
+def split_pdf(pdf_bytes: bytes, pages_per_shard: int) -> List[Tuple[int, bytes]]:
+    """Split a PDF into consecutive page-range shards as (zero-based start page, shard bytes)"""
+    reader = PdfReader(io.BytesIO(pdf_bytes))
+    shards = []
+    for start in range(0, len(reader.pages), pages_per_shard):
+        writer = PdfWriter()
+        for index in range(start, min(start + pages_per_shard, len(reader.pages))):
+            writer.add_page(reader.pages[index])
+        output = io.BytesIO()
+        writer.write(output)
+        shards.append((start, output.getvalue()))
+    return shards
+
+
+def build_sub_pdf(pdf_bytes: bytes, page_indices: List[int]) -> bytes:
+    """Build a PDF containing only the given zero-based pages, in order"""
+    reader = PdfReader(io.BytesIO(pdf_bytes))
+    writer = PdfWriter()
+    for index in page_indices:
+        writer.add_page(reader.pages[index])
+    output = io.BytesIO()
+    writer.write(output)
+    return output.getvalue()
@@ -6,6 +6,8 @@ from typing import Dict, Any, Optional, List
 from enum import Enum
 import logging
 
+from services.term_matcher import TermMatcher, splice
+
 logger = logging.getLogger(__name__)
 
 
@@ -22,6 +24,11 @@ class PersonalizationEngine:
     def __init__(self):
         self.response_templates = self._initialize_templates()
         self.terminology_maps = self._initialize_terminology()
+        # Compiled once; each personalization is a single scan of the response
+        self.term_matchers = {
+            level: TermMatcher(terms, case_sensitive=True)
+            for level, terms in self.terminology_maps.items()
+        }
         self.explanation_styles = self._initialize_explanation_styles()
     
     def _initialize_templates(self) -> Dict[str, Dict[str, str]]:
@@ -237,9 +244,12 @@ class PersonalizationEngine:
         
         # Only replace terms for beginner level to avoid over-explanation
         if level == ExperienceLevel.BEGINNER:
-            for term, explanation in terminology.items():
-                # Replace term with explanation in parentheses
-                text = text.replace(term, f"{term} ({explanation})")
+            # Longest whole-word match wins ("liquidated damages" over "damages"), and
+            # inserted explanations are never rescanned, so they cannot nest
+            text = splice(text, [
+                (end, f" ({terminology[term]})")
+                for _, end, term in self.term_matchers[level].find_all(text)
+            ])
         
         return text
     
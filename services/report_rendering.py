@@ -0,0 +1,88 @@
+"""
+Report rendering in a warm process pool
+PDF (reportlab) and DOCX (python-docx) exports are CPU-bound, so they run in a
+dedicated process pool instead of on the event loop. Each worker imports the
+renderers and builds their paragraph styles and font metrics once, in its
+initializer. At most REPORT_RENDER_QUEUE_LIMIT renders may be running or waiting at
+once; further requests are refused with RenderQueueFull rather than piling up.
+"""
+
+import os
+import asyncio
+import logging
+from typing import Any, Callable
+
+from services.worker_pool import get_process_pool, run_in_process_pool
+
+logger = logging.getLogger(__name__)
+
+POOL_NAME = 'report_render'
+RENDER_WORKERS = int(os.getenv("REPORT_RENDER_WORKERS", "2"))
+RENDER_QUEUE_LIMIT = int(os.getenv("REPORT_RENDER_QUEUE_LIMIT", "16"))
+
+# Renders running or waiting for a worker (event loop only, so no lock)
+_pending = 0
+
+
+class RenderQueueFull(Exception):
+    """Too many report renders are already in progress"""
+
+
+def init_render_worker():
+    """Process pool initializer: load renderers, styles and fonts once per worker"""
+    from reportlab.pdfbase import pdfmetrics
+    from services.export_service import get_export_styles
+    from services.expert_pdf_generator import ExpertPDFGenerator
+
+    for font in ('Helvetica', 'Helvetica-Bold', 'Helvetica-Oblique', 'Times-Roman'):
+        pdfmetrics.getFont(font)
+    get_export_styles()
+    ExpertPDFGenerator()
+
+    try:
+        import docx  # noqa: F401
+    except ImportError:
+        pass
+
+
+def _worker_ready() -> int:
+    return os.getpid()
+
+
+async def render_in_pool(func: Callable[..., bytes], *args: Any) -> bytes:
+    """
+    Run a module-level render function in the render pool
+
+    Falls back to a thread when process pools are unavailable. Raises RenderQueueFull
+    when REPORT_RENDER_QUEUE_LIMIT renders are already pending.
+    """
+    global _pending
+    if _pending >= RENDER_QUEUE_LIMIT:
+        raise RenderQueueFull(f"{_pending} reports are already being rendered, try again shortly")
+
+    _pending += 1
+    try:
+        return await run_in_process_pool(
+            POOL_NAME, func, *args,
+            max_workers=RENDER_WORKERS,
+            initializer=init_render_worker
+        )
+    finally:
+        _pending -= 1
+
+
+async def warm_render_pool():
+    """Start the render workers ahead of the first export (application startup)"""
+    pool = get_process_pool(POOL_NAME, max_workers=RENDER_WORKERS, initializer=init_render_worker)
+    if pool is None:
+        return
+
+    try:
+        loop = asyncio.get_running_loop()
+        pids = await asyncio.gather(*(
+            loop.run_in_executor(pool, _worker_ready) for _ in range(RENDER_WORKERS)
+        ))
+        logger.info(f"Report render pool warmed ({len(set(pids))} workers)")
+    except Exception as e:
+        logger.warning(f"Could not warm report render pool: {e}")
+
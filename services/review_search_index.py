@@ -0,0 +1,130 @@
+"""
+Full-text search index for expert review items
+On SQLite an FTS5 external-content table mirrors review_id, user_email and
+expert_notes of expert_review_items. Triggers keep it in step with every write, so
+no service has to maintain it explicitly. Other databases (or SQLite builds without
+FTS5) report the index as unavailable and callers fall back to LIKE scans.
+"""
+
+import re
+import logging
+from typing import Optional
+
+from sqlalchemy import text
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session
+
+from models.expert_queue_models import ExpertReviewItem
+
+logger = logging.getLogger(__name__)
+
+FTS_TABLE = "expert_review_fts"
+
+# Searches matching at most this many reviews are resolved from the index alone
+SELECTIVE_MATCH_LIMIT = 1000
+
+# unicode61 splits on everything but letters and digits, so 'review_20241101_abc123'
+# indexes as 'review', '20241101', 'abc123' and 'user1@example.com' as 'user1', 'example', 'com'
+_TOKEN = re.compile(r"[^\W_]+\*?", re.UNICODE)
+
+_SCHEMA = [
+    f"""
+    CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5(
+        review_id, user_email, expert_notes,
+        content='expert_review_items', content_rowid='id',
+        tokenize='unicode61 remove_diacritics 2'
+    )
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_ai AFTER INSERT ON expert_review_items BEGIN
+        INSERT INTO {FTS_TABLE}(rowid, review_id, user_email, expert_notes)
+        VALUES (new.id, new.review_id, new.user_email, new.expert_notes);
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_ad AFTER DELETE ON expert_review_items BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, review_id, user_email, expert_notes)
+        VALUES ('delete', old.id, old.review_id, old.user_email, old.expert_notes);
+    END
+    """,
+    # Only searchable columns re-index; status and timestamp updates leave the index alone
+    f"""
+    CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_au
+    AFTER UPDATE OF id, review_id, user_email, expert_notes ON expert_review_items BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, review_id, user_email, expert_notes)
+        VALUES ('delete', old.id, old.review_id, old.user_email, old.expert_notes);
+        INSERT INTO {FTS_TABLE}(rowid, review_id, user_email, expert_notes)
+        VALUES (new.id, new.review_id, new.user_email, new.expert_notes);
+    END
+    """
+]
+
+
+def ensure_review_search_index(engine: Engine) -> bool:
+    """
+    Create the FTS table and triggers if needed; returns True when the index is usable
+
+    A newly created index is populated from the existing rows.
+    """
+    if engine.dialect.name != 'sqlite':
+        return False
+
+    try:
+        with engine.begin() as connection:
+            exists = connection.execute(
+                text("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = :name"),
+                {'name': FTS_TABLE}
+            ).first() is not None
+            for statement in _SCHEMA:
+                connection.execute(text(statement))
+            if not exists:
+                connection.execute(text(f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('rebuild')"))
+                logger.info("Built full-text index for expert review search")
+        return True
+    except Exception as e:
+        logger.warning(f"Full-text review search unavailable, using LIKE scans: {e}")
+        return False
+
+
+def build_match_query(query: str) -> Optional[str]:
+    """
+    FTS5 MATCH expression for a user search string
+
+    Every token must match; the last token (and any token written with a trailing '*')
+    matches as a prefix, so partial IDs and emails typed so far still find their review.
+    Returns None when the query has no searchable tokens.
+    """
+    tokens = _TOKEN.findall(query)
+    if not tokens:
+        return None
+
+    terms = []
+    for index, token in enumerate(tokens):
+        prefix = token.endswith('*') or index == len(tokens) - 1
+        word = token.rstrip('*')
+        terms.append(f'"{word}"*' if prefix else f'"{word}"')
+    return " AND ".join(terms)
+
+
+def match_filter(session: Session, query: str, selective_limit: int = SELECTIVE_MATCH_LIMIT):
+    """
+    WHERE clause restricting expert_review_items to full-text matches, or None
+
+    Selective searches fetch the matching rowids and look the reviews up by primary key.
+    Broad ones (common note words) instead walk the created_at index newest first and
+    probe the match set, stopping once the caller's LIMIT is filled; the unary '+'
+    keeps SQLite from driving that plan from the rowid list.
+    """
+    match = build_match_query(query)
+    if match is None:
+        return None
+
+    rowids = [row[0] for row in session.execute(
+        text(f"SELECT rowid FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH :match LIMIT :limit"),
+        {'match': match, 'limit': selective_limit + 1}
+    )]
+    if len(rowids) <= selective_limit:
+        return ExpertReviewItem.id.in_(rowids)
+    return text(
+        f"+expert_review_items.id IN (SELECT rowid FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH :match)"
+    ).bindparams(match=match)
@@ -3,26 +3,42 @@ Review Tracking Service for Human-in-the-Loop System
 Allows users to track status of their expert reviews via unique review ID
 """
 
+import os
 import logging
 from datetime import datetime, timedelta
 from typing import Dict, Any, Optional, List
 from sqlalchemy.orm import Session
-from sqlalchemy import and_, or_
+from sqlalchemy import or_, func
+from cachetools import TTLCache
 
 from models.expert_queue_models import (
     ExpertReviewItem, ReviewStatus, ExpertUser, ReviewMetrics,
     ExpertReviewItemResponse, QueueStatsResponse
 )
 from services.expert_queue_service import ExpertQueueService
+from services.review_search_index import ensure_review_search_index, match_filter
 
 logger = logging.getLogger(__name__)
 
+# Dashboard polls read one shared snapshot; status changes made here clear it
+QUEUE_STATS_TTL_SECONDS = int(os.getenv("QUEUE_STATS_TTL_SECONDS", "15"))
+_queue_stats_cache = TTLCache(maxsize=1, ttl=QUEUE_STATS_TTL_SECONDS)
+
+
+def _hours_between(session: Session, start, end):
+    """SQL expression for the hours from start to end on the session's database"""
+    dialect = session.get_bind().dialect.name
+    if dialect == 'sqlite':
+        return (func.julianday(end) - func.julianday(start)) * 24
+    return func.extract('epoch', end - start) / 3600.0
+
 
 class ReviewTrackingService:
     """Service for tracking expert review status and progress"""
     
     def __init__(self):
         self.queue_service = ExpertQueueService()
+        self.full_text_search = ensure_review_search_index(self.queue_service.engine)
         logger.info("Review Tracking Service initialized")
     
     def get_review_status(self, review_id: str) -> Optional[Dict[str, Any]]:
@@ -102,67 +118,50 @@ class ReviewTrackingService:
             return []
     
     def get_queue_statistics(self) -> QueueStatsResponse:
-        """Get overall queue statistics and metrics"""
+        """Get overall queue statistics and metrics (cached for a few seconds)"""
+        cached = _queue_stats_cache.get('stats')
+        if cached is not None:
+            return cached
+        
         try:
             with self.queue_service.get_db() as session:
-                # Count items by status
-                total_items = session.query(ExpertReviewItem).count()
-                pending_items = session.query(ExpertReviewItem).filter(
-                    ExpertReviewItem.status == ReviewStatus.PENDING.value
-                ).count()
-                in_review_items = session.query(ExpertReviewItem).filter(
-                    ExpertReviewItem.status == ReviewStatus.IN_REVIEW.value
-                ).count()
-                completed_items = session.query(ExpertReviewItem).filter(
-                    ExpertReviewItem.status == ReviewStatus.COMPLETED.value
-                ).count()
-                cancelled_items = session.query(ExpertReviewItem).filter(
-                    ExpertReviewItem.status == ReviewStatus.CANCELLED.value
-                ).count()
+                # Counts, oldest pending item and completion time in one pass grouped by status
+                hours = _hours_between(session, ExpertReviewItem.created_at, ExpertReviewItem.completed_at)
+                rows = session.query(
+                    ExpertReviewItem.status,
+                    func.count(ExpertReviewItem.id),
+                    func.min(ExpertReviewItem.created_at),
+                    func.avg(hours)
+                ).group_by(ExpertReviewItem.status).all()
+                by_status = {status: (count, oldest, avg_hours) for status, count, oldest, avg_hours in rows}
                 
-                # Calculate average completion time
-                completed_reviews = session.query(ExpertReviewItem).filter(
-                    and_(
-                        ExpertReviewItem.status == ReviewStatus.COMPLETED.value,
-                        ExpertReviewItem.completed_at.isnot(None),
-                        ExpertReviewItem.created_at.isnot(None)
-                    )
-                ).all()
-                
-                avg_completion_time = 0.0
-                if completed_reviews:
-                    total_hours = sum([
-                        (review.completed_at - review.created_at).total_seconds() / 3600
-                        for review in completed_reviews
-                    ])
-                    avg_completion_time = total_hours / len(completed_reviews)
+                def count_of(status: ReviewStatus) -> int:
+                    return by_status.get(status.value, (0, None, None))[0]
                 
-                # Get oldest pending item
-                oldest_pending = session.query(ExpertReviewItem).filter(
-                    ExpertReviewItem.status == ReviewStatus.PENDING.value
-                ).order_by(ExpertReviewItem.created_at.asc()).first()
+                avg_completion_time = by_status.get(ReviewStatus.COMPLETED.value, (0, None, None))[2]
+                oldest_pending = by_status.get(ReviewStatus.PENDING.value, (0, None, None))[1]
                 
                 # Expert workload
-                expert_workload = {}
-                active_assignments = session.query(ExpertReviewItem).filter(
-                    ExpertReviewItem.status == ReviewStatus.IN_REVIEW.value
-                ).all()
-                
-                for assignment in active_assignments:
-                    expert_id = assignment.assigned_expert_id
-                    if expert_id:
-                        expert_workload[expert_id] = expert_workload.get(expert_id, 0) + 1
+                expert_workload = dict(session.query(
+                    ExpertReviewItem.assigned_expert_id,
+                    func.count(ExpertReviewItem.id)
+                ).filter(
+                    ExpertReviewItem.status == ReviewStatus.IN_REVIEW.value,
+                    ExpertReviewItem.assigned_expert_id.isnot(None)
+                ).group_by(ExpertReviewItem.assigned_expert_id).all())
                 
-                return QueueStatsResponse(
-                    total_items=total_items,
-                    pending_items=pending_items,
-                    in_review_items=in_review_items,
-                    completed_items=completed_items,
-                    cancelled_items=cancelled_items,
-                    average_completion_time_hours=avg_completion_time,
-                    oldest_pending_item=oldest_pending.created_at if oldest_pending else None,
+                stats = QueueStatsResponse(
+                    total_items=sum(count for count, _, _ in by_status.values()),
+                    pending_items=count_of(ReviewStatus.PENDING),
+                    in_review_items=count_of(ReviewStatus.IN_REVIEW),
+                    completed_items=count_of(ReviewStatus.COMPLETED),
+                    cancelled_items=count_of(ReviewStatus.CANCELLED),
+                    average_completion_time_hours=float(avg_completion_time or 0.0),
+                    oldest_pending_item=oldest_pending,
                     expert_workload=expert_workload
                 )
+                _queue_stats_cache['stats'] = stats
+                return stats
                 
         except Exception as e:
             logger.error(f"Failed to get queue statistics: {e}")
@@ -206,6 +205,7 @@ class ReviewTrackingService:
                         review.expert_notes = expert_notes
                 
                 session.commit()
+                _queue_stats_cache.clear()
                 
                 logger.info(f"Review {review_id} status updated from {old_status} to {new_status.value}")
                 return True
@@ -321,7 +321,10 @@ class ReviewTrackingService:
                 query_filter = session.query(ExpertReviewItem)
                 
                 # Text search in review_id, user_email, or expert_notes
-                if query:
+                text_filter = match_filter(session, query) if query and self.full_text_search else None
+                if text_filter is not None:
+                    query_filter = query_filter.filter(text_filter)
+                elif query:
                     query_filter = query_filter.filter(
                         or_(
                             ExpertReviewItem.review_id.ilike(f'%{query}%'),
@@ -7,10 +7,7 @@ import os
 import logging
 import smtplib
 from datetime import datetime
-from email.mime.text import MIMEText
-from email.mime.multipart import MIMEMultipart
-from email.mime.base import MIMEBase
-from email import encoders
+from string import Template
 from typing import Dict, Any, Optional
 
 from models.email_models import (
@@ -18,9 +15,169 @@ from models.email_models import (
 )
 from models.document_models import DocumentAnalysisResponse
 from middleware.email_rate_limiter import email_rate_limiter
+from services.smtp_pool import get_smtp_pool
+from services.streaming_mime import StreamingEmailMessage
 
 logger = logging.getLogger(__name__)
 
+# Report templates, parsed once at import instead of rebuilt on every send
+_REPORT_HTML_TEMPLATE = Template("""
+<!DOCTYPE html>
+<html lang="en">
+<head>
+    <meta charset="UTF-8">
+    <meta name="viewport" content="width=device-width, initial-scale=1.0">
+    <title>Legal Document Analysis Report</title>
+    <style>
+        body { font-family: -apple-system, BlinkMacSystemFont, 'Segoe UI', Roboto, sans-serif; line-height: 1.6; color: #333; margin: 0; padding: 0; background-color: #f8fafc; }
+        .container { max-width: 600px; margin: 0 auto; background-color: white; }
+        .header { background: linear-gradient(135deg, #0ea5e9 0%, #3b82f6 100%); color: white; padding: 30px; text-align: center; }
+        .header h1 { margin: 0; font-size: 28px; font-weight: 700; }
+        .header p { margin: 10px 0 0 0; opacity: 0.9; font-size: 16px; }
+        .content { padding: 30px; }
+        .risk-summary { background-color: $risk_bg_color; border-left: 4px solid $risk_color; padding: 20px; margin: 20px 0; border-radius: 8px; }
+        .risk-level { color: $risk_color; font-weight: 700; font-size: 18px; margin-bottom: 10px; }
+        .summary-text { font-size: 16px; line-height: 1.6; margin-bottom: 15px; }
+        .stats-grid { display: grid; grid-template-columns: repeat(3, 1fr); gap: 15px; margin: 25px 0; }
+        .stat-card { text-align: center; padding: 15px; background-color: #f8fafc; border-radius: 8px; border: 1px solid #e2e8f0; }
+        .stat-number { font-size: 24px; font-weight: 700; margin-bottom: 5px; }
+        .stat-label { font-size: 12px; color: #64748b; text-transform: uppercase; letter-spacing: 0.5px; }
+        .red { color: #ef4444; }
+        .yellow { color: #f59e0b; }
+        .green { color: #10b981; }
+        .attachment-info { background-color: #f1f5f9; border: 1px solid #cbd5e1; border-radius: 8px; padding: 20px; margin: 25px 0; }
+        .attachment-info h3 { margin: 0 0 10px 0; color: #1e293b; }
+        .footer { background-color: #1e293b; color: white; padding: 25px; text-align: center; }
+        .footer p { margin: 5px 0; }
+        .disclaimer { font-size: 12px; color: #94a3b8; margin-top: 15px; line-height: 1.4; }
+        .custom-message { background-color: #eff6ff; border: 1px solid #bfdbfe; border-radius: 8px; padding: 20px; margin: 20px 0; }
+        .custom-message h3 { margin: 0 0 10px 0; color: #1d4ed8; }
+    </style>
+</head>
+<body>
+    <div class="container">
+        <div class="header">
+            <h1>Legal Document Analysis Report</h1>
+            <p>Professional Risk Assessment & Analysis</p>
+        </div>
+        
+        <div class="content">
+            <p>Dear Client,</p>
+            <p>We have completed the comprehensive analysis of your legal document. Please find the detailed professional report attached as a PDF document.</p>
+            
+            $custom_message_block
+            
+            <div class="risk-summary">
+                <div class="risk-level">Overall Risk Level: $risk_level</div>
+                <div class="summary-text">$summary</div>
+                <p><strong>Confidence Level:</strong> $confidence_percentage%</p>
+            </div>
+            
+            <div class="stats-grid">
+                <div class="stat-card">
+                    <div class="stat-number red">$high_risk_clauses</div>
+                    <div class="stat-label">High Risk Clauses</div>
+                </div>
+                <div class="stat-card">
+                    <div class="stat-number yellow">$moderate_risk_clauses</div>
+                    <div class="stat-label">Moderate Risk</div>
+                </div>
+                <div class="stat-card">
+                    <div class="stat-number green">$low_risk_clauses</div>
+                    <div class="stat-label">Low Risk</div>
+                </div>
+            </div>
+            
+            <div class="attachment-info">
+                <h3>Attached Report</h3>
+                <p>The complete analysis report is attached as a PDF document containing:</p>
+                <ul>
+                    <li>Detailed clause-by-clause analysis</li>
+                    <li>Risk assessment and explanations</li>
+                    <li>Legal implications and recommendations</li>
+                    <li>Visual risk indicators and charts</li>
+                </ul>
+            </div>
+            
+            <p>Should you have any questions regarding this analysis or require additional clarification, please feel free to contact our professional support team.</p>
+            
+            <p>Sincerely,<br>
+            <strong>The LegalSaathi Analysis Team</strong></p>
+        </div>
+        
+        <div class="footer">
+            <p><strong>LegalSaathi Document Advisor</strong></p>
+            <p>Professional Legal Document Analysis Services</p>
+            <div class="disclaimer">
+                This analysis is provided for informational purposes only and does not constitute legal advice. 
+                For matters requiring legal counsel, please consult with a qualified attorney licensed in your jurisdiction.
+            </div>
+        </div>
+    </div>
+</body>
+</html>
+""".strip())
+
+_CUSTOM_MESSAGE_HTML = Template("""
+            <div class="custom-message">
+                <h3>Personal Message</h3>
+                <p>$custom_message</p>
+            </div>
+""")
+
+_REPORT_TEXT_TEMPLATE = Template("""
+LEGAL DOCUMENT ANALYSIS REPORT
+==============================
+
+Dear Client,
+
+We have completed the analysis of your legal document. Please find the comprehensive report attached as a PDF document.
+
+$custom_message_block
+
+EXECUTIVE SUMMARY
+=================
+Risk Assessment: $risk_level
+Analysis Confidence: $confidence_percentage%
+
+$summary
+
+ANALYSIS BREAKDOWN
+==================
+High Risk Clauses: $high_risk_clauses
+Moderate Risk Clauses: $moderate_risk_clauses
+Low Risk Clauses: $low_risk_clauses
+
+COMPREHENSIVE REPORT
+====================
+The attached PDF report provides:
+- Detailed clause-by-clause analysis
+- Professional risk assessment and explanations
+- Legal implications and actionable recommendations
+- Visual risk indicators and professional charts
+
+Should you have any questions regarding this analysis or require additional clarification, 
+please feel free to contact our professional support team.
+
+Sincerely,
+The LegalSaathi Analysis Team
+
+---
+LegalSaathi Document Advisor
+Professional Legal Document Analysis Services
+
+IMPORTANT DISCLAIMER: This analysis is provided for informational purposes only and does not constitute legal advice. 
+For matters requiring legal counsel, please consult with a qualified attorney licensed in your jurisdiction.
+""".strip())
+
+_CUSTOM_MESSAGE_TEXT = Template("""
+PERSONAL MESSAGE
+================
+$custom_message
+
+""")
+
+
 
 class SMTPEmailService:
     """SMTP Email service for sending emails via Gmail SMTP"""
@@ -37,18 +194,27 @@ class SMTPEmailService:
         
         if not self.is_configured:
             logger.warning("SMTP email service not configured. Set GMAIL_SENDER_EMAIL and GMAIL_APP_PASSWORD in .env")
+        
+        # Authenticated keep-alive connections shared by every SMTPEmailService instance
+        self.smtp_pool = get_smtp_pool(
+            self.smtp_server,
+            self.smtp_port,
+            self.sender_email,
+            self.sender_password,
+            max_connections=int(os.getenv('SMTP_POOL_SIZE', '3'))
+        )
     
     def is_available(self) -> bool:
         """Check if SMTP service is available"""
         return self.is_configured
     
-    def check_rate_limit(self, user_id: str) -> Dict[str, Any]:
+    async def check_rate_limit(self, user_id: str) -> Dict[str, Any]:
         """Check rate limiting for user"""
-        return email_rate_limiter.check_rate_limit(user_id)
+        return await email_rate_limiter.check_rate_limit(user_id)
     
-    def increment_rate_limit(self, user_id: str):
-        """Increment rate limit counters for user"""
-        email_rate_limiter.increment_counter(user_id)
+    async def acquire_rate_limit(self, user_id: str) -> Dict[str, Any]:
+        """Use up one email from the user's budget, if any is left"""
+        return await email_rate_limiter.acquire(user_id)
     
     async def send_analysis_report(
         self, 
@@ -67,8 +233,8 @@ class SMTPEmailService:
                 delivery_status=EmailDeliveryStatus.FAILED
             )
         
-        # Check rate limits
-        rate_limit_info = self.check_rate_limit(user_id)
+        # Reserve against the rate limits
+        rate_limit_info = await self.acquire_rate_limit(user_id)
         if rate_limit_info.get('is_rate_limited', False):
             retry_after = int((rate_limit_info['next_reset_time'] - datetime.now()).total_seconds())
             return EmailSendResponse(
@@ -93,8 +259,6 @@ class SMTPEmailService:
             )
             
             if response.success:
-                # Increment rate limit counters
-                self.increment_rate_limit(user_id)
                 logger.info(f"Analysis report sent successfully to {user_email}")
             
             return response
@@ -117,53 +281,35 @@ class SMTPEmailService:
     ) -> EmailSendResponse:
         """Send email using SMTP"""
         try:
-            # Create message
-            msg = MIMEMultipart('alternative')
-            msg['From'] = f"{self.sender_name} <{self.sender_email}>"
-            msg['To'] = to_email
-            msg['Subject'] = subject
-            
-            # Add text and HTML parts
-            text_part = MIMEText(text_content, 'plain', 'utf-8')
-            html_part = MIMEText(html_content, 'html', 'utf-8')
-            
-            msg.attach(text_part)
-            msg.attach(html_part)
+            # Parts are kept as-is; MIME encoding happens while the pool's worker thread writes the message
+            msg = StreamingEmailMessage(
+                from_addr=self.sender_email,
+                to_addrs=[to_email],
+                subject=subject,
+                text_content=text_content,
+                html_content=html_content,
+                sender_name=self.sender_name
+            )
             
             # Add PDF attachment if provided
             if pdf_content and len(pdf_content) > 0:
-                pdf_attachment = MIMEBase('application', 'pdf')
-                pdf_attachment.set_payload(pdf_content)
-                encoders.encode_base64(pdf_attachment)
-                pdf_attachment.add_header(
-                    'Content-Disposition',
-                    f'attachment; filename="legal_analysis_{datetime.now().strftime("%Y%m%d_%H%M%S")}.pdf"'
+                msg.add_attachment(
+                    pdf_content,
+                    f'legal_analysis_{datetime.now().strftime("%Y%m%d_%H%M%S")}.pdf',
+                    'application/pdf'
                 )
-                pdf_attachment.add_header('Content-Type', 'application/pdf')
-                msg.attach(pdf_attachment)
                 logger.info(f"PDF attachment added, size: {len(pdf_content)} bytes")
             else:
                 logger.warning("No PDF content to attach or PDF content is empty")
             
-            # Send email
-            logger.info(f"Attempting SMTP connection to {self.smtp_server}:{self.smtp_port}")
-            logger.info(f"Using sender email: {self.sender_email}")
-            logger.info(f"App password length: {len(self.sender_password)} characters")
-            
-            with smtplib.SMTP(self.smtp_server, self.smtp_port) as server:
-                server.set_debuglevel(1)  # Enable SMTP debugging
-                logger.info("Starting TLS...")
-                server.starttls()
-                logger.info("Attempting login...")
-                server.login(self.sender_email, self.sender_password)
-                logger.info("Login successful, sending message...")
-                server.send_message(msg)
+            # Send email over a pooled connection (encoding and SMTP conversation run off the event loop)
+            await self.smtp_pool.send_message(msg)
             
             logger.info(f"SMTP email sent successfully to {to_email}")
             
             return EmailSendResponse(
                 success=True,
-                message_id=f"smtp_{datetime.now().timestamp()}",
+                message_id=msg.message_id,
                 delivery_status=EmailDeliveryStatus.SENT
             )
             
@@ -189,129 +335,42 @@ class SMTPEmailService:
                 delivery_status=EmailDeliveryStatus.FAILED
             )
     
+    def get_transport_stats(self) -> Dict[str, Any]:
+        """SMTP connection pool statistics"""
+        return self.smtp_pool.get_stats()
+    
     def _generate_email_subject(self, analysis: DocumentAnalysisResponse) -> str:
         """Generate professional email subject line"""
         risk_level = analysis.overall_risk.level
         
         return f"Legal Document Analysis Report - {risk_level} Risk Assessment"
     
+    @staticmethod
+    def _template_vars(analysis: DocumentAnalysisResponse) -> Dict[str, Any]:
+        """Values shared by the HTML and text report templates"""
+        levels = [r.risk_assessment.level for r in analysis.clause_assessments]
+        return {
+            'risk_level': analysis.overall_risk.level,
+            'summary': analysis.summary,
+            'confidence_percentage': analysis.overall_risk.confidence_percentage,
+            'high_risk_clauses': levels.count("RED"),
+            'moderate_risk_clauses': levels.count("YELLOW"),
+            'low_risk_clauses': levels.count("GREEN")
+        }
+    
     def _generate_html_email_template(
         self, 
         analysis: DocumentAnalysisResponse, 
         custom_message: Optional[str] = None
     ) -> str:
         """Generate professional HTML email template"""
-        
-        risk_color = "#ef4444" if analysis.overall_risk.level == "RED" else "#f59e0b" if analysis.overall_risk.level == "YELLOW" else "#10b981"
-        risk_bg_color = "#fef2f2" if analysis.overall_risk.level == "RED" else "#fffbeb" if analysis.overall_risk.level == "YELLOW" else "#f0fdf4"
-        
-        high_risk_clauses = len([r for r in analysis.clause_assessments if r.risk_assessment.level == "RED"])
-        moderate_risk_clauses = len([r for r in analysis.clause_assessments if r.risk_assessment.level == "YELLOW"])
-        low_risk_clauses = len([r for r in analysis.clause_assessments if r.risk_assessment.level == "GREEN"])
-        
-        html_template = f"""
-<!DOCTYPE html>
-<html lang="en">
-<head>
-    <meta charset="UTF-8">
-    <meta name="viewport" content="width=device-width, initial-scale=1.0">
-    <title>Legal Document Analysis Report</title>
-    <style>
-        body {{ font-family: -apple-system, BlinkMacSystemFont, 'Segoe UI', Roboto, sans-serif; line-height: 1.6; color: #333; margin: 0; padding: 0; background-color: #f8fafc; }}
-        .container {{ max-width: 600px; margin: 0 auto; background-color: white; }}
-        .header {{ background: linear-gradient(135deg, #0ea5e9 0%, #3b82f6 100%); color: white; padding: 30px; text-align: center; }}
-        .header h1 {{ margin: 0; font-size: 28px; font-weight: 700; }}
-        .header p {{ margin: 10px 0 0 0; opacity: 0.9; font-size: 16px; }}
-        .content {{ padding: 30px; }}
-        .risk-summary {{ background-color: {risk_bg_color}; border-left: 4px solid {risk_color}; padding: 20px; margin: 20px 0; border-radius: 8px; }}
-        .risk-level {{ color: {risk_color}; font-weight: 700; font-size: 18px; margin-bottom: 10px; }}
-        .summary-text {{ font-size: 16px; line-height: 1.6; margin-bottom: 15px; }}
-        .stats-grid {{ display: grid; grid-template-columns: repeat(3, 1fr); gap: 15px; margin: 25px 0; }}
-        .stat-card {{ text-align: center; padding: 15px; background-color: #f8fafc; border-radius: 8px; border: 1px solid #e2e8f0; }}
-        .stat-number {{ font-size: 24px; font-weight: 700; margin-bottom: 5px; }}
-        .stat-label {{ font-size: 12px; color: #64748b; text-transform: uppercase; letter-spacing: 0.5px; }}
-        .red {{ color: #ef4444; }}
-        .yellow {{ color: #f59e0b; }}
-        .green {{ color: #10b981; }}
-        .attachment-info {{ background-color: #f1f5f9; border: 1px solid #cbd5e1; border-radius: 8px; padding: 20px; margin: 25px 0; }}
-        .attachment-info h3 {{ margin: 0 0 10px 0; color: #1e293b; }}
-        .footer {{ background-color: #1e293b; color: white; padding: 25px; text-align: center; }}
-        .footer p {{ margin: 5px 0; }}
-        .disclaimer {{ font-size: 12px; color: #94a3b8; margin-top: 15px; line-height: 1.4; }}
-        .custom-message {{ background-color: #eff6ff; border: 1px solid #bfdbfe; border-radius: 8px; padding: 20px; margin: 20px 0; }}
-        .custom-message h3 {{ margin: 0 0 10px 0; color: #1d4ed8; }}
-    </style>
-</head>
-<body>
-    <div class="container">
-        <div class="header">
-            <h1>Legal Document Analysis Report</h1>
-            <p>Professional Risk Assessment & Analysis</p>
-        </div>
-        
-        <div class="content">
-            <p>Dear Client,</p>
-            <p>We have completed the comprehensive analysis of your legal document. Please find the detailed professional report attached as a PDF document.</p>
-            
-            {f'''
-            <div class="custom-message">
-                <h3>Personal Message</h3>
-                <p>{custom_message}</p>
-            </div>
-            ''' if custom_message else ''}
-            
-            <div class="risk-summary">
-                <div class="risk-level">Overall Risk Level: {analysis.overall_risk.level}</div>
-                <div class="summary-text">{analysis.summary}</div>
-                <p><strong>Confidence Level:</strong> {analysis.overall_risk.confidence_percentage}%</p>
-            </div>
-            
-            <div class="stats-grid">
-                <div class="stat-card">
-                    <div class="stat-number red">{high_risk_clauses}</div>
-                    <div class="stat-label">High Risk Clauses</div>
-                </div>
-                <div class="stat-card">
-                    <div class="stat-number yellow">{moderate_risk_clauses}</div>
-                    <div class="stat-label">Moderate Risk</div>
-                </div>
-                <div class="stat-card">
-                    <div class="stat-number green">{low_risk_clauses}</div>
-                    <div class="stat-label">Low Risk</div>
-                </div>
-            </div>
-            
-            <div class="attachment-info">
-                <h3>Attached Report</h3>
-                <p>The complete analysis report is attached as a PDF document containing:</p>
-                <ul>
-                    <li>Detailed clause-by-clause analysis</li>
-                    <li>Risk assessment and explanations</li>
-                    <li>Legal implications and recommendations</li>
-                    <li>Visual risk indicators and charts</li>
-                </ul>
-            </div>
-            
-            <p>Should you have any questions regarding this analysis or require additional clarification, please feel free to contact our professional support team.</p>
-            
-            <p>Sincerely,<br>
-            <strong>The LegalSaathi Analysis Team</strong></p>
-        </div>
-        
-        <div class="footer">
-            <p><strong>LegalSaathi Document Advisor</strong></p>
-            <p>Professional Legal Document Analysis Services</p>
-            <div class="disclaimer">
-                This analysis is provided for informational purposes only and does not constitute legal advice. 
-                For matters requiring legal counsel, please consult with a qualified attorney licensed in your jurisdiction.
-            </div>
-        </div>
-    </div>
-</body>
-</html>
-        """
-        
-        return html_template.strip()
+        level = analysis.overall_risk.level
+        return _REPORT_HTML_TEMPLATE.substitute(
+            self._template_vars(analysis),
+            risk_color="#ef4444" if level == "RED" else "#f59e0b" if level == "YELLOW" else "#10b981",
+            risk_bg_color="#fef2f2" if level == "RED" else "#fffbeb" if level == "YELLOW" else "#f0fdf4",
+            custom_message_block=_CUSTOM_MESSAGE_HTML.substitute(custom_message=custom_message) if custom_message else ''
+        )
     
     def _generate_text_email_template(
         self, 
@@ -319,59 +378,7 @@ class SMTPEmailService:
         custom_message: Optional[str] = None
     ) -> str:
         """Generate plain text email template"""
-        
-        high_risk_clauses = len([r for r in analysis.clause_assessments if r.risk_assessment.level == "RED"])
-        moderate_risk_clauses = len([r for r in analysis.clause_assessments if r.risk_assessment.level == "YELLOW"])
-        low_risk_clauses = len([r for r in analysis.clause_assessments if r.risk_assessment.level == "GREEN"])
-        
-        text_template = f"""
-LEGAL DOCUMENT ANALYSIS REPORT
-==============================
-
-Dear Client,
-
-We have completed the analysis of your legal document. Please find the comprehensive report attached as a PDF document.
-
-{f'''
-PERSONAL MESSAGE
-================
-{custom_message}
-
-''' if custom_message else ''}
-
-EXECUTIVE SUMMARY
-=================
-Risk Assessment: {analysis.overall_risk.level}
-Analysis Confidence: {analysis.overall_risk.confidence_percentage}%
-
-{analysis.summary}
-
-ANALYSIS BREAKDOWN
-==================
-High Risk Clauses: {high_risk_clauses}
-Moderate Risk Clauses: {moderate_risk_clauses}
-Low Risk Clauses: {low_risk_clauses}
-
-COMPREHENSIVE REPORT
-====================
-The attached PDF report provides:
-- Detailed clause-by-clause analysis
-- Professional risk assessment and explanations
-- Legal implications and actionable recommendations
-- Visual risk indicators and professional charts
-
-Should you have any questions regarding this analysis or require additional clarification, 
-please feel free to contact our professional support team.
-
-Sincerely,
-The LegalSaathi Analysis Team
-
----
-LegalSaathi Document Advisor
-Professional Legal Document Analysis Services
-
-IMPORTANT DISCLAIMER: This analysis is provided for informational purposes only and does not constitute legal advice. 
-For matters requiring legal counsel, please consult with a qualified attorney licensed in your jurisdiction.
-        """
-        
-        return text_template.strip()
\ No newline at end of file
+        return _REPORT_TEXT_TEMPLATE.substitute(
+            self._template_vars(analysis),
+            custom_message_block=_CUSTOM_MESSAGE_TEXT.substitute(custom_message=custom_message) if custom_message else ''
+        )
@@ -0,0 +1,279 @@
+"""
+Pooled SMTP transport for FastAPI backend email services
+Keeps a few authenticated keep-alive connections and runs the blocking SMTP
+conversation in worker threads, so sending never stalls the event loop.
+"""
+
+import ssl
+import time
+import asyncio
+import smtplib
+import logging
+import threading
+from collections import deque
+from email.message import Message
+from typing import Dict, Any, Optional, List, Union
+
+from services.streaming_mime import StreamingEmailMessage
+
+logger = logging.getLogger(__name__)
+
+_pools: Dict[tuple, "SMTPConnectionPool"] = {}
+_pools_lock = threading.Lock()
+
+
+class _TrackingSMTP(smtplib.SMTP):
+    """SMTP client that remembers whether the current message's end-of-data marker went out"""
+
+    data_sent = False
+
+    def mail(self, sender, options=()):
+        self.data_sent = False
+        return super().mail(sender, options)
+
+    def send(self, s):
+        # Set before writing: once the marker may have reached the server, it may accept the message
+        if isinstance(s, (bytes, bytearray)) and (s == b".\r\n" or s.endswith(b"\r\n.\r\n")):
+            self.data_sent = True
+        return super().send(s)
+
+
+class _PooledConnection:
+    def __init__(self, smtp: smtplib.SMTP):
+        self.smtp = smtp
+        self.created_at = time.time()
+        self.last_used = self.created_at
+        self.messages_sent = 0
+
+
+class SMTPConnectionPool:
+    """
+    Bounded pool of authenticated SMTP connections.
+    Idle connections are reused while fresh, checked with NOOP after a quiet period
+    and closed once older than idle_timeout (servers drop idle sessions anyway).
+    """
+
+    def __init__(
+        self,
+        host: str,
+        port: int = 587,
+        username: str = "",
+        password: str = "",
+        use_tls: bool = True,
+        max_connections: int = 3,
+        idle_timeout: float = 240.0,
+        health_check_interval: float = 30.0,
+        max_messages_per_connection: int = 100,
+        timeout: float = 30.0
+    ):
+        self.host = host
+        self.port = port
+        self.username = username
+        self.password = password
+        self.use_tls = use_tls
+        self.max_connections = max_connections
+        self.idle_timeout = idle_timeout
+        self.health_check_interval = health_check_interval
+        self.max_messages_per_connection = max_messages_per_connection
+        self.timeout = timeout
+
+        self._idle: deque = deque()
+        self._lock = threading.Lock()
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self.stats = {
+            'messages_sent': 0,
+            'failures': 0,
+            'connections_opened': 0,
+            'connections_reused': 0,
+            'reconnects': 0,
+            'total_send_ms': 0.0
+        }
+
+    def _connect(self) -> _PooledConnection:
+        """Open, secure and authenticate a new connection (blocking)"""
+        smtp = _TrackingSMTP(self.host, self.port, timeout=self.timeout)
+        try:
+            smtp.ehlo()
+            if self.use_tls:
+                smtp.starttls(context=ssl.create_default_context())
+                smtp.ehlo()
+            if self.username and self.password:
+                smtp.login(self.username, self.password)
+        except Exception:
+            self._close(smtp)
+            raise
+        self.stats['connections_opened'] += 1
+        logger.info(f"Opened SMTP connection to {self.host}:{self.port}")
+        return _PooledConnection(smtp)
+
+    @staticmethod
+    def _close(smtp: smtplib.SMTP):
+        try:
+            smtp.quit()
+        except Exception:
+            try:
+                smtp.close()
+            except Exception:
+                pass
+
+    def _is_usable(self, connection: _PooledConnection) -> bool:
+        """Health check an idle connection before reuse (blocking)"""
+        idle = time.time() - connection.last_used
+        if idle > self.idle_timeout or connection.messages_sent >= self.max_messages_per_connection:
+            return False
+        if idle > self.health_check_interval:
+            try:
+                return connection.smtp.noop()[0] == 250
+            except Exception:
+                return False
+        return True
+
+    def _acquire(self) -> _PooledConnection:
+        while True:
+            with self._lock:
+                connection = self._idle.pop() if self._idle else None
+            if connection is None:
+                return self._connect()
+            if self._is_usable(connection):
+                self.stats['connections_reused'] += 1
+                return connection
+            self._close(connection.smtp)
+
+    def _release(self, connection: _PooledConnection):
+        connection.last_used = time.time()
+        with self._lock:
+            if len(self._idle) < self.max_connections:
+                self._idle.append(connection)
+                return
+        self._close(connection.smtp)
+
+    @staticmethod
+    def _send_streaming(smtp: smtplib.SMTP, message: StreamingEmailMessage,
+                        from_addr: Optional[str], to_addrs: Optional[List[str]]):
+        """
+        SMTP transaction that writes the message body chunk by chunk
+        The output of StreamingEmailMessage is 7-bit with CRLF endings and needs no
+        dot-stuffing, so it can go to the socket as generated.
+        """
+        smtp.ehlo_or_helo_if_needed()
+        from_addr = from_addr or message.from_addr
+        code, response = smtp.mail(from_addr)
+        if code != 250:
+            raise smtplib.SMTPSenderRefused(code, response, from_addr)
+        refused = {}
+        for recipient in to_addrs or message.to_addrs:
+            code, response = smtp.rcpt(recipient)
+            if code not in (250, 251):
+                refused[recipient] = (code, response)
+        if len(refused) == len(to_addrs or message.to_addrs):
+            raise smtplib.SMTPRecipientsRefused(refused)
+
+        code, response = smtp.docmd("data")
+        if code != 354:
+            raise smtplib.SMTPDataError(code, response)
+        for chunk in message.iter_chunks():
+            smtp.send(chunk)
+        smtp.send(b".\r\n")
+        code, response = smtp.getreply()
+        if code != 250:
+            raise smtplib.SMTPDataError(code, response)
+
+    def _send_blocking(self, message: Union[Message, StreamingEmailMessage], from_addr: Optional[str],
+                       to_addrs: Optional[List[str]]):
+        """
+        Send on a pooled connection, reconnecting once if the server dropped it
+
+        A connection lost after the end of the message data was sent is not retried: the
+        server may already have accepted the message, so the error goes to the caller
+        (the email outbox decides whether to try again) rather than risk a duplicate.
+        """
+        for attempt in range(2):
+            connection = self._acquire()
+            try:
+                if isinstance(message, StreamingEmailMessage):
+                    self._send_streaming(connection.smtp, message, from_addr, to_addrs)
+                else:
+                    connection.smtp.send_message(message, from_addr=from_addr, to_addrs=to_addrs)
+            except smtplib.SMTPServerDisconnected as e:
+                error = e
+            except smtplib.SMTPException:
+                # The session is still valid after a rejected message; reset it for reuse
+                try:
+                    connection.smtp.rset()
+                    self._release(connection)
+                except Exception:
+                    self._close(connection.smtp)
+                raise
+            except OSError as e:
+                # Socket-level failure (reset, timeout, broken pipe)
+                error = e
+            except Exception:
+                self._close(connection.smtp)
+                raise
+            else:
+                connection.messages_sent += 1
+                self._release(connection)
+                return
+
+            self._close(connection.smtp)
+            if attempt or connection.smtp.data_sent:
+                raise error
+            logger.warning(f"SMTP connection lost ({error}), reconnecting")
+            self.stats['reconnects'] += 1
+
+    async def send_message(self, message: Union[Message, StreamingEmailMessage], from_addr: Optional[str] = None,
+                           to_addrs: Optional[List[str]] = None):
+        """
+        Send a message without blocking the event loop; raises smtplib errors on failure
+
+        StreamingEmailMessage bodies are encoded while being written, in the worker thread.
+        """
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.max_connections)
+
+        async with self._semaphore:
+            start = time.perf_counter()
+            try:
+                await asyncio.to_thread(self._send_blocking, message, from_addr, to_addrs)
+            except Exception:
+                self.stats['failures'] += 1
+                raise
+            self.stats['messages_sent'] += 1
+            self.stats['total_send_ms'] += (time.perf_counter() - start) * 1000
+
+    def close(self):
+        """Close every idle connection"""
+        with self._lock:
+            connections = list(self._idle)
+            self._idle.clear()
+        for connection in connections:
+            self._close(connection.smtp)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get pool statistics"""
+        sent = self.stats['messages_sent']
+        return {
+            **self.stats,
+            'idle_connections': len(self._idle),
+            'max_connections': self.max_connections,
+            'avg_send_ms': self.stats['total_send_ms'] / sent if sent else 0.0
+        }
+
+
+def get_smtp_pool(host: str, port: int, username: str, password: str, **kwargs) -> SMTPConnectionPool:
+    """Get (or create) the process-wide pool for an SMTP server and account"""
+    key = (host, port, username, password)
+    with _pools_lock:
+        pool = _pools.get(key)
+        if pool is None:
+            pool = SMTPConnectionPool(host, port, username, password, **kwargs)
+            _pools[key] = pool
+        return pool
+
+
+def close_smtp_pools():
+    """Close idle connections of every pool (application shutdown)"""
+    with _pools_lock:
+        pools = list(_pools.values())
+    for pool in pools:
+        pool.close()
@@ -221,6 +221,15 @@ class StartupManager:
         """Gracefully shutdown all services"""
         logger.info("🛑 Starting graceful application shutdown")
         await self.service_manager.shutdown()
+        
+        from services.email_outbox import stop_email_outboxes
+        await stop_email_outboxes()
+        
+        from services.worker_pool import shutdown_process_pools
+        shutdown_process_pools()
+        
+        from services.smtp_pool import close_smtp_pools
+        close_smtp_pools()
         logger.info("✅ Application shutdown completed")
 
 
@@ -273,6 +282,13 @@ async def optimized_lifespan(app):
         except Exception as e:
             logger.warning(f"⚠️ Could not update legacy health controller: {e}")
         
+        # Deliver any email left in the outbox by a previous run
+        from services.email_outbox import start_email_outboxes
+        await start_email_outboxes()
+        
+        from services.report_rendering import warm_render_pool
+        await warm_render_pool()
+        
         logger.info("🌟 Legal Saathi is ready to serve requests!")
         
         yield
@@ -0,0 +1,127 @@
+"""
+Streaming MIME messages for outgoing email
+A message is kept as its parts (text, HTML, raw attachment bytes) and serialized to the
+SMTP socket chunk by chunk, base64-encoding attachments a slice at a time. Nothing is
+encoded until the transport writes it, which happens in the SMTP pool's worker threads.
+"""
+
+import base64
+import uuid
+from email.header import Header
+from email.utils import formataddr, formatdate, make_msgid
+from typing import Iterator, List, Optional, Tuple
+
+# 57 input bytes make one 76-character base64 line; encode this many lines per chunk
+_LINES_PER_CHUNK = 1024
+_CHUNK_BYTES = 57 * _LINES_PER_CHUNK
+
+
+def encode_base64_chunks(data: bytes) -> Iterator[bytes]:
+    """Base64 body lines (CRLF-terminated) for data, one bounded chunk at a time"""
+    view = memoryview(data)
+    for start in range(0, len(view), _CHUNK_BYTES):
+        yield base64.encodebytes(view[start:start + _CHUNK_BYTES]).replace(b"\n", b"\r\n")
+
+
+def _header_value(value: str) -> str:
+    """RFC 2047-encode a header value when it is not plain ASCII"""
+    try:
+        value.encode('ascii')
+        return value
+    except UnicodeEncodeError:
+        return Header(value, 'utf-8').encode()
+
+
+class StreamingEmailMessage:
+    """
+    Outgoing email serialized lazily by iter_chunks().
+    Text and HTML bodies become a multipart/alternative part; with attachments it is
+    wrapped in multipart/mixed. Every body is base64-encoded, so the output is 7-bit
+    and never needs SMTP dot-stuffing.
+    """
+
+    def __init__(
+        self,
+        from_addr: str,
+        to_addrs: List[str],
+        subject: str,
+        text_content: Optional[str] = None,
+        html_content: Optional[str] = None,
+        sender_name: Optional[str] = None
+    ):
+        self.from_addr = from_addr
+        self.to_addrs = to_addrs
+        self.subject = subject
+        self.text_content = text_content
+        self.html_content = html_content
+        self.sender_name = sender_name
+        self.message_id = make_msgid(domain=from_addr.rsplit('@', 1)[-1] if '@' in from_addr else None)
+        self.attachments: List[Tuple[str, str, bytes]] = []
+
+    def add_attachment(self, data: bytes, filename: str, content_type: str = "application/pdf"):
+        """Attach raw bytes; they are encoded only while the message is being sent"""
+        self.attachments.append((filename, content_type, data))
+
+    @property
+    def size(self) -> int:
+        """Approximate unencoded size in bytes"""
+        return (len(self.text_content or "") + len(self.html_content or "")
+                + sum(len(data) for _, _, data in self.attachments))
+
+    def _headers(self) -> List[str]:
+        sender = formataddr((self.sender_name, self.from_addr)) if self.sender_name else self.from_addr
+        return [
+            f"From: {_header_value(sender)}",
+            f"To: {', '.join(self.to_addrs)}",
+            f"Subject: {_header_value(self.subject)}",
+            f"Date: {formatdate(localtime=True)}",
+            f"Message-ID: {self.message_id}",
+            "MIME-Version: 1.0"
+        ]
+
+    @staticmethod
+    def _text_part(content: str, subtype: str) -> Iterator[bytes]:
+        yield (
+            f"Content-Type: text/{subtype}; charset=\"utf-8\"\r\n"
+            "Content-Transfer-Encoding: base64\r\n\r\n"
+        ).encode('ascii')
+        yield from encode_base64_chunks(content.encode('utf-8'))
+
+    def _alternative(self) -> Iterator[bytes]:
+        bodies = [(content, subtype) for content, subtype in
+                  ((self.text_content, 'plain'), (self.html_content, 'html')) if content]
+        if len(bodies) == 1:
+            yield from self._text_part(*bodies[0])
+            return
+
+        boundary = f"alt_{uuid.uuid4().hex}"
+        yield f"Content-Type: multipart/alternative; boundary=\"{boundary}\"\r\n\r\n".encode('ascii')
+        for content, subtype in bodies:
+            yield f"--{boundary}\r\n".encode('ascii')
+            yield from self._text_part(content, subtype)
+        yield f"--{boundary}--\r\n".encode('ascii')
+
+    def iter_chunks(self) -> Iterator[bytes]:
+        """Serialized message (CRLF line endings), one chunk at a time"""
+        yield ("\r\n".join(self._headers()) + "\r\n").encode('ascii')
+        if not self.attachments:
+            yield from self._alternative()
+            return
+
+        boundary = f"mixed_{uuid.uuid4().hex}"
+        yield f"Content-Type: multipart/mixed; boundary=\"{boundary}\"\r\n\r\n".encode('ascii')
+        yield f"--{boundary}\r\n".encode('ascii')
+        yield from self._alternative()
+        for filename, content_type, data in self.attachments:
+            yield (
+                f"--{boundary}\r\n"
+                f"Content-Type: {content_type}; name=\"{filename}\"\r\n"
+                "Content-Transfer-Encoding: base64\r\n"
+                f"Content-Disposition: attachment; filename=\"{filename}\"\r\n\r\n"
+            ).encode('ascii')
+            yield from encode_base64_chunks(data)
+        yield f"--{boundary}--\r\n".encode('ascii')
+
+    def as_bytes(self) -> bytes:
+        """Whole serialized message (for debugging and non-streaming transports)"""
+        return b"".join(self.iter_chunks())
@@ -0,0 +1,361 @@
+"""
+Streaming speech-to-text for long recordings
+Audio is cut into fixed-duration frames and fed through a streaming recognizer in a
+worker thread; partial and final transcripts are yielded as they arrive. Only a bounded
+number of frames is ever buffered, so memory does not grow with recording length.
+"""
+
+import time
+import queue
+import struct
+import asyncio
+import logging
+import threading
+from collections import deque
+from types import SimpleNamespace
+from typing import Dict, Any, List, Optional, Iterator, AsyncIterator, Awaitable, Callable
+
+logger = logging.getLogger(__name__)
+
+FRAME_DURATION_MS = 100
+# Streaming recognize rejects audio messages above 25600 bytes
+MAX_FRAME_BYTES = 25600
+# Frames buffered between the reader and the recognizer thread (backpressure beyond this)
+MAX_BUFFERED_FRAMES = 50
+# A single recognize stream is limited to about five minutes of audio; restart before that
+MAX_STREAM_SECONDS = 290
+
+# Nominal byte rates for compressed formats, used only to size frames
+_COMPRESSED_FORMATS = {
+    'webm': ('WEBM_OPUS', 48000, 4000),
+    'ogg': ('OGG_OPUS', 48000, 4000),
+    'mp3': ('MP3', 44100, 16000),
+}
+
+
+def detect_audio_format(header: bytes, filename: str = "") -> Dict[str, Any]:
+    """
+    Recognition settings and byte rate for an audio stream from its first bytes
+
+    WAV input is parsed exactly (encoding LINEAR16, PCM offset skipped); other formats
+    use their container defaults and a nominal byte rate.
+    """
+    if header[:4] == b'RIFF' and header[8:12] == b'WAVE':
+        position = 12
+        fmt = None
+        while position + 8 <= len(header):
+            chunk_id = header[position:position + 4]
+            chunk_size = struct.unpack('<I', header[position + 4:position + 8])[0]
+            if chunk_id == b'fmt ':
+                channels, sample_rate = struct.unpack('<HI', header[position + 10:position + 16])
+                bits_per_sample = struct.unpack('<H', header[position + 22:position + 24])[0]
+                fmt = (channels, sample_rate, bits_per_sample)
+            elif chunk_id == b'data' and fmt:
+                channels, sample_rate, bits_per_sample = fmt
+                return {
+                    'encoding': 'LINEAR16',
+                    'sample_rate_hertz': sample_rate,
+                    'audio_channel_count': channels,
+                    'bytes_per_second': sample_rate * channels * bits_per_sample // 8,
+                    'header_size': position + 8
+                }
+            position += 8 + chunk_size + (chunk_size & 1)
+        raise ValueError("WAV header not found in the first bytes of the stream")
+
+    extension = filename.rsplit('.', 1)[-1].lower() if '.' in filename else 'webm'
+    if header[:4] == b'OggS':
+        extension = 'ogg'
+    elif header[:4] == b'\x1a\x45\xdf\xa3':
+        extension = 'webm'
+    encoding, sample_rate, bytes_per_second = _COMPRESSED_FORMATS.get(extension, _COMPRESSED_FORMATS['webm'])
+    return {
+        'encoding': encoding,
+        'sample_rate_hertz': sample_rate,
+        'audio_channel_count': 1,
+        'bytes_per_second': bytes_per_second,
+        'header_size': 0
+    }
+
+
+def frame_size(bytes_per_second: int, frame_ms: int = FRAME_DURATION_MS) -> int:
+    """Bytes in one fixed-duration frame, within the streaming message limit"""
+    return max(1, min(MAX_FRAME_BYTES, bytes_per_second * frame_ms // 1000))
+
+
+async def iter_frames(read: Callable[[int], Awaitable[bytes]], frame_bytes: int,
+                      initial: bytes = b"") -> AsyncIterator[bytes]:
+    """
+    Re-chunk an async byte source into fixed-size frames
+
+    Args:
+        read: Coroutine returning up to n bytes, or b"" at end of stream
+        frame_bytes: Frame size
+        initial: Bytes already read from the source (e.g. while sniffing the format)
+    """
+    buffer = bytearray(initial)
+    while True:
+        while len(buffer) >= frame_bytes:
+            yield bytes(buffer[:frame_bytes])
+            del buffer[:frame_bytes]
+        data = await read(frame_bytes)
+        if not data:
+            break
+        buffer.extend(data)
+    if buffer:
+        yield bytes(buffer)
+
+
+class GoogleStreamingRecognizer:
+    """Google Cloud Speech streaming_recognize behind the recognizer interface"""
+
+    def __init__(self, client):
+        self.client = client
+
+    def streaming_recognize(self, audio_config: Dict[str, Any], frames: Iterator[bytes]):
+        from google.cloud import speech
+
+        config = speech.RecognitionConfig(
+            encoding=getattr(speech.RecognitionConfig.AudioEncoding, audio_config['encoding']),
+            sample_rate_hertz=audio_config['sample_rate_hertz'],
+            audio_channel_count=audio_config.get('audio_channel_count', 1),
+            language_code=audio_config.get('language_code', 'en-US'),
+            enable_automatic_punctuation=audio_config.get('enable_punctuation', True),
+            model='latest_long'
+        )
+        streaming_config = speech.StreamingRecognitionConfig(
+            config=config,
+            interim_results=True,
+            single_utterance=False
+        )
+        requests = (speech.StreamingRecognizeRequest(audio_content=frame) for frame in frames)
+        return self.client.streaming_recognize(config=streaming_config, requests=requests)
+
+
+class FakeStreamingRecognizer:
+    """
+    Local stand-in for the streaming API (tests and offline development).
+    Reveals a scripted transcript one word every few frames as interim results and
+    finalizes a segment every few words, mimicking the shape of Google responses.
+    """
+
+    def __init__(self, transcript: str = "this is a test transcript", frames_per_word: int = 5,
+                 words_per_segment: int = 8, frame_delay: float = 0.0):
+        self.words = transcript.split()
+        self.frames_per_word = frames_per_word
+        self.words_per_segment = words_per_segment
+        self.frame_delay = frame_delay
+
+    @staticmethod
+    def _response(transcript: str, is_final: bool):
+        alternative = SimpleNamespace(transcript=transcript, confidence=0.9 if is_final else 0.0)
+        result = SimpleNamespace(alternatives=[alternative], is_final=is_final, stability=0.0 if is_final else 0.8)
+        return SimpleNamespace(results=[result])
+
+    def streaming_recognize(self, audio_config: Dict[str, Any], frames: Iterator[bytes]):
+        segment: List[str] = []
+        word_index = 0
+        for frame_number, _ in enumerate(frames, start=1):
+            if self.frame_delay:
+                time.sleep(self.frame_delay)
+            if frame_number % self.frames_per_word or not self.words:
+                continue
+            segment.append(self.words[word_index % len(self.words)])
+            word_index += 1
+            final = len(segment) >= self.words_per_segment
+            yield self._response(" ".join(segment), final)
+            if final:
+                segment = []
+        if segment:
+            yield self._response(" ".join(segment), True)
+
+
+class StreamingTranscriber:
+    """
+    Drives a recognizer over an async stream of audio frames.
+    Recognition runs in a worker thread fed through a bounded queue; long recordings
+    are split across consecutive recognize streams.
+    """
+
+    def __init__(self, recognizer, max_buffered_frames: int = MAX_BUFFERED_FRAMES,
+                 max_stream_seconds: int = MAX_STREAM_SECONDS, frame_ms: int = FRAME_DURATION_MS):
+        self.recognizer = recognizer
+        self.max_buffered_frames = max_buffered_frames
+        self.frames_per_stream = max(1, max_stream_seconds * 1000 // frame_ms)
+        self.frame_ms = frame_ms
+
+    async def transcribe(self, frames: AsyncIterator[bytes], audio_config: Dict[str, Any],
+                         max_seconds: Optional[float] = None) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Yield transcription events as they are recognized
+
+        Events are dicts with a 'type' of 'partial', 'final', 'complete' or 'error'.
+        'complete' carries the full transcript and is always the last event on success.
+        """
+        loop = asyncio.get_running_loop()
+        events: asyncio.Queue = asyncio.Queue()
+        stop = threading.Event()
+
+        def emit(event: Optional[Dict[str, Any]]):
+            loop.call_soon_threadsafe(events.put_nowait, event)
+
+        feeder = asyncio.create_task(self._feed(frames, audio_config, max_seconds, emit, stop))
+        try:
+            while True:
+                event = await events.get()
+                if event is None:
+                    break
+                yield event
+        finally:
+            stop.set()
+            if not feeder.done():
+                feeder.cancel()
+
+    async def _feed(self, frames: AsyncIterator[bytes], audio_config: Dict[str, Any],
+                    max_seconds: Optional[float], emit: Callable, stop: threading.Event):
+        loop = asyncio.get_running_loop()
+        start_time = time.time()
+        finals: List[str] = []
+        confidences: List[float] = []
+        frame_count = 0
+        stream_count = 0
+        # Frames a recognize stream ended without reading; replayed on the next stream
+        carried: deque = deque()
+        try:
+            iterator = frames.__aiter__()
+            exhausted = False
+            while not exhausted or carried:
+                # The queue itself is unbounded; slots bound how many frames it may hold
+                audio_queue: queue.Queue = queue.Queue()
+                slots = asyncio.Semaphore(self.max_buffered_frames)
+                offset = (frame_count - len(carried)) * self.frame_ms / 1000
+                session = asyncio.ensure_future(asyncio.to_thread(
+                    self._run_session, audio_queue, lambda: loop.call_soon_threadsafe(slots.release),
+                    audio_config, offset, emit, stop, finals, confidences
+                ))
+                stream_count += 1
+                sent = 0
+                ended_early = False
+                try:
+                    while sent < self.frames_per_stream:
+                        if carried:
+                            frame = carried.popleft()
+                        elif exhausted:
+                            break
+                        else:
+                            try:
+                                frame = await iterator.__anext__()
+                            except StopAsyncIteration:
+                                exhausted = True
+                                break
+                            frame_count += 1
+                            if max_seconds and frame_count * self.frame_ms / 1000 >= max_seconds:
+                                logger.warning(f"Streaming transcription stopped at the {max_seconds}s limit")
+                                exhausted = True
+                        if not await self._put(audio_queue, slots, frame, session):
+                            carried.appendleft(frame)
+                            ended_early = True
+                            break
+                        sent += 1
+                finally:
+                    audio_queue.put_nowait(None)
+                await session
+                
+                unread = self._drain(audio_queue)
+                if unread:
+                    carried.extendleft(reversed(unread))
+                    ended_early = True
+                if ended_early and carried:
+                    if len(unread) == sent:
+                        raise RuntimeError("Recognize stream ended without reading any audio")
+                    logger.info(f"Recognize stream {stream_count} ended early; "
+                                f"replaying {len(carried)} frames on a new stream")
+
+            emit({
+                'type': 'complete',
+                'transcript': " ".join(finals),
+                'confidence': sum(confidences) / len(confidences) if confidences else 0.0,
+                'audio_seconds': frame_count * self.frame_ms / 1000,
+                'frames': frame_count,
+                'streams': stream_count,
+                'processing_time': time.time() - start_time
+            })
+        except asyncio.CancelledError:
+            stop.set()
+            raise
+        except Exception as e:
+            logger.error(f"Streaming transcription failed: {e}")
+            emit({'type': 'error', 'error': str(e)})
+        finally:
+            emit(None)
+
+    @staticmethod
+    async def _put(audio_queue: queue.Queue, slots: asyncio.Semaphore, frame: bytes,
+                   session: asyncio.Future) -> bool:
+        """
+        Hand a frame to the recognizer thread, waiting while its buffer is full
+
+        Returns False, leaving the frame unsent, when the recognize stream has already
+        ended; raises the recognizer's error if it failed.
+        """
+        if not session.done():
+            acquire = asyncio.ensure_future(slots.acquire())
+            await asyncio.wait({acquire, session}, return_when=asyncio.FIRST_COMPLETED)
+            if acquire.done():
+                audio_queue.put_nowait(frame)
+                return True
+            acquire.cancel()
+        session.result()  # Surface the recognizer's error
+        return False
+
+    @staticmethod
+    def _drain(audio_queue: queue.Queue) -> List[bytes]:
+        """Frames left in the queue after its recognize stream finished"""
+        unread = []
+        while True:
+            try:
+                frame = audio_queue.get_nowait()
+            except queue.Empty:
+                return unread
+            if frame is not None:
+                unread.append(frame)
+
+    def _run_session(self, audio_queue: queue.Queue, release: Callable[[], None], audio_config: Dict[str, Any],
+                     offset: float, emit: Callable, stop: threading.Event, finals: List[str],
+                     confidences: List[float]):
+        """One recognize stream (worker thread)"""
+
+        def frames():
+            while not stop.is_set():
+                try:
+                    frame = audio_queue.get(timeout=0.5)
+                except queue.Empty:
+                    continue
+                if frame is None:
+                    return
+                release()
+                yield frame
+
+        for response in self.recognizer.streaming_recognize(audio_config, frames()):
+            if stop.is_set():
+                break
+            for result in response.results:
+                if not result.alternatives:
+                    continue
+                alternative = result.alternatives[0]
+                if result.is_final:
+                    finals.append(alternative.transcript.strip())
+                    confidences.append(alternative.confidence)
+                    emit({
+                        'type': 'final',
+                        'transcript': alternative.transcript.strip(),
+                        'confidence': alternative.confidence,
+                        'segment': len(finals),
+                        'stream_offset': offset
+                    })
+                else:
+                    emit({
+                        'type': 'partial',
+                        'transcript': alternative.transcript,
+                        'stability': getattr(result, 'stability', 0.0),
+                        'stream_offset': offset
+                    })
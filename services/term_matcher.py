@@ -0,0 +1,94 @@
+"""
+Single-pass phrase matching for glossary terms
+A word-level trie over a fixed vocabulary finds every term occurrence in one scan of
+the text (leftmost, longest match first, on word boundaries), and annotations are
+applied to the original text in one splice.
+"""
+
+import re
+from typing import Dict, Iterable, List, Optional, Tuple
+
+_WORD = re.compile(r"\w+")
+
+
+class TermMatcher:
+    """
+    Matches a fixed set of phrases in linear time.
+    Trie edges are (separator, word) pairs, where separator is ' ' for any whitespace
+    run or the literal characters between the words of the phrase (e.g. '-'), so
+    "force  majeure" matches "force majeure" but "non compete" does not match "non-compete".
+    Build once and reuse; matching cost is one pass over the text times the longest
+    phrase length in words.
+    """
+
+    def __init__(self, phrases: Iterable[str], case_sensitive: bool = False):
+        self.case_sensitive = case_sensitive
+        self._root: Dict = {}
+        self.max_words = 0
+        for phrase in phrases:
+            self.add(phrase)
+
+    def _fold(self, word: str) -> str:
+        return word if self.case_sensitive else word.lower()
+
+    @staticmethod
+    def _separator(gap: str) -> Optional[str]:
+        if not gap:
+            return None
+        return ' ' if gap.isspace() else gap
+
+    def add(self, phrase: str):
+        """Add a phrase; matches report it exactly as given here"""
+        words = list(_WORD.finditer(phrase))
+        if not words:
+            return
+        node = self._root.setdefault(('', self._fold(words[0].group())), {})
+        for previous, word in zip(words, words[1:]):
+            gap = self._separator(phrase[previous.end():word.start()])
+            node = node.setdefault((gap, self._fold(word.group())), {})
+        node[None] = phrase
+        self.max_words = max(self.max_words, len(words))
+
+    def find_all(self, text: str) -> List[Tuple[int, int, str]]:
+        """
+        Non-overlapping occurrences as (start, end, phrase), left to right
+
+        At each position the longest phrase wins; scanning resumes after it.
+        """
+        words = list(_WORD.finditer(text))
+        matches = []
+        index = 0
+        while index < len(words):
+            node = self._root.get(('', self._fold(words[index].group())))
+            best = None
+            position = index
+            while node is not None:
+                if None in node:
+                    best = (position, node[None])
+                position += 1
+                if position >= len(words) or position - index >= self.max_words:
+                    break
+                gap = self._separator(text[words[position - 1].end():words[position].start()])
+                node = node.get((gap, self._fold(words[position].group())))
+
+            if best is None:
+                index += 1
+                continue
+            last, phrase = best
+            matches.append((words[index].start(), words[last].end(), phrase))
+            index = last + 1
+        return matches
+
+
+def splice(text: str, insertions: List[Tuple[int, str]]) -> str:
+    """Insert strings at offsets of the original text in a single pass"""
+    if not insertions:
+        return text
+    parts = []
+    cursor = 0
+    for offset, insertion in sorted(insertions, key=lambda item: item[0]):
+        parts.append(text[cursor:offset])
+        parts.append(insertion)
+        cursor = offset
+    parts.append(text[cursor:])
+    return "".join(parts)
@@ -0,0 +1,163 @@
+"""
+Token-level text diff for clause comparison
+Myers' O(ND) algorithm over pre-tokenized words, punctuation and whitespace, producing
+compact edit scripts. Module-level functions so batches can run in worker processes.
+"""
+
+import re
+from typing import Dict, Any, List, Sequence, Tuple
+
+# Words, single punctuation marks and whitespace runs; joining the tokens restores the text
+_TOKEN_PATTERN = re.compile(r"\w+|[^\w\s]|\s+")
+
+# Beyond this many edits the pair is reported as a full replacement instead of diffed
+MAX_EDIT_DISTANCE = 2000
+
+
+def tokenize(text: str) -> List[str]:
+    return _TOKEN_PATTERN.findall(text)
+
+
+def _shortest_edit_trace(a: Sequence[int], b: Sequence[int], max_d: int) -> List[List[int]]:
+    """
+    Forward pass of Myers' algorithm
+
+    trace[d] holds the furthest x reached on diagonals -d-1..d+1 before round d,
+    which is all the backtrack needs. Returns None if more than max_d edits are needed.
+    """
+    n, m = len(a), len(b)
+    d_limit = min(n + m, max_d)
+    offset = d_limit + 1
+    v = [0] * (2 * offset + 1)  # v[offset + k] = furthest x on diagonal k
+    trace = []
+    for d in range(d_limit + 1):
+        trace.append(v[offset - d - 1:offset + d + 2])
+        for k in range(-d, d + 1, 2):
+            if k == -d or (k != d and v[offset + k - 1] < v[offset + k + 1]):
+                x = v[offset + k + 1]  # Move down: insertion from b
+            else:
+                x = v[offset + k - 1] + 1  # Move right: deletion from a
+            y = x - k
+            while x < n and y < m and a[x] == b[y]:
+                x += 1
+                y += 1
+            v[offset + k] = x
+            if x >= n and y >= m:
+                return trace
+    return None
+
+
+def _backtrack(a: Sequence[int], b: Sequence[int], trace: List[List[int]]) -> List[Tuple[str, int]]:
+    """Walk the trace back from (n, m); returns ('=' | '-' | '+', token index) in forward order"""
+    x, y = len(a), len(b)
+    edits = []
+    for d in range(len(trace) - 1, -1, -1):
+        row = trace[d]
+
+        def v(k: int) -> int:
+            return row[k + d + 1]
+
+        k = x - y
+        if k == -d or (k != d and v(k - 1) < v(k + 1)):
+            prev_k = k + 1
+        else:
+            prev_k = k - 1
+        prev_x = v(prev_k)
+        prev_y = prev_x - prev_k
+
+        while x > prev_x and y > prev_y:
+            x -= 1
+            y -= 1
+            edits.append(('=', x))
+        if d > 0:
+            if x == prev_x:
+                edits.append(('+', prev_y))
+            else:
+                edits.append(('-', prev_x))
+        x, y = prev_x, prev_y
+
+    edits.reverse()
+    return edits
+
+
+def diff_tokens(tokens1: List[str], tokens2: List[str], max_edit_distance: int = MAX_EDIT_DISTANCE) -> List[List[Any]]:
+    """
+    Diff two token lists into a compact edit script
+
+    Ops are ['=', n] for n unchanged characters, ['-', text] for text deleted from the
+    first version and ['+', text] for text inserted in the second. Replaying the script
+    over the first text yields the second.
+    """
+    # Common prefix and suffix never need the O(ND) search
+    prefix = 0
+    limit = min(len(tokens1), len(tokens2))
+    while prefix < limit and tokens1[prefix] == tokens2[prefix]:
+        prefix += 1
+    suffix = 0
+    while suffix < limit - prefix and tokens1[-1 - suffix] == tokens2[-1 - suffix]:
+        suffix += 1
+
+    middle1 = tokens1[prefix:len(tokens1) - suffix]
+    middle2 = tokens2[prefix:len(tokens2) - suffix]
+
+    # Intern tokens so the inner loop compares ints
+    ids: Dict[str, int] = {}
+    a = [ids.setdefault(token, len(ids)) for token in middle1]
+    b = [ids.setdefault(token, len(ids)) for token in middle2]
+
+    trace = _shortest_edit_trace(a, b, max_edit_distance) if a or b else []
+    if trace is None:
+        edits = [('-', i) for i in range(len(a))] + [('+', j) for j in range(len(b))]
+    else:
+        edits = _backtrack(a, b, trace)
+
+    ops: List[List[Any]] = []
+
+    def emit(op: str, text: str):
+        if not text:
+            return
+        value = len(text) if op == '=' else text
+        if ops and ops[-1][0] == op:
+            ops[-1][1] += value
+        else:
+            ops.append([op, value])
+
+    emit('=', "".join(tokens1[:prefix]))
+    for op, index in edits:
+        emit(op, middle2[index] if op == '+' else middle1[index])
+    emit('=', "".join(tokens1[len(tokens1) - suffix:]))
+    return ops
+
+
+def diff_texts(text1: str, text2: str) -> Dict[str, Any]:
+    """Token-level diff of two texts with summary statistics"""
+    ops = diff_tokens(tokenize(text1), tokenize(text2))
+
+    unchanged_chars = sum(value for op, value in ops if op == '=')
+    total_chars = len(text1) + len(text2)
+    return {
+        'ops': ops,
+        'inserted_words': sum(len(re.findall(r"\w+", value)) for op, value in ops if op == '+'),
+        'deleted_words': sum(len(re.findall(r"\w+", value)) for op, value in ops if op == '-'),
+        'similarity': round(2 * unchanged_chars / total_chars, 4) if total_chars else 1.0
+    }
+
+
+def diff_text_pairs(pairs: List[Tuple[str, str]]) -> List[Dict[str, Any]]:
+    """Diff a batch of (old, new) text pairs; module-level so it can run in worker processes"""
+    return [diff_texts(text1, text2) for text1, text2 in pairs]
+
+
+def apply_edit_script(text1: str, ops: List[List[Any]]) -> str:
+    """Rebuild the second text from the first and an edit script"""
+    cursor = 0
+    parts = []
+    for op, value in ops:
+        if op == '=':
+            parts.append(text1[cursor:cursor + value])
+            cursor += value
+        elif op == '-':
+            cursor += len(value)
+        else:
+            parts.append(value)
+    return "".join(parts)
@@ -0,0 +1,279 @@
+"""
+Shared translation memory for all translation paths
+Translations are keyed by normalized source text and language pair, held in an
+in-process LRU and persisted to a compact SQLite table shared by every worker, so a
+string translated once (via any endpoint) is never paid for again.
+"""
+
+import os
+import re
+import time
+import asyncio
+import sqlite3
+import hashlib
+import logging
+import threading
+from collections import OrderedDict
+from typing import Dict, Any, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+TRANSLATION_MEMORY_DB = os.getenv('TRANSLATION_MEMORY_DB', os.path.join('data', 'translation_memory.db'))
+
+_WHITESPACE = re.compile(r'\s+')
+_SEGMENT_BOUNDARY = re.compile(r'(?<=[.!?।])\s+')
+
+
+def normalize_source(text: str) -> str:
+    """Collapse whitespace so trivially different copies of a string share an entry"""
+    return _WHITESPACE.sub(' ', text).strip()
+
+
+def split_segments(text: str) -> List[str]:
+    """Sentence-level segments of a text"""
+    return [segment for segment in _SEGMENT_BOUNDARY.split(normalize_source(text)) if segment]
+
+
+class TranslationMemory:
+    """
+    Two-tier translation store.
+    Memory tier: OrderedDict LRU of recent entries. Disk tier: WITHOUT ROWID SQLite
+    table keyed by a 16-byte digest, trimmed by least recent use when it grows past
+    max_disk_entries. Entries older than max_age_days are treated as misses.
+    The database is opened on first use; the *_async methods keep its I/O off the event loop.
+    """
+
+    def __init__(self, db_path: str = TRANSLATION_MEMORY_DB, max_memory_entries: int = 10000,
+                 max_disk_entries: int = 200000, max_age_days: int = 30):
+        self.db_path = db_path
+        self.max_memory_entries = max_memory_entries
+        self.max_disk_entries = max_disk_entries
+        self.max_age = max_age_days * 86400
+        self._memory: "OrderedDict[bytes, Tuple[str, str, float]]" = OrderedDict()  # key -> (translation, source language, created)
+        self._lock = threading.Lock()
+        self._conn: Optional[sqlite3.Connection] = None
+        self._opened = False
+        self._disk_entries = 0
+        self.hits = 0
+        self.segment_hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def _connection(self) -> Optional[sqlite3.Connection]:
+        """The disk tier's connection, opened on first use (lock held by caller)"""
+        if self._opened:
+            return self._conn
+        self._opened = True
+
+        try:
+            directory = os.path.dirname(self.db_path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            self._conn = sqlite3.connect(self.db_path, check_same_thread=False)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("""
+                CREATE TABLE IF NOT EXISTS translation_memory (
+                    key BLOB PRIMARY KEY,
+                    translation TEXT NOT NULL,
+                    source_language TEXT NOT NULL,
+                    created_at INTEGER NOT NULL,
+                    last_used INTEGER NOT NULL
+                ) WITHOUT ROWID
+            """)
+            self._conn.execute("CREATE INDEX IF NOT EXISTS idx_tm_last_used ON translation_memory(last_used)")
+            self._conn.commit()
+            self._disk_entries = self._conn.execute("SELECT COUNT(*) FROM translation_memory").fetchone()[0]
+        except sqlite3.Error as e:
+            logger.warning(f"Translation memory persistence disabled ({self.db_path}): {e}")
+            self._conn = None
+        return self._conn
+
+    @staticmethod
+    def _key(text: str, source_language: str, target_language: str) -> bytes:
+        content = f"{source_language or 'auto'}\x1f{target_language}\x1f{normalize_source(text)}"
+        return hashlib.blake2b(content.encode('utf-8'), digest_size=16).digest()
+
+    def _lookup(self, keys: List[bytes]) -> Dict[bytes, Tuple[str, str]]:
+        """Resolve keys from memory, then disk (promoting disk hits)"""
+        found: Dict[bytes, Tuple[str, str]] = {}
+        now = time.time()
+        with self._lock:
+            missing = []
+            for key in keys:
+                entry = self._memory.get(key)
+                if entry is not None and now - entry[2] < self.max_age:
+                    self._memory.move_to_end(key)
+                    found[key] = (entry[0], entry[1])
+                else:
+                    missing.append(key)
+
+            if missing and self._connection() is not None:
+                try:
+                    for start in range(0, len(missing), 500):
+                        chunk = missing[start:start + 500]
+                        rows = self._conn.execute(
+                            f"SELECT key, translation, source_language, created_at FROM translation_memory "
+                            f"WHERE key IN ({','.join('?' * len(chunk))}) AND created_at > ?",
+                            (*chunk, int(now - self.max_age))
+                        ).fetchall()
+                        for key, translation, source_language, created_at in rows:
+                            found[key] = (translation, source_language)
+                            self._remember(key, (translation, source_language, created_at))
+                        if rows:
+                            self._conn.executemany(
+                                "UPDATE translation_memory SET last_used = ? WHERE key = ?",
+                                [(int(now), row[0]) for row in rows]
+                            )
+                    self._conn.commit()
+                except sqlite3.Error as e:
+                    logger.warning(f"Translation memory read failed: {e}")
+        return found
+
+    def _remember(self, key: bytes, entry: Tuple[str, str, float]):
+        """Insert into the memory tier (lock held by caller)"""
+        self._memory[key] = entry
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_memory_entries:
+            self._memory.popitem(last=False)
+
+    def get_many(self, texts: List[str], source_language: str, target_language: str) -> Dict[str, Dict[str, Any]]:
+        """
+        Look up many source strings in one pass
+
+        A string missing as a whole is still a hit when every one of its sentences is
+        known. Returns {text: {'translated_text', 'source_language'}} for the hits.
+        """
+        unique = list(dict.fromkeys(text for text in texts if text and text.strip()))
+        keys = {text: self._key(text, source_language, target_language) for text in unique}
+        found = self._lookup(list(keys.values()))
+
+        results: Dict[str, Dict[str, Any]] = {}
+        unresolved = []
+        for text in unique:
+            entry = found.get(keys[text])
+            if entry:
+                results[text] = {'translated_text': entry[0], 'source_language': entry[1]}
+            else:
+                unresolved.append(text)
+
+        # Segment-level reuse for multi-sentence strings
+        segmented = {text: split_segments(text) for text in unresolved}
+        segment_keys = {
+            segment: self._key(segment, source_language, target_language)
+            for segments in segmented.values() if len(segments) > 1 for segment in segments
+        }
+        segment_found = self._lookup(list(dict.fromkeys(segment_keys.values()))) if segment_keys else {}
+        for text in unresolved:
+            segments = segmented[text]
+            entries = [segment_found.get(segment_keys[segment]) for segment in segments] if len(segments) > 1 else [None]
+            if all(entries):
+                results[text] = {
+                    'translated_text': ' '.join(entry[0] for entry in entries),
+                    'source_language': entries[0][1]
+                }
+                self.segment_hits += 1
+            else:
+                self.misses += 1
+
+        self.hits += len(results)
+        return results
+
+    def get(self, text: str, source_language: str, target_language: str) -> Optional[Dict[str, Any]]:
+        """Look up one source string"""
+        return self.get_many([text], source_language, target_language).get(text)
+
+    def put_many(self, entries: List[Tuple[str, str]], source_language: str, target_language: str,
+                 detected_language: Optional[str] = None):
+        """
+        Store (source text, translation) pairs
+
+        Auto-detected translations are also stored under the detected source language.
+        """
+        detected = detected_language or source_language
+        languages = {source_language or 'auto', detected}
+        now = int(time.time())
+        rows = [
+            (self._key(text, language, target_language), translation, detected, now, now)
+            for text, translation in entries if text and text.strip() and translation
+            for language in languages
+        ]
+        if not rows:
+            return
+
+        with self._lock:
+            for key, translation, detected_source, created_at, _ in rows:
+                self._remember(key, (translation, detected_source, created_at))
+
+            if self._connection() is None:
+                return
+            try:
+                before = self._conn.total_changes
+                self._conn.executemany(
+                    "INSERT OR REPLACE INTO translation_memory (key, translation, source_language, created_at, last_used) "
+                    "VALUES (?, ?, ?, ?, ?)",
+                    rows
+                )
+                self._disk_entries += self._conn.total_changes - before
+                if self._disk_entries > self.max_disk_entries:
+                    self._evict_disk()
+                self._conn.commit()
+            except sqlite3.Error as e:
+                logger.warning(f"Translation memory write failed: {e}")
+
+    def put(self, text: str, source_language: str, target_language: str, translated_text: str,
+            detected_language: Optional[str] = None):
+        """Store one translation"""
+        self.put_many([(text, translated_text)], source_language, target_language, detected_language)
+
+    async def get_many_async(self, texts: List[str], source_language: str,
+                             target_language: str) -> Dict[str, Dict[str, Any]]:
+        """get_many() from a worker thread, for callers on the event loop"""
+        return await asyncio.to_thread(self.get_many, texts, source_language, target_language)
+
+    async def get_async(self, text: str, source_language: str, target_language: str) -> Optional[Dict[str, Any]]:
+        """get() from a worker thread, for callers on the event loop"""
+        return await asyncio.to_thread(self.get, text, source_language, target_language)
+
+    async def put_many_async(self, entries: List[Tuple[str, str]], source_language: str, target_language: str,
+                             detected_language: Optional[str] = None):
+        """put_many() from a worker thread, for callers on the event loop"""
+        await asyncio.to_thread(self.put_many, entries, source_language, target_language, detected_language)
+
+    async def put_async(self, text: str, source_language: str, target_language: str, translated_text: str,
+                        detected_language: Optional[str] = None):
+        """put() from a worker thread, for callers on the event loop"""
+        await asyncio.to_thread(self.put, text, source_language, target_language, translated_text, detected_language)
+
+    def _evict_disk(self):
+        """Drop the least recently used tenth of the disk tier (lock held by caller)"""
+        self._disk_entries = self._conn.execute("SELECT COUNT(*) FROM translation_memory").fetchone()[0]
+        excess = self._disk_entries - int(self.max_disk_entries * 0.9)
+        if excess <= 0:
+            return
+        self._conn.execute(
+            "DELETE FROM translation_memory WHERE key IN "
+            "(SELECT key FROM translation_memory ORDER BY last_used LIMIT ?)",
+            (excess,)
+        )
+        self._disk_entries -= excess
+        self.evictions += excess
+        logger.info(f"Evicted {excess} least recently used translation memory entries")
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get translation memory statistics"""
+        lookups = self.hits + self.misses
+        return {
+            'hits': self.hits,
+            'segment_hits': self.segment_hits,
+            'misses': self.misses,
+            'hit_rate': self.hits / lookups if lookups else 0.0,
+            'memory_entries': len(self._memory),
+            'disk_entries': self._disk_entries,
+            'evictions': self.evictions,
+            'persistent': self._conn is not None,
+            'max_age_days': self.max_age / 86400
+        }
+
+
+# Global instance
+translation_memory = TranslationMemory()
@@ -0,0 +1,93 @@
+"""
+Shared process pools for CPU-bound work in the FastAPI backend
+Pools are created lazily per workload and use the spawn start method, since forking a
+process that already holds gRPC channels (Vision, Document AI, Speech) is unsafe.
+"""
+
+import os
+import asyncio
+import logging
+import threading
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, Callable, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+_pools: Dict[str, ProcessPoolExecutor] = {}
+_failed_pools: set = set()
+_lock = threading.Lock()
+
+
+def get_process_pool(
+    name: str,
+    max_workers: Optional[int] = None,
+    initializer: Optional[Callable] = None,
+    initargs: tuple = ()
+) -> Optional[ProcessPoolExecutor]:
+    """
+    Get (or lazily create) the named process pool
+
+    Returns None when process pools cannot be used in this environment, in which
+    case callers should run the work in a thread instead.
+    """
+    with _lock:
+        if name in _failed_pools:
+            return None
+
+        pool = _pools.get(name)
+        if pool is None:
+            try:
+                workers = min(max_workers or 4, os.cpu_count() or 1)
+                pool = ProcessPoolExecutor(
+                    max_workers=workers,
+                    mp_context=multiprocessing.get_context('spawn'),
+                    initializer=initializer,
+                    initargs=initargs
+                )
+                _pools[name] = pool
+                logger.info(f"Created '{name}' process pool with {workers} workers")
+            except Exception as e:
+                logger.warning(f"Process pool '{name}' unavailable: {e}, using threads")
+                _failed_pools.add(name)
+                return None
+
+        return pool
+
+
+def mark_pool_broken(name: str):
+    """Stop using a pool whose workers died; later calls fall back to threads"""
+    with _lock:
+        pool = _pools.pop(name, None)
+        _failed_pools.add(name)
+    if pool is not None:
+        pool.shutdown(wait=False, cancel_futures=True)
+
+
+async def run_in_process_pool(
+    name: str,
+    func: Callable,
+    *args: Any,
+    max_workers: Optional[int] = None,
+    initializer: Optional[Callable] = None
+) -> Any:
+    """Run a picklable module-level function in the named pool, or in a thread if pools are unavailable"""
+    pool = get_process_pool(name, max_workers=max_workers, initializer=initializer)
+    if pool is not None:
+        try:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(pool, func, *args)
+        except BrokenProcessPool as e:
+            logger.warning(f"Process pool '{name}' broken: {e}, falling back to threads")
+            mark_pool_broken(name)
+    return await asyncio.to_thread(func, *args)
+
+
+def shutdown_process_pools():
+    """Shut down every pool (application shutdown)"""
+    with _lock:
+        pools = list(_pools.values())
+        _pools.clear()
+    for pool in pools:
+        pool.shutdown(wait=False, cancel_futures=True)